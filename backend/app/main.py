@@ -1,17 +1,43 @@
 import io
+import os
+import re
+import json
+import time
 import base64
+import copy
+import bisect
+import hashlib
+import hmac
+import math
+import sqlite3
+import shutil
+import struct
+import tempfile
+import asyncio
+import contextlib
+import functools
+import threading
+import uuid
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from collections import OrderedDict, deque
 import fastf1
+from fastf1.core import Laps, SessionResults
 import pandas as pd
 import numpy as np
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+import matplotlib
+matplotlib.use("Agg")
+from fastapi import FastAPI, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from matplotlib import pyplot as plt
+from starlette.routing import Match
+from matplotlib.figure import Figure
+from matplotlib.patches import Circle
 from matplotlib.collections import LineCollection
 import matplotlib.lines as mlines
-import requests
-from matplotlib.colors import ListedColormap
+import httpx
 from matplotlib.colors import LinearSegmentedColormap
+from matplotlib.colors import Normalize
 from matplotlib.lines import Line2D
 
 app = FastAPI()
@@ -25,143 +51,3121 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+# Metrics served by /metrics in the Prometheus text format: request latency and in-flight requests
+# per route, and the time spent in each stage of building a response. Stage and route labels are
+# a small fixed set, so every series is kept for the life of the process
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class Metrics:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self._families = {}  # name -> (type, help, {labels: histogram counts or gauge value})
+        self._lock = threading.Lock()
+
+    def describe(self, name, kind, text):
+        self._families[name] = (kind, text, {})
+
+    def observe(self, name, value, **labels):
+        # Histogram observation; counts are kept per bucket and made cumulative when rendered
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._families[name][2]
+            counts = series.get(key)
+            if counts is None:
+                counts = series[key] = [0] * len(self.buckets) + [0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def add(self, name, amount, **labels):
+        # Gauge change
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._families[name][2]
+            series[key] = series.get(key, 0) + amount
+
+    def render(self, scraped=()):
+        # The exposition text; scraped holds (name, type, help, [(labels, value)]) families of
+        # counters and gauges read at scrape time
+        def escape(value):
+            return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        def label_text(labels):
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels) + "}"
+
+        lines = []
+        with self._lock:
+            for name, (kind, text, series) in self._families.items():
+                lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+                for labels, value in sorted(series.items()):
+                    if kind == "gauge":
+                        lines.append(f"{name}{label_text(labels)} {value}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, value):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{label_text(labels + (('le', repr(bound)),))} {cumulative}")
+                    lines.append(f"{name}_bucket{label_text(labels + (('le', '+Inf'),))} {value[-1]}")
+                    lines.append(f"{name}_sum{label_text(labels)} {value[-2]}")
+                    lines.append(f"{name}_count{label_text(labels)} {value[-1]}")
+        for name, kind, text, samples in scraped:
+            lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+            lines += [f"{name}{label_text(tuple(sorted(labels.items())))} {value}" for labels, value in samples]
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics(METRICS_BUCKETS)
+metrics.describe("anemoi_http_request_duration_seconds", "histogram", "Time to the end of the response, by route template")
+metrics.describe("anemoi_http_requests_in_flight", "gauge", "Requests being served, by route template")
+metrics.describe(
+    "anemoi_stage_duration_seconds", "histogram",
+    "Time spent in each stage of a request: get_session, store_load, session_load, telemetry_extraction, compute, "
+    "matplotlib_render, png_encode, image_convert, base64_encode, ergast_page"
+)
+
+# Stage timings taken on a render worker are collected here and sent back with the result,
+# since a render process has its own copy of the metrics
+stage_collector = threading.local()
+
+
+def record_stage(stage, seconds):
+    collected = getattr(stage_collector, "timings", None)
+    if collected is not None:
+        collected.append((stage, seconds))
+    else:
+        metrics.observe("anemoi_stage_duration_seconds", seconds, stage=stage)
+
+
+@contextlib.contextmanager
+def stage_timer(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    # Latency and in-flight requests per route template (so /jobs/{job_id} is one series);
+    # the latency runs to the end of the body, which matters for the streaming routes
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        route = "unmatched"
+        for candidate in app.router.routes:
+            if candidate.matches(scope)[0] == Match.FULL:
+                route = candidate.path
+                break
+
+        status = 500
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.add("anemoi_http_requests_in_flight", 1, route=route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.add("anemoi_http_requests_in_flight", -1, route=route)
+            metrics.observe(
+                "anemoi_http_request_duration_seconds", time.perf_counter() - started,
+                route=route, method=scope["method"], status=status
+            )
+
+
+app.add_middleware(MetricsMiddleware)
+
+# Session cache configuration (byte budget for loaded FastF1 sessions)
+SESSION_CACHE_MAX_BYTES = int(os.environ.get("ANEMOI_SESSION_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+# How long a session whose telemetry failed to load is answered as unavailable before retrying
+SESSION_UNAVAILABLE_TTL_SECONDS = float(os.environ.get("ANEMOI_SESSION_UNAVAILABLE_TTL_SECONDS", 300))
+
+# Keyword arguments passed to session.load() for each load profile, lightest first. Each payload
+# asks for the lightest profile that has the data it reads: "results" for session.results only,
+# "laps" for lap timing, "telemetry" for car and position data on top of the laps
+SESSION_LOAD_PROFILES = {
+    "results": {"laps": False, "telemetry": False, "weather": False, "messages": False},
+    "laps": {"laps": True, "telemetry": False, "weather": False, "messages": False},
+    "telemetry": {"laps": True, "telemetry": True, "weather": False, "messages": False},
+}
+
+
+def profile_covers(loaded, profile):
+    # Whether a session loaded with one profile has everything another profile needs
+    profiles = list(SESSION_LOAD_PROFILES)
+    return profiles.index(loaded) >= profiles.index(profile)
+
+
+# FastF1 disk cache configuration. The backend owns FastF1's cache directory, bounded by a byte
+# budget; ANEMOI_FASTF1_OFFLINE=1 serves only sessions already cached (here or in the telemetry
+# store) and never goes to the network, which is how read replicas run
+FASTF1_CACHE_DIR = os.environ.get("ANEMOI_FASTF1_CACHE_DIR", os.path.join(tempfile.gettempdir(), "anemoi-fastf1"))
+FASTF1_CACHE_MAX_BYTES = int(os.environ.get("ANEMOI_FASTF1_CACHE_MAX_BYTES", 10 * 1024 ** 3))
+FASTF1_OFFLINE = os.environ.get("ANEMOI_FASTF1_OFFLINE", "0") == "1"
+# Other workers share the directory, so the size index is rebuilt from disk this often
+FASTF1_CACHE_RESCAN_SECONDS = float(os.environ.get("ANEMOI_FASTF1_CACHE_RESCAN_SECONDS", 600))
+
+# The cache manager leans on FastF1 internals: the requests-cache session of the HTTP tier, the
+# live timing page list, and the calls Session.load makes. They are checked against this release
+# (requirements.txt pins 3.4.4) and looked up defensively, so if a newer FastF1 moves one the
+# feature it backs switches off instead of failing requests
+FASTF1_TESTED_VERSION = "3.4"
+if not fastf1.__version__.startswith(FASTF1_TESTED_VERSION + "."):
+    print(f"FastF1 {fastf1.__version__} is untested with the cache manager (tested with {FASTF1_TESTED_VERSION}.x)")
+FASTF1_RACE_LIKE_SESSIONS = ("Race", "Sprint", "Sprint Qualifying")
+
+
+def fastf1_http_cache():
+    # requests-cache backend of FastF1's HTTP tier, or None when unavailable
+    session = getattr(fastf1.Cache, "_requests_session_cached", None)
+    return getattr(session, "cache", None)
+
+
+def fastf1_livetiming_urls(api_path):
+    # URLs FastF1 fetches the live timing pages of a session from, or [] if it no longer says
+    try:
+        from fastf1._api import base_url, base_url_mirror, pages
+        return [base + api_path + page for base in (base_url, base_url_mirror) for page in pages.values()]
+    except (ImportError, AttributeError, TypeError):
+        return []
+
+
+def fastf1_cache_files(session, profile):
+    # FastF1's cached API responses (<name>.ff1pkl in a session's directory) that Session.load
+    # requests for a load profile, following the calls it makes in FastF1 3.4. Sessions without
+    # F1 live timing support are loaded from Ergast alone and have none
+    if not session.f1_api_support:
+        return []
+    options = SESSION_LOAD_PROFILES[profile]
+    names = ["session_info", "driver_info"]
+    if options["laps"]:
+        names += ["session_status_data", "track_status_data", "_extended_timing_data", "timing_app_data"]
+        if session.name in getattr(session, "_RACE_LIKE_SESSIONS", FASTF1_RACE_LIKE_SESSIONS):
+            names.append("lap_count")
+    if options["telemetry"]:
+        names += ["car_data", "position_data"]
+    if options["weather"]:
+        names.append("weather_data")
+    if options["messages"]:
+        names.append("race_control_messages")
+    return names
+
+
+class SessionUnavailableError(Exception):
+    pass
+
+
+class FastF1Cache:
+    # FastF1's two cache tiers in one directory: the parsed API responses of each session as
+    # pickles under <year>/<event>/<session>/, and the raw HTTP responses in
+    # fastf1_http_cache.sqlite. Sessions are the unit of eviction: the mtime of a session's
+    # directory, refreshed whenever the session is loaded, is the LRU clock, and evicting a session
+    # also drops its livetiming responses from the HTTP tier. The budget covers the session
+    # directories; the HTTP tier only holds what those sessions were built from, plus schedules.
+    # Sizes are kept in an index updated as sessions are loaded and removed, and rebuilt from disk
+    # every rescan_seconds, so checking the budget after a load doesn't walk the whole tree
+    def __init__(self, directory, max_bytes, offline, rescan_seconds=FASTF1_CACHE_RESCAN_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.rescan_seconds = rescan_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._index = None  # path relative to the directory -> (mtime, bytes) per session
+        self._bytes = 0
+        self._scanned_at = 0.0
+        self._lock = threading.Lock()
+
+    def enable(self):
+        os.makedirs(self.directory, exist_ok=True)
+        fastf1.Cache.enable_cache(self.directory)
+        fastf1.Cache.offline_mode(self.offline)
+
+    def _session_path(self, session):
+        # api_path looks like /static/2023/2023-09-03_Italian_Grand_Prix/2023-09-03_Race/
+        return os.path.join(self.directory, *session.api_path.strip("/").split("/")[1:])
+
+    def lookup(self, session, profile):
+        # Whether a session's data for the profile is cached, counted as a lookup
+        path = self._session_path(session)
+        cached = all(
+            os.path.exists(os.path.join(path, f"{name}.ff1pkl")) for name in fastf1_cache_files(session, profile)
+        )
+        with self._lock:
+            if cached:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return cached
+
+    def touch(self, session):
+        # Refresh the session's LRU clock and re-measure its directory, which a load may have grown
+        path = self._session_path(session)
+        try:
+            os.utime(path)
+            mtime = os.stat(path).st_mtime
+            size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.name.endswith(".ff1pkl"))
+        except OSError:
+            return
+        with self._lock:
+            if self._index is not None:
+                self._set_entry(os.path.relpath(path, self.directory), (mtime, size))
+
+    def _set_entry(self, relative_path, entry):
+        # Replace (or with None, drop) the index entry of a session, keeping the total in step
+        previous = self._index.pop(relative_path, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        if entry is not None:
+            self._index[relative_path] = entry
+            self._bytes += entry[1]
+
+    def _scan(self):
+        index = {}
+        for root, dirs, files in os.walk(self.directory):
+            if root == self.directory:
+                dirs[:] = [name for name in dirs if name.isdigit()]
+            pickles = [name for name in files if name.endswith(".ff1pkl")]
+            if not pickles:
+                continue
+            try:
+                mtime = os.stat(root).st_mtime
+                size = sum(os.path.getsize(os.path.join(root, name)) for name in pickles)
+            except OSError:
+                continue
+            index[os.path.relpath(root, self.directory)] = (mtime, size)
+        self._index = index
+        self._bytes = sum(size for _, size in index.values())
+        self._scanned_at = time.monotonic()
+
+    def _entries(self, rescan=False):
+        # (mtime, size in bytes, path relative to the cache directory) per session directory, from
+        # the index; called with the lock held
+        if rescan or self._index is None or time.monotonic() - self._scanned_at > self.rescan_seconds:
+            self._scan()
+        return [(mtime, size, relative_path) for relative_path, (mtime, size) in self._index.items()]
+
+    def _remove(self, relative_path):
+        path = os.path.join(self.directory, relative_path)
+        shutil.rmtree(path, ignore_errors=True)
+        self._set_entry(relative_path, None)
+        # The event directory goes too once its last session is gone
+        try:
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass
+
+        http_cache = fastf1_http_cache()
+        urls = fastf1_livetiming_urls("/static/" + relative_path.replace(os.sep, "/") + "/")
+        if http_cache is not None and urls:
+            try:
+                http_cache.delete(urls=urls)
+            except Exception as e:
+                print(f"Error removing {relative_path} from the FastF1 HTTP cache: {e}")
+
+    def evict(self):
+        with self._lock:
+            entries = self._entries()
+            if self._bytes <= self.max_bytes:
+                return
+            for _, size, relative_path in sorted(entries):
+                if self._bytes <= self.max_bytes:
+                    break
+                self._remove(relative_path)
+                self.evictions += 1
+
+    def sessions(self):
+        with self._lock:
+            entries = sorted(self._entries(), reverse=True)
+        return [
+            {"path": relative_path.replace(os.sep, "/"), "bytes": size, "last_used": pd.Timestamp(mtime, unit="s").isoformat()}
+            for mtime, size, relative_path in entries
+        ]
+
+    def purge(self, year=None, event=None, session=None, http=False):
+        # Remove the cached sessions matching every given filter (year exactly, event and session
+        # as case-insensitive parts of the directory names) and, with http, the whole HTTP tier
+        removed = []
+        with self._lock:
+            for _, size, relative_path in self._entries(rescan=True):
+                parts = relative_path.split(os.sep)
+                if len(parts) != 3:
+                    continue
+                if year is not None and parts[0] != str(year):
+                    continue
+                if event is not None and event.lower().replace(" ", "_") not in parts[1].lower():
+                    continue
+                if session is not None and session.lower().replace(" ", "_") not in parts[2].lower():
+                    continue
+                self._remove(relative_path)
+                removed.append({"path": "/".join(parts), "bytes": size})
+
+            http_cache = fastf1_http_cache()
+            if http and http_cache is not None:
+                http_cache.clear()
+        return removed
+
+    def stats(self):
+        try:
+            http_bytes = os.path.getsize(os.path.join(self.directory, "fastf1_http_cache.sqlite"))
+        except OSError:
+            http_bytes = 0
+        with self._lock:
+            entries = self._entries()
+            lookups = self.hits + self.misses
+            return {
+                "directory": self.directory,
+                "offline": self.offline,
+                "fastf1_version": fastf1.__version__,
+                "http_tier_managed": fastf1_http_cache() is not None and bool(fastf1_livetiming_urls("/")),
+                "entries": len(entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+            }
+
+
+fastf1_cache = FastF1Cache(FASTF1_CACHE_DIR, FASTF1_CACHE_MAX_BYTES, FASTF1_OFFLINE)
+fastf1_cache.enable()
+
+
+# Car and position channels kept per driver once a session's telemetry is loaded, with the dtype
+# each is stored in. Everything else FastF1 loads (Date, Time, RPM, DRS, Z, Status, Source) is
+# dropped, and SessionTime is kept as int32 milliseconds
+COMPACT_CAR_CHANNELS = {"Speed": np.float32, "Throttle": np.float32, "Brake": np.bool_, "nGear": np.int8}
+COMPACT_POS_CHANNELS = {"X": np.float32, "Y": np.float32}
+
+# Lap columns holding a few distinct strings, stored as categoricals
+COMPACT_LAP_CATEGORIES = ["Driver", "DriverNumber", "Team", "Compound", "TrackStatus", "DeletedReason"]
+
+
+def timedelta_ms(values):
+    # Timedeltas (a Series or a scalar) as integer milliseconds
+    return np.asarray(values, dtype="timedelta64[ns]").astype(np.int64) // 1_000_000
+
+
+def compact_telemetry(telemetry, channels):
+    # One driver's FastF1 telemetry as a dict of column arrays, in session time order
+    columns = {"SessionTime": timedelta_ms(telemetry['SessionTime']).astype(np.int32)}
+    for name, dtype in channels.items():
+        columns[name] = telemetry[name].to_numpy().astype(dtype)
+    return columns
+
+
+def compact_session(session):
+    # Shrink a freshly loaded session in place. The car and position data FastF1 loaded move to
+    # session._compact_telemetry as compact_telemetry() dicts per driver number, read through
+    # session_telemetry() and lap_samples(); FastF1's own _car_data and _pos_data are deleted, so
+    # session.car_data, Lap.get_car_data() and Lap.get_telemetry() raise DataNotLoadedError on a
+    # cached session instead of handing out something else. Lap timedeltas stay Timedelta,
+    # FastF1's lap selection depends on them and they are a small part of a session
+    laps = getattr(session, "_laps", None)
+    if laps is not None:
+        categories = {column: "category" for column in COMPACT_LAP_CATEGORIES if column in laps.columns}
+        session._laps = laps.astype(categories).reset_index(drop=True)
+
+    if hasattr(session, "_car_data") and hasattr(session, "_pos_data"):
+        session._compact_telemetry = {
+            kind: {number: compact_telemetry(telemetry, channels) for number, telemetry in data.items()}
+            for kind, data, channels in (
+                ("car", session._car_data, COMPACT_CAR_CHANNELS), ("pos", session._pos_data, COMPACT_POS_CHANNELS)
+            )
+        }
+        del session._car_data, session._pos_data
+    if hasattr(session, "_compact_telemetry"):
+        session._lap_bounds = lap_bounds(session)
+
+
+def session_telemetry(session, kind):
+    # The compact car ("car") or position ("pos") samples of a session by driver number
+    return getattr(session, "_compact_telemetry", {}).get(kind, {})
+
+
+def lap_bounds(session):
+    # Index of lap boundaries: the first and one-past-last car sample and position sample of every
+    # lap (LapStartTime <= t <= Time, as Lap.get_car_data() selects them), one row per lap in
+    # session.laps order. Laps without a start or end time, or without telemetry, get empty ranges
+    laps = session._laps
+    bounds = np.zeros((len(laps), 4), dtype=np.int32)
+    starts, ends = timedelta_ms(laps['LapStartTime']), timedelta_ms(laps['Time'])
+    timed = (laps['LapStartTime'].notna() & laps['Time'].notna()).to_numpy()
+    numbers = laps['DriverNumber'].astype(str).to_numpy()
+    for offset, data in ((0, session_telemetry(session, "car")), (2, session_telemetry(session, "pos"))):
+        for number, columns in data.items():
+            rows = np.flatnonzero((numbers == number) & timed)
+            bounds[rows, offset] = np.searchsorted(columns["SessionTime"], starts[rows], side='left')
+            bounds[rows, offset + 1] = np.searchsorted(columns["SessionTime"], ends[rows], side='right')
+    return bounds
+
+
+def lap_samples(lap, kind):
+    # The car ("car") or position ("pos") samples of one lap of a compacted session
+    session = lap.session
+    columns = session_telemetry(session, kind)[str(lap['DriverNumber'])]
+    first, last = session._lap_bounds[lap.name, (0, 1) if kind == "car" else (2, 3)]
+    return {name: values[first:last] for name, values in columns.items()}
+
+
+def estimate_session_bytes(session):
+    # Sum the memory of everything a loaded session keeps alive
+    total = 0
+    for frame in (getattr(session, "_laps", None), getattr(session, "_results", None)):
+        if frame is not None:
+            total += int(frame.memory_usage(index=True, deep=True).sum())
+    for kind in ("car", "pos"):
+        for columns in session_telemetry(session, kind).values():
+            total += sum(values.nbytes for values in columns.values())
+    return total
+
+
+class SessionCache:
+    # LRU cache of loaded sessions, bounded by the estimated size of their data. Each session
+    # is stored once, along with the load profile it has been loaded with so far. Cached
+    # sessions are never modified: an upgrade loads into a copy, which put() swaps in. Profiles
+    # that failed to load are remembered for unavailable_ttl seconds, so requests for them fail
+    # fast instead of loading the session again each time
+    def __init__(self, max_bytes, unavailable_ttl=SESSION_UNAVAILABLE_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.unavailable_ttl = unavailable_ttl
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (session, size in bytes, profile)
+        self._unavailable = {}  # (key, profile) -> (monotonic time it expires, reason)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        # (session, profile), or None on a miss
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[2]
+
+    def profile(self, key):
+        # Profile a cached session is loaded with, or None; not counted as a lookup
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[2] if entry is not None else None
+
+    def put(self, key, session, profile):
+        size = estimate_session_bytes(session)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+
+            # A session larger than the whole budget is served but never cached
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = (session, size, profile)
+            self.current_bytes += size
+
+            # Evict least recently used sessions until we are back under budget
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def mark_unavailable(self, key, profile, reason):
+        with self._lock:
+            self._unavailable[(key, profile)] = (time.monotonic() + self.unavailable_ttl, reason)
+
+    def unavailable(self, key, profile):
+        # Why the profile could not be loaded, while that is still remembered; otherwise None
+        with self._lock:
+            entry = self._unavailable.get((key, profile))
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._unavailable[(key, profile)]
+                return None
+            return entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._unavailable.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "sessions": [
+                    {"year": key[0], "round": key[1], "session": key[2], "profile": profile, "bytes": size}
+                    for key, (_, size, profile) in self._entries.items()
+                ],
+                "unavailable": [
+                    {"year": key[0], "round": key[1], "session": key[2], "profile": profile}
+                    for (key, profile), (expires, _) in self._unavailable.items() if expires > time.monotonic()
+                ],
+            }
+
+
+session_cache = SessionCache(SESSION_CACHE_MAX_BYTES)
+
+
+class SingleFlight:
+    # Run at most one call per key at a time; callers that arrive while it is running
+    # block until it finishes and share its result (or its exception)
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._inflight = {}  # key -> Future of the running call
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loads": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._inflight),
+            }
+
+
+session_loads = SingleFlight()
+
+
+# Per-lap telemetry slices, memoized with distance added
+TELEMETRY_SLICE_CACHE_MAX_BYTES = int(os.environ.get("ANEMOI_TELEMETRY_SLICE_CACHE_MAX_BYTES", 256 * 1024 ** 2))
+
+
+class TelemetrySliceCache:
+    # LRU cache of the merged telemetry of single laps, bounded by the memory of the frames. Keys
+    # are the session object plus driver and lap; the session is held weakly, so a session
+    # dropped from the session cache does not stay alive for its slices (which then miss)
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (weak reference to the session, frame, size in bytes)
+        self._lock = threading.Lock()
+
+    def get(self, lap):
+        session = lap.session
+        key = (id(session), str(lap['DriverNumber']), float(lap['LapNumber']))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0]() is session:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        telemetry = merge_lap_telemetry(lap)
+        size = int(telemetry.memory_usage(deep=True).sum())
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[2]
+            if size <= self.max_bytes:
+                self._entries[key] = (weakref.ref(session), telemetry, size)
+                self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+        return telemetry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+            }
+
+
+telemetry_slices = TelemetrySliceCache(TELEMETRY_SLICE_CACHE_MAX_BYTES)
+
+
+# Telemetry store configuration (compacted sessions on disk, see TelemetryStore); a budget of 0
+# disables writing to it
+TELEMETRY_STORE_DIR = os.environ.get(
+    "ANEMOI_TELEMETRY_STORE_DIR", os.path.join(tempfile.gettempdir(), "anemoi-telemetry")
+)
+TELEMETRY_STORE_MAX_BYTES = int(os.environ.get("ANEMOI_TELEMETRY_STORE_MAX_BYTES", 8 * 1024 ** 3))
+
+# Bump when the stored layout changes; entries of another version are treated as missing
+TELEMETRY_STORE_VERSION = 1
+
+
+def write_frame(directory, frame):
+    # One .npy file per column of a DataFrame (and one for its index); returns the column encodings
+    # for meta.json. Categoricals are stored as their codes, and object columns (strings, optional
+    # booleans), which cannot be memory-mapped anyway, go into the encoding itself
+    os.makedirs(directory)
+
+    def encode(file_name, name, values):
+        path = os.path.join(directory, f"{file_name}.npy")
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            np.save(path, values.cat.codes.to_numpy())
+            return {"name": name, "file": file_name, "categories": values.cat.categories.tolist()}
+        if isinstance(values.dtype, np.dtype) and values.dtype.kind in "biufmM":
+            np.save(path, values.to_numpy())
+            return {"name": name, "file": file_name}
+        return {"name": name, "values": values.astype(object).where(values.notna(), None).tolist()}
+
+    return {
+        "index": encode("index", frame.index.name, pd.Series(frame.index)),
+        "columns": [encode(str(number), name, frame[name]) for number, name in enumerate(frame.columns)],
+    }
+
+
+def read_frame(directory, encodings):
+    def decode(encoding):
+        if "values" in encoding:
+            return np.array(encoding["values"], dtype=object)
+        values = np.load(os.path.join(directory, f"{encoding['file']}.npy"))
+        if "categories" in encoding:
+            return pd.Categorical.from_codes(values, encoding["categories"])
+        return values
+
+    index = pd.Index(decode(encodings["index"]), name=encodings["index"]["name"])
+    return pd.DataFrame({encoding["name"]: decode(encoding) for encoding in encodings["columns"]}, index=index)
+
+
+class TelemetryStore:
+    # Compacted sessions (see compact_session) on disk in a layout that is memory-mapped on load,
+    # so a restarted worker re-hydrates a session without going through FastF1 and its pickles,
+    # and every worker process shares the telemetry pages through the OS page cache. Each session
+    # is a directory holding:
+    #   meta.json                profile, column encodings, each driver's row range in car/ and pos/
+    #   laps/, results/          one .npy file per column (see write_frame)
+    #   car/<channel>.npy        one file per channel with the samples of all drivers back to back,
+    #   pos/<channel>.npy        mapped read-only and sliced per driver on load
+    #   lap_bounds.npy           the lap boundary index (see lap_bounds)
+    # Only final sessions are stored. The mtime of meta.json acts as the LRU clock and the oldest
+    # sessions are removed once over the byte budget.
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        year, round_number, session_name = key
+        name = re.sub(r"[^a-z0-9]+", "-", session_name.lower())
+        return os.path.join(self.directory, f"{year}-{round_number:02d}-{name}")
+
+    def load(self, key, session):
+        # Hydrate a session fresh from fastf1.get_session() in place with the stored data;
+        # returns the profile it was stored with, or None on a miss
+        path = self._path(key)
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            if meta.get("version") != TELEMETRY_STORE_VERSION:
+                raise ValueError(f"telemetry store version {meta.get('version')}")
+
+            results = SessionResults(read_frame(os.path.join(path, "results"), meta["results"]))
+            laps = Laps(read_frame(os.path.join(path, "laps"), meta["laps"]), session=session) if "laps" in meta else None
+            telemetry = {}
+            for kind, channels in (("car", COMPACT_CAR_CHANNELS), ("pos", COMPACT_POS_CHANNELS)):
+                if kind not in meta:
+                    continue
+                arrays = {
+                    channel: np.load(os.path.join(path, kind, f"{channel}.npy"), mmap_mode="r")
+                    for channel in ("SessionTime", *channels)
+                }
+                telemetry[kind] = {
+                    number: {channel: values[first:last] for channel, values in arrays.items()}
+                    for number, (first, last) in meta[kind].items()
+                }
+            bounds = np.load(os.path.join(path, "lap_bounds.npy")) if telemetry else None
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        session._results = results
+        if laps is not None:
+            session._laps = laps
+        if telemetry:
+            session._compact_telemetry, session._lap_bounds = telemetry, bounds
+
+        # Touch the entry so eviction treats it as recently used
+        try:
+            os.utime(os.path.join(path, "meta.json"))
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return meta["profile"]
+
+    def save(self, key, session, profile):
+        if self.max_bytes <= 0:
+            return
+        path = self._path(key)
+
+        # Written to a temporary directory first and then renamed into place, so readers (in this
+        # or another process) never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        old_path = f"{tmp_path}.old"
+        try:
+            meta = {
+                "version": TELEMETRY_STORE_VERSION,
+                "profile": profile,
+                "results": write_frame(os.path.join(tmp_path, "results"), session.results),
+            }
+            if getattr(session, "_laps", None) is not None:
+                meta["laps"] = write_frame(os.path.join(tmp_path, "laps"), session._laps)
+            if hasattr(session, "_compact_telemetry"):
+                for kind, channels in (("car", COMPACT_CAR_CHANNELS), ("pos", COMPACT_POS_CHANNELS)):
+                    data = session_telemetry(session, kind)
+                    os.makedirs(os.path.join(tmp_path, kind))
+                    numbers = list(data)
+                    offsets = np.cumsum([0] + [len(data[number]["SessionTime"]) for number in numbers])
+                    for channel, dtype in {"SessionTime": np.int32, **channels}.items():
+                        values = [data[number][channel] for number in numbers]
+                        np.save(
+                            os.path.join(tmp_path, kind, f"{channel}.npy"),
+                            np.concatenate(values) if values else np.empty(0, dtype=dtype),
+                        )
+                    meta[kind] = {number: [int(offsets[i]), int(offsets[i + 1])] for i, number in enumerate(numbers)}
+                np.save(os.path.join(tmp_path, "lap_bounds.npy"), session._lap_bounds)
+            with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+                json.dump(meta, f, default=str)
+
+            if os.path.exists(path):
+                os.replace(path, old_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Telemetry store write failed for {key}: {e}")
+            return
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            shutil.rmtree(old_path, ignore_errors=True)
+
+        with self._lock:
+            self.writes += 1
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if name.endswith((".tmp", ".old")):
+                continue
+            try:
+                mtime = os.stat(os.path.join(path, "meta.json")).st_mtime
+                size = 0
+                for root, _, files in os.walk(path):
+                    size += sum(os.path.getsize(os.path.join(root, file)) for file in files)
+            except OSError:
+                continue
+            entries.append((mtime, size, path))
+        return entries
+
+    def evict(self):
+        # Removing a session's files does not disturb processes that have it mapped
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                self.evictions += 1
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "directory": self.directory,
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "writes": self.writes,
+                "evictions": self.evictions,
+            }
+
+
+telemetry_store = TelemetryStore(TELEMETRY_STORE_DIR, TELEMETRY_STORE_MAX_BYTES)
+
+
+def resolve_session(year, gp, identifier):
+    # Canonical (round, session name) of a session however the client spelled it, so that
+    # "monza"/"R" and "Italian Grand Prix"/"Race" share the same cache entries
+    def normalize(value):
+        return value if isinstance(value, int) else str(value).strip().lower()
+
+    return _resolve_session(year, normalize(gp), normalize(identifier))
+
+
+@functools.lru_cache(maxsize=1024)
+def _resolve_session(year, gp, identifier):
+    with stage_timer("get_session"):
+        session = fastf1.get_session(year, gp, identifier)
+    return int(session.event["RoundNumber"]), session.name
+
+
+def get_loaded_session(year, gp, identifier, profile, progress=None):
+    # Return the session loaded with at least the given profile, from the cache when possible.
+    # A cached session loaded with a lighter profile is upgraded into a copy that replaces it.
+    # Concurrent loads of the same session share one call; a caller that needed more than that
+    # call loaded goes again
+    round_number, session_name = resolve_session(year, gp, identifier)
+    reported = []
+    if progress is not None:
+        # The load reports each stage as it completes it; stages that needed no loading, because
+        # the session was cached or another request loaded it, are reported once it is returned
+        progress("schedule", {"round": round_number, "session": session_name})
+
+        def report(stage):
+            reported.append(stage)
+            progress(stage)
+    else:
+        report = None
+
+    key = (year, round_number, session_name)
+    while True:
+        cached = session_cache.get(key)
+        if cached is not None and profile_covers(cached[1], profile):
+            session = cached[0]
+            break
+        reason = session_cache.unavailable(key, profile)
+        if reason is not None:
+            raise SessionUnavailableError(reason)
+
+        session, loaded = session_loads.do(key, functools.partial(load_session, key, profile, report))
+        if session is None or profile_covers(loaded, profile):
+            break
+
+    if progress is not None and session is not None:
+        for stage in progress_stages(profile):
+            if stage not in reported:
+                progress(stage)
+    return session
+
+
+def progress_stages(profile):
+    # Stages a load for profile reports: each profile from "laps" up, the laps profile bringing
+    # the results along
+    profiles = list(SESSION_LOAD_PROFILES)
+    return profiles[1:profiles.index(profile) + 1] or [profile]
+
+
+def load_session(key, profile, progress=None):
+    # Returns (session, profile it is loaded with). With progress, the session is loaded one
+    # stage of progress_stages() at a time, each reported as progress(stage) as it completes;
+    # the telemetry goes on top of the laps, so the stages cost no more than a single load
+    cached = session_cache.get(key)
+    if cached is not None:
+        session, loaded = cached
+        # A load that finished between our cache miss and taking the lead may be enough already
+        if profile_covers(loaded, profile):
+            return cached
+        # Requests keep reading the cached session while this one loads into a private copy
+        session = copy_session(session)
+    else:
+        with stage_timer("get_session"):
+            session = fastf1.get_session(*key)
+        if session is None:
+            return None, profile
+        loaded = None
+
+    # A final session stored by this or another worker is mapped from disk instead; a stored
+    # profile lighter than needed is upgraded from there like a cached one
+    with stage_timer("store_load"):
+        stored = telemetry_store.load(key, session)
+    if stored is not None:
+        if profile_covers(stored, profile):
+            session_cache.put(key, session, stored)
+            return session, stored
+        loaded = stored
+
+    # Offline, a session missing from the FastF1 cache fails here instead of inside FastF1
+    if not fastf1_cache.lookup(session, profile) and fastf1_cache.offline:
+        raise SessionUnavailableError(f"{key[0]} round {key[1]} {key[2]} is not cached and the backend is offline")
+
+    with stage_timer("session_load"):
+        for stage in progress_stages(profile) if progress is not None else [profile]:
+            if loaded is not None and profile_covers(loaded, stage):
+                continue
+            if loaded is None:
+                session.load(**SESSION_LOAD_PROFILES[stage])
+            else:
+                upgrade_session(session, loaded, stage)
+            loaded = stage
+            # FastF1 logs and swallows errors while loading; don't record a session as loaded
+            # with telemetry it does not have, so a request after the TTL tries again
+            if stage == "telemetry" and not telemetry_loaded(session):
+                reason = f"{key[0]} round {key[1]} {key[2]}: telemetry could not be loaded"
+                session_cache.mark_unavailable(key, profile, reason)
+                raise SessionUnavailableError(reason)
+            if progress is not None:
+                progress(stage)
+    fastf1_cache.touch(session)
+    fastf1_cache.evict()
+
+    compact_session(session)
+    if session_is_final(session):
+        telemetry_store.save(key, session, profile)
+    session_cache.put(key, session, profile)
+    return session, profile
+
+
+def copy_session(session):
+    # A copy of a loaded session to load more data into. FastF1 assigns most of what it loads,
+    # but writes into the laps and results frames in place, so those are copied, and the laps
+    # are bound to the copy so that Lap.session and the telemetry read through it are the copy's
+    session = copy.copy(session)
+    if hasattr(session, "_results"):
+        session._results = session._results.copy()
+    if hasattr(session, "_laps"):
+        session._laps = session._laps.copy()
+        session._laps.session = session
+    return session
+
+
+def upgrade_session(session, loaded, profile):
+    # Add what profile needs to an already loaded session. Telemetry goes on top of the laps
+    # directly; adding laps re-runs load() on the same session, which refreshes the (small) results
+    if loaded == "laps" and profile == "telemetry":
+        session._load_telemetry()
+    else:
+        session.load(**SESSION_LOAD_PROFILES[profile])
+
+
+def telemetry_loaded(session):
+    return bool(getattr(session, "_car_data", None)) and bool(getattr(session, "_pos_data", None))
+
+
+# Rendered chart cache configuration (content-addressed PNG files on disk)
+CHART_CACHE_DIR = os.environ.get("ANEMOI_CHART_CACHE_DIR", os.path.join(tempfile.gettempdir(), "anemoi-charts"))
+CHART_CACHE_MAX_BYTES = int(os.environ.get("ANEMOI_CHART_CACHE_MAX_BYTES", 512 * 1024 ** 2))
+
+# Charts are only cached once a session is over and its data can no longer change
+SESSION_FINAL_AFTER = pd.Timedelta(hours=float(os.environ.get("ANEMOI_SESSION_FINAL_AFTER_HOURS", 4)))
+
+# Render parameters per chart; they are part of the chart cache key, so bump "version"
+# whenever a plot function changes its output
+CHART_RENDER_PARAMS = {
+    "telemetry": {"version": 2, "format": "png", "figsize": (6, 6), "dpi": 150},
+    "track-dominance": {"version": 2, "format": "png", "figsize": (6, 6), "dpi": 150},
+    "driver-comparison": {"version": 1, "format": "png", "figsize": (10, 6), "dpi": 100},
+    "driver-comparison-full": {"version": 1, "format": "png", "figsize": (15, 15), "dpi": 100},
+}
+
+
+def session_is_final(session):
+    # session.date is the scheduled start in UTC
+    return pd.Timestamp.now(tz="UTC").tz_localize(None) - session.date > SESSION_FINAL_AFTER
+
+
+class ChartCache:
+    # Rendered images on disk, keyed by a hash of the chart inputs, render parameters and image format.
+    # Each entry is <key>.image plus <key>.json holding the response metadata; file mtimes
+    # act as the LRU clock and the oldest entries are removed once over the byte budget.
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def key(self, chart, image_format="png", **inputs):
+        normalized = {name: str(value).strip().lower() for name, value in inputs.items()}
+        blob = json.dumps({
+            "chart": chart,
+            "inputs": normalized,
+            "render": CHART_RENDER_PARAMS[chart],
+            "image_format": image_format,
+        }, sort_keys=True)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _paths(self, key):
+        return os.path.join(self.directory, f"{key}.image"), os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        image_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r") as f:
+                metadata = json.load(f)
+            with open(image_path, "rb") as f:
+                image = f.read()
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Touch the entry so eviction treats it as recently used
+        try:
+            os.utime(image_path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return image, metadata
+
+    def contains(self, key):
+        # Whether an entry exists, without reading it or counting a lookup
+        return all(os.path.exists(path) for path in self._paths(key))
+
+    def put(self, key, image, metadata):
+        os.makedirs(self.directory, exist_ok=True)
+        image_path, meta_path = self._paths(key)
+
+        # Write to temporary files first so readers never see a partial entry
+        for path, data, mode in ((image_path, image, "wb"), (meta_path, json.dumps(metadata), "w")):
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, mode) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(".image"):
+                continue
+            image_path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(image_path)
+                meta_size = os.path.getsize(image_path[:-len(".image")] + ".json")
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size + meta_size, image_path))
+        return entries
+
+    def evict(self):
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, image_path in entries:
+                if total <= self.max_bytes:
+                    break
+                for path in (image_path, image_path[:-len(".image")] + ".json"):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= size
+                self.evictions += 1
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "directory": self.directory,
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+            }
+
+
+chart_cache = ChartCache(CHART_CACHE_DIR, CHART_CACHE_MAX_BYTES)
+
+
+# Worker pool configuration for blocking work (session loading, pandas, matplotlib, HTTP)
+# ANEMOI_WORKER_EXECUTOR selects "thread" or "process" for the compute pool; note that each
+# worker process keeps its own session cache when running with "process".
+WORKER_EXECUTOR_KIND = os.environ.get("ANEMOI_WORKER_EXECUTOR", "thread")
+WORKER_MAX_WORKERS = int(os.environ.get("ANEMOI_WORKER_MAX_WORKERS", os.cpu_count() or 4))
+IO_MAX_WORKERS = int(os.environ.get("ANEMOI_IO_MAX_WORKERS", 16))
+
+# Charts are drawn on explicit Figure objects, so they can run in a pool of pre-warmed
+# render processes; ANEMOI_RENDER_WORKERS=0 renders on a thread pool in-process instead.
+RENDER_WORKERS = int(os.environ.get("ANEMOI_RENDER_WORKERS", os.cpu_count() or 2))
+
+# Maximum number of concurrent blocking calls per endpoint, so that telemetry-heavy
+# requests cannot take every worker away from the light ones.
+# Override with e.g. ANEMOI_ENDPOINT_CONCURRENCY="telemetry=4,track-dominance=1"
+ENDPOINT_CONCURRENCY = {
+    "events": 4,
+    "session": 4,
+    "telemetry": 2,
+    "track-dominance": 2,
+    "driver-comparison": 2,
+    "telemetry-data": 4,
+    "export": 2,
+    "ergast-mirror": 1,
+    "ergast-mirror-read": 8,
+    "prewarm": 1,
+    "replay": 2,
+    "render": max(RENDER_WORKERS, 1) * 2,
+    "chart-cache": 16,
+    "fastf1-cache": 2,
+}
+for item in filter(None, os.environ.get("ANEMOI_ENDPOINT_CONCURRENCY", "").split(",")):
+    endpoint, _, limit = item.partition("=")
+    ENDPOINT_CONCURRENCY[endpoint.strip()] = int(limit)
+
+executors = {}
+executors_lock = threading.Lock()
+endpoint_semaphores = {}
+
+
+def get_executor(pool):
+    # Create the executors lazily so importing the module does not spawn workers
+    with executors_lock:
+        if pool not in executors:
+            if pool == "render" and RENDER_WORKERS > 0:
+                executors[pool] = ProcessPoolExecutor(max_workers=RENDER_WORKERS, initializer=warm_render_worker)
+            elif pool == "render":
+                executors[pool] = ThreadPoolExecutor(max_workers=WORKER_MAX_WORKERS, thread_name_prefix="anemoi-render")
+            elif pool == "compute" and WORKER_EXECUTOR_KIND == "process":
+                executors[pool] = ProcessPoolExecutor(max_workers=WORKER_MAX_WORKERS)
+            elif pool == "compute":
+                executors[pool] = ThreadPoolExecutor(max_workers=WORKER_MAX_WORKERS, thread_name_prefix="anemoi-compute")
+            else:
+                executors[pool] = ThreadPoolExecutor(max_workers=IO_MAX_WORKERS, thread_name_prefix="anemoi-io")
+        return executors[pool]
+
+
+async def run_blocking(endpoint, func, *args, pool="compute", **kwargs):
+    # Run a blocking function on a worker pool without holding up the event loop,
+    # limited to ENDPOINT_CONCURRENCY[endpoint] concurrent calls
+    semaphore = endpoint_semaphores.get(endpoint)
+    if semaphore is None:
+        semaphore = endpoint_semaphores.setdefault(endpoint, asyncio.Semaphore(ENDPOINT_CONCURRENCY.get(endpoint, 4)))
+
+    async with semaphore:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_executor(pool), functools.partial(func, *args, **kwargs))
+
+
+async def render_chart(func, *args, stage="matplotlib_render"):
+    # Render a chart on the render pool; func must be a module-level function taking plain data.
+    # The stage timings taken on the worker are recorded here
+    image, timings = await run_blocking("render", timed_render, func, stage, *args, pool="render")
+    for name, seconds in timings:
+        record_stage(name, seconds)
+    return image
+
+
+# Ergast client: one pooled keep-alive connection set shared by every Ergast route. Override
+# ANEMOI_ERGAST_URL to point the routes at a mirror or a local stand-in server
+ERGAST_BASE_URL = os.environ.get("ANEMOI_ERGAST_URL", "http://ergast.com/api/f1").rstrip("/")
+ERGAST_PAGE_LIMIT = 100
+ERGAST_FANOUT = int(os.environ.get("ANEMOI_ERGAST_FANOUT", 4))
+ERGAST_MAX_CONNECTIONS = int(os.environ.get("ANEMOI_ERGAST_MAX_CONNECTIONS", 16))
+ERGAST_TIMEOUT = float(os.environ.get("ANEMOI_ERGAST_TIMEOUT", 10))
+
+ergast_client = None
+
+
+class ErgastError(Exception):
+    pass
+
+
+def get_ergast_client():
+    # Create the client lazily, inside the running event loop it will be used from
+    global ergast_client
+    if ergast_client is None:
+        ergast_client = httpx.AsyncClient(
+            base_url=ERGAST_BASE_URL,
+            timeout=ERGAST_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=ERGAST_MAX_CONNECTIONS,
+                max_keepalive_connections=ERGAST_MAX_CONNECTIONS,
+            ),
+        )
+    return ergast_client
+
+
+async def ergast_get(path, params=None):
+    # Fetch one Ergast page as parsed JSON; raises ErgastError on transport or HTTP errors
+    try:
+        with stage_timer("ergast_page"):
+            response = await get_ergast_client().get(path, params=params)
+    except httpx.HTTPError as e:
+        raise ErgastError(f"{path}: {e}") from e
+    if response.status_code != 200:
+        raise ErgastError(f"{path}: HTTP {response.status_code}")
+    return response.json()
+
+
+async def ergast_fetch_all(path, table_key, list_key):
+    # Fetch every page of an Ergast list. The first page tells us the total, after which the
+    # remaining offsets are requested concurrently (at most ERGAST_FANOUT at a time) and
+    # stitched back together in offset order
+    def items(data):
+        return data.get("MRData", {}).get(table_key, {}).get(list_key, [])
+
+    first = await ergast_get(path, {"limit": ERGAST_PAGE_LIMIT, "offset": 0})
+    total = int(first.get("MRData", {}).get("total", 0))
+
+    semaphore = asyncio.Semaphore(ERGAST_FANOUT)
+
+    async def fetch_page(offset):
+        async with semaphore:
+            return items(await ergast_get(path, {"limit": ERGAST_PAGE_LIMIT, "offset": offset}))
+
+    pages = await asyncio.gather(*(
+        fetch_page(offset) for offset in range(ERGAST_PAGE_LIMIT, total, ERGAST_PAGE_LIMIT)
+    ))
+    return [item for page in [items(first), *pages] for item in page]
+
+
+# How long an Ergast response stays fresh, per route, when it covers the current season (or all
+# seasons). Responses for a single past season never change and are kept until evicted.
+# Override with ANEMOI_ERGAST_TTL="standings=60,drivers=600"
+ERGAST_CACHE_TTL = {
+    "standings": 300,
+    "drivers": 3600,
+    "constructors": 3600,
+    "circuits": 6 * 3600,
+}
+for item in filter(None, os.environ.get("ANEMOI_ERGAST_TTL", "").split(",")):
+    route, _, ttl = item.partition("=")
+    ERGAST_CACHE_TTL[route.strip()] = float(ttl)
+ERGAST_CACHE_MAX_ENTRIES = int(os.environ.get("ANEMOI_ERGAST_CACHE_MAX_ENTRIES", 1024))
+
+
+def ergast_ttl(route, path):
+    # Seconds until a response for path goes stale, or None if it never does
+    year = path.lstrip("/").split("/")[0].removesuffix(".json")
+    if year.isdigit() and int(year) < pd.Timestamp.utcnow().year:
+        return None
+    return ERGAST_CACHE_TTL.get(route, 300)
+
+
+class ErgastCache:
+    # In-memory stale-while-revalidate cache of Ergast responses. A stale entry is served as is
+    # while one background task refreshes it; concurrent misses for the same key share one fetch
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (value, expires at monotonic time or None)
+        self._inflight = {}  # key -> task fetching the key
+
+    async def fetch(self, route, path, loader):
+        key = (route, path)
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires = entry
+            self._entries.move_to_end(key)
+            if expires is None or expires > time.monotonic():
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self.refreshes += 1
+                    self._start(key, route, path, loader)
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = self._start(key, route, path, loader)
+        else:
+            self.coalesced += 1
+        # Shield the shared fetch so one cancelled request does not cancel it for the others
+        return await asyncio.shield(task)
+
+    def _start(self, key, route, path, loader):
+        task = asyncio.create_task(self._load(key, route, path, loader))
+        self._inflight[key] = task
+        return task
+
+    async def _load(self, key, route, path, loader):
+        try:
+            value = await loader()
+        except Exception:
+            # A failed refresh keeps serving the stale entry; a failed miss surfaces to the callers
+            if key in self._entries:
+                self.refresh_errors += 1
+                return self._entries[key][0]
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        ttl = ergast_ttl(route, path)
+        self._entries[key] = (value, None if ttl is None else time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else None,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "evictions": self.evictions,
+            "ttl": ERGAST_CACHE_TTL,
+        }
+
+
+ergast_cache = ErgastCache(ERGAST_CACHE_MAX_ENTRIES)
+
+
+# Local SQLite mirror of the Ergast reference data. Once a full sync has run, the Ergast routes
+# answer any filter combination over past seasons from it. The current season, and queries not
+# restricted to one season, come from it only while its last sync is fresher than the route's
+# ERGAST_CACHE_TTL; otherwise, and for seasons it does not hold yet, they still go upstream
+ERGAST_MIRROR_PATH = os.environ.get(
+    "ANEMOI_ERGAST_MIRROR_PATH", os.path.join(tempfile.gettempdir(), "anemoi-ergast.sqlite")
+)
+ERGAST_MIRROR_SYNC_HOURS = float(os.environ.get("ANEMOI_ERGAST_MIRROR_SYNC_HOURS", 0))
+
+ERGAST_MIRROR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS drivers (
+    driver_id TEXT PRIMARY KEY, permanent_number TEXT, code TEXT, url TEXT, given_name TEXT,
+    family_name TEXT, date_of_birth TEXT, nationality TEXT
+);
+CREATE TABLE IF NOT EXISTS constructors (
+    constructor_id TEXT PRIMARY KEY, url TEXT, name TEXT, nationality TEXT
+);
+CREATE TABLE IF NOT EXISTS circuits (
+    circuit_id TEXT PRIMARY KEY, url TEXT, circuit_name TEXT, lat TEXT, long TEXT, locality TEXT, country TEXT
+);
+CREATE TABLE IF NOT EXISTS statuses (status_id INTEGER PRIMARY KEY, status TEXT);
+CREATE TABLE IF NOT EXISTS races (
+    year INTEGER, round INTEGER, circuit_id TEXT, race_name TEXT, date TEXT, PRIMARY KEY (year, round)
+);
+CREATE TABLE IF NOT EXISTS results (
+    year INTEGER, round INTEGER, driver_id TEXT, constructor_id TEXT, number TEXT, grid INTEGER,
+    position INTEGER, position_text TEXT, points REAL, status_id INTEGER, fastest_lap_rank INTEGER
+);
+CREATE TABLE IF NOT EXISTS driver_standings (
+    year INTEGER, round INTEGER, driver_id TEXT, constructor_id TEXT, position INTEGER, points TEXT, wins TEXT
+);
+CREATE TABLE IF NOT EXISTS constructor_standings (
+    year INTEGER, round INTEGER, constructor_id TEXT, position INTEGER, points TEXT, wins TEXT
+);
+CREATE TABLE IF NOT EXISTS seasons (year INTEGER PRIMARY KEY, synced_at REAL);
+CREATE TABLE IF NOT EXISTS mirror_state (key TEXT PRIMARY KEY, value TEXT);
+CREATE INDEX IF NOT EXISTS races_circuit ON races (circuit_id);
+CREATE INDEX IF NOT EXISTS results_year_round ON results (year, round);
+CREATE INDEX IF NOT EXISTS results_driver ON results (driver_id, constructor_id);
+CREATE INDEX IF NOT EXISTS results_constructor ON results (constructor_id);
+CREATE INDEX IF NOT EXISTS results_status ON results (status_id);
+CREATE INDEX IF NOT EXISTS results_position ON results (position);
+CREATE INDEX IF NOT EXISTS results_fastest_lap_rank ON results (fastest_lap_rank);
+CREATE INDEX IF NOT EXISTS driver_standings_year ON driver_standings (year, position);
+CREATE INDEX IF NOT EXISTS constructor_standings_year ON constructor_standings (year, position);
+CREATE INDEX IF NOT EXISTS constructor_standings_position ON constructor_standings (position);
+"""
+
+MIRROR_SEASON_TABLES = ["races", "results", "driver_standings", "constructor_standings"]
+
+
+def optional_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ErgastMirror:
+    # Reads run on the io pool through ergast_mirror_read (each thread gets its own connection,
+    # WAL keeps them from blocking on the writer); writes come from sync(), one season per transaction
+    def __init__(self, path):
+        self.path = path
+        self.last_sync = None
+        self.current_sync = None
+        self._local = threading.local()
+        self._sync_task = None
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(ERGAST_MIRROR_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def ready(self):
+        # Don't create the database just to find out it is empty
+        if not os.path.exists(self.path):
+            return False
+        row = self.connection().execute("SELECT value FROM mirror_state WHERE key = 'full_sync'").fetchone()
+        return row is not None
+
+    def covers(self, route, year=None):
+        # Whether a query, optionally restricted to one season, can be answered locally. A synced
+        # past season never changes; anything that includes the current season has to have been
+        # synced within the route's TTL, like a cached upstream response
+        if not self.ready():
+            return False
+        if year is None:
+            row = self.connection().execute("SELECT value FROM mirror_state WHERE key = 'synced_at'").fetchone()
+            synced_at = None if row is None else float(row["value"])
+        else:
+            row = self.connection().execute("SELECT synced_at FROM seasons WHERE year = ?", (year,)).fetchone()
+            if row is None:
+                return False
+            if year < pd.Timestamp.utcnow().year:
+                return True
+            synced_at = row["synced_at"]
+        return synced_at is not None and time.time() - synced_at <= ERGAST_CACHE_TTL.get(route, 300)
+
+    def query(self, sql, params=()):
+        return self.connection().execute(sql, params).fetchall()
+
+    @staticmethod
+    def result_filters(year=None, round=None, circuit_id=None, driver_id=None, constructor_id=None,
+                       position=None, rank=None, status_id=None):
+        # WHERE clauses over results joined to races for every filter that was given
+        clauses, params = [], []
+        for column, value in [
+            ("results.year", year),
+            ("results.round", round),
+            ("races.circuit_id", circuit_id),
+            ("results.driver_id", driver_id),
+            ("results.constructor_id", constructor_id),
+            ("results.position", position),
+            ("results.fastest_lap_rank", rank),
+            ("results.status_id", status_id),
+        ]:
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return clauses, params
+
+    @staticmethod
+    def results_subquery(column, clauses):
+        return (
+            f"{column} IN (SELECT results.{column} FROM results JOIN races USING (year, round) "
+            f"WHERE {' AND '.join(clauses)})"
+        )
+
+    def drivers(self, year=None, round=None, circuit_id=None, constructor_id=None, position=None,
+                driver_id=None, rank=None, status_id=None):
+        clauses, params = self.result_filters(year, round, circuit_id, None, constructor_id, position, rank, status_id)
+        where = [self.results_subquery("driver_id", clauses)] if clauses else []
+        if driver_id:
+            where.append("driver_id = ?")
+            params.append(driver_id)
+
+        rows = self.query(
+            "SELECT * FROM drivers" + (f" WHERE {' AND '.join(where)}" if where else "") + " ORDER BY driver_id",
+            params,
+        )
+        return [{
+            "driverId": row["driver_id"],
+            "permanentNumber": row["permanent_number"],
+            "code": row["code"],
+            "url": row["url"],
+            "givenName": row["given_name"],
+            "familyName": row["family_name"],
+            "dateOfBirth": row["date_of_birth"],
+            "nationality": row["nationality"],
+        } for row in rows]
+
+    def constructors(self, year=None, round=None, circuit_id=None, driver_id=None, constructor_id=None,
+                     position=None, status_id=None, rank=None):
+        # position is the championship position, as in Ergast's /constructorStandings/{position}
+        clauses, params = self.result_filters(year, round, circuit_id, driver_id, None, None, rank, status_id)
+        where = [self.results_subquery("constructor_id", clauses)] if clauses else []
+        if position:
+            where.append(
+                "constructor_id IN (SELECT constructor_id FROM constructor_standings WHERE position = ?"
+                + (" AND year = ?)" if year else ")")
+            )
+            params.extend([position, year] if year else [position])
+        if constructor_id:
+            where.append("constructor_id = ?")
+            params.append(constructor_id)
+
+        rows = self.query(
+            "SELECT * FROM constructors" + (f" WHERE {' AND '.join(where)}" if where else "") + " ORDER BY constructor_id",
+            params,
+        )
+        return [{
+            "constructorId": row["constructor_id"],
+            "url": row["url"],
+            "name": row["name"],
+            "nationality": row["nationality"],
+        } for row in rows]
+
+    def circuits(self, year=None, circuit_id=None, driver_id=None, constructor_id=None, country=None):
+        where, params = [], []
+        if driver_id or constructor_id:
+            clauses, params = self.result_filters(year=year, driver_id=driver_id, constructor_id=constructor_id)
+            where.append(
+                "circuit_id IN (SELECT races.circuit_id FROM results JOIN races USING (year, round) "
+                f"WHERE {' AND '.join(clauses)})"
+            )
+        elif year:
+            # The season calendar, including rounds that have not been run yet
+            where.append("circuit_id IN (SELECT circuit_id FROM races WHERE year = ?)")
+            params.append(year)
+        if circuit_id:
+            where.append("circuit_id = ?")
+            params.append(circuit_id)
+        if country:
+            where.append("country = ? COLLATE NOCASE")
+            params.append(country)
+
+        rows = self.query(
+            "SELECT * FROM circuits" + (f" WHERE {' AND '.join(where)}" if where else "") + " ORDER BY circuit_id",
+            params,
+        )
+        return [{
+            "circuitId": row["circuit_id"],
+            "url": row["url"],
+            "circuitName": row["circuit_name"],
+            "Location": {
+                "lat": row["lat"],
+                "long": row["long"],
+                "locality": row["locality"],
+                "country": row["country"],
+            },
+        } for row in rows]
+
+    def standings(self, year, type):
+        # Latest standings of a season, shaped like one Ergast StandingsList entry list
+        def position(row):
+            return None if row["position"] is None else str(row["position"])
+
+        if type == "driverStandings":
+            rows = self.query(
+                "SELECT s.*, d.given_name, d.family_name, d.nationality, d.permanent_number, d.code, d.url, "
+                "c.name AS constructor_name, c.nationality AS constructor_nationality, c.url AS constructor_url "
+                "FROM driver_standings s JOIN drivers d USING (driver_id) LEFT JOIN constructors c USING (constructor_id) "
+                "WHERE s.year = ? ORDER BY s.position IS NULL, s.position",
+                (year,),
+            )
+            return [{
+                "position": position(row),
+                "points": row["points"],
+                "wins": row["wins"],
+                "Driver": {
+                    "driverId": row["driver_id"],
+                    "givenName": row["given_name"],
+                    "familyName": row["family_name"],
+                    "nationality": row["nationality"],
+                    "permanentNumber": row["permanent_number"],
+                    "code": row["code"],
+                    "url": row["url"],
+                },
+                "Constructors": [{
+                    "constructorId": row["constructor_id"],
+                    "name": row["constructor_name"],
+                    "nationality": row["constructor_nationality"],
+                    "url": row["constructor_url"],
+                }],
+            } for row in rows]
+
+        rows = self.query(
+            "SELECT s.*, c.name, c.nationality, c.url FROM constructor_standings s JOIN constructors c "
+            "USING (constructor_id) WHERE s.year = ? ORDER BY s.position IS NULL, s.position",
+            (year,),
+        )
+        return [{
+            "position": position(row),
+            "points": row["points"],
+            "wins": row["wins"],
+            "Constructor": {
+                "constructorId": row["constructor_id"],
+                "name": row["name"],
+                "nationality": row["nationality"],
+                "url": row["url"],
+            },
+        } for row in rows]
+
+    def write_reference(self, drivers, constructors, circuits, statuses):
+        # Upsert the season-independent tables
+        with self.connection() as conn:
+            conn.executemany("INSERT OR REPLACE INTO drivers VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [(
+                d["driverId"], d.get("permanentNumber"), d.get("code"), d.get("url"), d.get("givenName"),
+                d.get("familyName"), d.get("dateOfBirth"), d.get("nationality"),
+            ) for d in drivers])
+            conn.executemany("INSERT OR REPLACE INTO constructors VALUES (?, ?, ?, ?)", [(
+                c["constructorId"], c.get("url"), c.get("name"), c.get("nationality"),
+            ) for c in constructors])
+            conn.executemany("INSERT OR REPLACE INTO circuits VALUES (?, ?, ?, ?, ?, ?, ?)", [(
+                c["circuitId"], c.get("url"), c.get("circuitName"), c.get("Location", {}).get("lat"),
+                c.get("Location", {}).get("long"), c.get("Location", {}).get("locality"),
+                c.get("Location", {}).get("country"),
+            ) for c in circuits])
+            conn.executemany("INSERT OR REPLACE INTO statuses VALUES (?, ?)", [
+                (int(s["statusId"]), s.get("status")) for s in statuses
+            ])
+
+    def write_season(self, year, schedule, races, driver_standings, constructor_standings):
+        # Replace everything stored for one season in a single transaction, so readers see
+        # either the old season or the new one
+        with self.connection() as conn:
+            status_ids = {status: status_id for status_id, status in conn.execute("SELECT * FROM statuses")}
+            for table in MIRROR_SEASON_TABLES:
+                conn.execute(f"DELETE FROM {table} WHERE year = ?", (year,))
+
+            conn.executemany("INSERT OR REPLACE INTO races VALUES (?, ?, ?, ?, ?)", [(
+                year, int(race["round"]), race.get("Circuit", {}).get("circuitId"), race.get("raceName"), race.get("date"),
+            ) for race in schedule])
+            conn.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [(
+                year,
+                int(race["round"]),
+                result["Driver"]["driverId"],
+                result.get("Constructor", {}).get("constructorId"),
+                result.get("number"),
+                optional_int(result.get("grid")),
+                optional_int(result.get("position")),
+                result.get("positionText"),
+                float(result.get("points") or 0),
+                status_ids.get(result.get("status")),
+                optional_int(result.get("FastestLap", {}).get("rank")),
+            ) for race in races for result in race.get("Results", [])])
+
+            # Standings pages split one StandingsList into several partial ones
+            conn.executemany("INSERT INTO driver_standings VALUES (?, ?, ?, ?, ?, ?, ?)", [(
+                year,
+                int(standings["round"]),
+                item["Driver"]["driverId"],
+                (item.get("Constructors") or [{}])[0].get("constructorId"),
+                optional_int(item.get("position")),
+                item.get("points"),
+                item.get("wins"),
+            ) for standings in driver_standings for item in standings.get("DriverStandings", [])])
+            conn.executemany("INSERT INTO constructor_standings VALUES (?, ?, ?, ?, ?, ?)", [(
+                year,
+                int(standings["round"]),
+                item["Constructor"]["constructorId"],
+                optional_int(item.get("position")),
+                item.get("points"),
+                item.get("wins"),
+            ) for standings in constructor_standings for item in standings.get("ConstructorStandings", [])])
+
+            conn.execute("INSERT OR REPLACE INTO seasons VALUES (?, ?)", (year, time.time()))
+
+    def mark_synced(self, full):
+        with self.connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO mirror_state VALUES ('synced_at', ?)", (str(time.time()),))
+            if full:
+                conn.execute("INSERT OR REPLACE INTO mirror_state VALUES ('full_sync', ?)", (str(time.time()),))
+
+    def synced_seasons(self):
+        return [row["year"] for row in self.query("SELECT year FROM seasons ORDER BY year")]
+
+    def start_sync(self, full=False):
+        # One sync at a time; while one is running, its task is returned instead
+        if not self.syncing():
+            self.current_sync = {"full": full, "started_at": time.time()}
+            self._sync_task = asyncio.create_task(self._sync(full))
+            self._sync_task.add_done_callback(self._log_sync_error)
+        return self._sync_task
+
+    async def sync(self, full=False):
+        return await asyncio.shield(self.start_sync(full))
+
+    @staticmethod
+    def _log_sync_error(task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error syncing Ergast mirror: {task.exception()}")
+
+    def syncing(self):
+        return self._sync_task is not None and not self._sync_task.done()
+
+    async def _sync(self, full):
+        # A full sync ingests every season and the complete driver, constructor and circuit lists.
+        # An incremental one re-ingests the newest synced season and anything after it, which
+        # picks up new rounds, results and standings
+        started = time.perf_counter()
+        full = full or not await run_blocking("ergast-mirror", self.ready, pool="io")
+        if full:
+            seasons = [
+                int(season["season"])
+                for season in await ergast_fetch_all("/seasons.json", "SeasonTable", "Seasons")
+            ]
+            scopes = [""]
+        else:
+            synced = await run_blocking("ergast-mirror", self.synced_seasons, pool="io")
+            current_year = pd.Timestamp.utcnow().year
+            seasons = list(range(max(synced, default=current_year), current_year + 1))
+            scopes = [f"/{year}" for year in seasons]
+
+        reference = await asyncio.gather(*(
+            ergast_fetch_all(f"{scope}/{name}.json", table_key, list_key)
+            for name, table_key, list_key in [
+                ("drivers", "DriverTable", "Drivers"),
+                ("constructors", "ConstructorTable", "Constructors"),
+                ("circuits", "CircuitTable", "Circuits"),
+            ]
+            for scope in scopes
+        ))
+        statuses = await ergast_fetch_all("/status.json", "StatusTable", "Status")
+        per_table = len(scopes)
+        await run_blocking(
+            "ergast-mirror", self.write_reference,
+            [item for page in reference[:per_table] for item in page],
+            [item for page in reference[per_table:2 * per_table] for item in page],
+            [item for page in reference[2 * per_table:] for item in page],
+            statuses,
+            pool="io",
+        )
+
+        # Seasons one after another; the requests within a season already fan out
+        for year in seasons:
+            schedule, races, driver_standings, constructor_standings = await asyncio.gather(
+                ergast_fetch_all(f"/{year}.json", "RaceTable", "Races"),
+                ergast_fetch_all(f"/{year}/results.json", "RaceTable", "Races"),
+                ergast_fetch_all(f"/{year}/driverStandings.json", "StandingsTable", "StandingsLists"),
+                ergast_fetch_all(f"/{year}/constructorStandings.json", "StandingsTable", "StandingsLists"),
+            )
+            await run_blocking(
+                "ergast-mirror", self.write_season, year, schedule, races, driver_standings, constructor_standings,
+                pool="io",
+            )
+
+        await run_blocking("ergast-mirror", self.mark_synced, full, pool="io")
+        self.last_sync = {
+            "full": full,
+            "seasons": len(seasons),
+            "seconds": round(time.perf_counter() - started, 3),
+            "finished_at": time.time(),
+        }
+        return self.last_sync
+
+    def stats(self):
+        stats = {
+            "path": self.path,
+            "ready": self.ready(),
+            "syncing": self.syncing(),
+            "current_sync": self.current_sync if self.syncing() else None,
+            "last_sync": self.last_sync,
+        }
+        if os.path.exists(self.path):
+            stats["seasons"] = self.synced_seasons()
+            stats["rows"] = {
+                table: self.query(f"SELECT COUNT(*) AS n FROM {table}")[0]["n"]
+                for table in ["drivers", "constructors", "circuits", *MIRROR_SEASON_TABLES]
+            }
+        return stats
+
+
+ergast_mirror = ErgastMirror(ERGAST_MIRROR_PATH)
+ergast_mirror_sync_task = None
+
+
+async def ergast_mirror_read(route, year, func, *args):
+    # Answer a query from the mirror on the io pool, or None when it has to go upstream
+    def read():
+        return func(*args) if ergast_mirror.covers(route, year) else None
+
+    return await run_blocking("ergast-mirror-read", read, pool="io")
+
+
+async def ergast_mirror_sync_loop():
+    # Keep the mirror current; the first pass runs a full ingest if the mirror is empty
+    while True:
+        try:
+            await ergast_mirror.sync()
+        except Exception:
+            pass  # logged by the sync task itself
+        await asyncio.sleep(ERGAST_MIRROR_SYNC_HOURS * 3600)
+
+
+# Pre-warming: after each qualifying and race (Session4 and Session5 of every event) load the
+# session and produce the popular artifacts before the first visitor asks for them. Sessions are
+# loaded PREWARM_DELAY after their scheduled start, about when they have finished; fastest-lap
+# maps are rendered once the session is final, since only then do they go into the chart cache
+PREWARM_ENABLED = os.environ.get("ANEMOI_PREWARM", "0") == "1"
+PREWARM_DELAY = pd.Timedelta(minutes=float(os.environ.get("ANEMOI_PREWARM_DELAY_MINUTES", 150)))
+PREWARM_LOOKAHEAD = pd.Timedelta(hours=float(os.environ.get("ANEMOI_PREWARM_LOOKAHEAD_HOURS", 6)))
+PREWARM_CATCHUP = pd.Timedelta(hours=float(os.environ.get("ANEMOI_PREWARM_CATCHUP_HOURS", 24)))
+PREWARM_CONCURRENCY = int(os.environ.get("ANEMOI_PREWARM_CONCURRENCY", 2))
+PREWARM_REPLAN = pd.Timedelta(minutes=15)
+PREWARM_SESSIONS = (4, 5)
+
+
+def session_drivers(year, gp, identifier, profile):
+    # Driver codes of the session, loading it with the given profile: in classification order
+    # from the results, or the drivers with laps once the laps are loaded
+    session = get_loaded_session(year, gp, identifier, profile)
+    if profile == "results":
+        return session.results["Abbreviation"].dropna().tolist()
+    return sorted(session.laps["Driver"].dropna().unique().tolist())
+
+
+class Prewarmer:
+    # Plans warm-ups from the event schedule and runs them, along with manually triggered ones
+    def __init__(self):
+        self.planned = []
+        self.history = deque(maxlen=50)
+        self._done = set()  # (year, round, session name, charts) warm-ups that succeeded
+        self._running = {}  # (year, gp, identifier, charts) -> task
+
+    def plan(self, now):
+        # Warm-ups due between now - PREWARM_CATCHUP and now + PREWARM_LOOKAHEAD that have not
+        # succeeded yet, soonest first, as (due, year, round, session name, charts)
+        jobs = []
+        for year in sorted({(now - PREWARM_CATCHUP).year, (now + PREWARM_LOOKAHEAD).year}):
+            schedule = fastf1.get_event_schedule(year, include_testing=False)
+            for _, event in schedule.iterrows():
+                for number in PREWARM_SESSIONS:
+                    start = event.get(f"Session{number}DateUtc")
+                    name = event.get(f"Session{number}")
+                    if pd.isna(start) or not name:
+                        continue
+                    for charts, delay in ((False, PREWARM_DELAY), (True, SESSION_FINAL_AFTER + pd.Timedelta(minutes=1))):
+                        job = (year, int(event["RoundNumber"]), name, charts)
+                        due = start + delay
+                        if now - PREWARM_CATCHUP <= due <= now + PREWARM_LOOKAHEAD and job not in self._done:
+                            jobs.append((due, *job))
+        return sorted(jobs)
+
+    async def run(self):
+        # Scheduler loop: plan ahead, sleep until each warm-up is due and run it, then plan again.
+        # Warm-ups that fail (usually because the data is not published yet) are retried on
+        # the next pass for as long as they are inside the catch-up window
+        while True:
+            try:
+                self.planned = await run_blocking(
+                    "events", self.plan, pd.Timestamp.now(tz="UTC").tz_localize(None), pool="io"
+                )
+            except Exception as e:
+                print(f"Error planning pre-warm: {e}")
+                self.planned = []
+
+            for due, year, round_number, session_name, charts in self.planned:
+                wait = (due - pd.Timestamp.now(tz="UTC").tz_localize(None)).total_seconds()
+                if wait > PREWARM_REPLAN.total_seconds():
+                    # Plan again before sleeping this long, the schedule may have moved
+                    await asyncio.sleep(PREWARM_REPLAN.total_seconds())
+                    break
+                await asyncio.sleep(max(wait, 0))
+                record = await self.start(year, round_number, session_name, charts)
+                if record["status"] == "ok":
+                    self._done.add((year, round_number, session_name, charts))
+            else:
+                await asyncio.sleep(PREWARM_REPLAN.total_seconds())
+
+    def start(self, year, gp, identifier, charts=True):
+        # Warm one session in the background; triggering a warm-up that is already running
+        # returns the running task
+        key = (year, gp, identifier, charts)
+        task = self._running.get(key)
+        if task is None:
+            task = self._running[key] = asyncio.create_task(self.warm(year, gp, identifier, charts))
+            task.add_done_callback(lambda _: self._running.pop(key, None))
+        return task
+
+    async def warm(self, year, gp, identifier, charts):
+        started = time.perf_counter()
+        record = {"year": year, "gp": gp, "identifier": identifier, "charts": charts, "started_at": time.time()}
+        try:
+            # The results JSON, then the laps, then (for the charts) the telemetry on top
+            await run_blocking("prewarm", session_payload, year, gp, identifier)
+            drivers = await run_blocking(
+                "prewarm", session_drivers, year, gp, identifier, "telemetry" if charts else "laps"
+            )
+            record["drivers"] = len(drivers)
+
+            if charts:
+                semaphore = asyncio.Semaphore(PREWARM_CONCURRENCY)
+
+                async def warm_chart(driver):
+                    async with semaphore:
+                        image, _, _ = await fastest_lap_chart(year, gp, identifier, driver)
+                        return image is not None
+
+                record["charts_rendered"] = sum(await asyncio.gather(*(warm_chart(driver) for driver in drivers)))
+            record["status"] = "ok"
+        except Exception as e:
+            print(f"Error pre-warming {year} {gp} {identifier}: {e}")
+            record.update(status="error", error=str(e))
+
+        record["seconds"] = round(time.perf_counter() - started, 3)
+        self.history.append(record)
+        return record
+
+    def stats(self):
+        return {
+            "enabled": PREWARM_ENABLED,
+            "delay_minutes": PREWARM_DELAY.total_seconds() / 60,
+            "lookahead_hours": PREWARM_LOOKAHEAD.total_seconds() / 3600,
+            "catchup_hours": PREWARM_CATCHUP.total_seconds() / 3600,
+            "concurrency": PREWARM_CONCURRENCY,
+            "planned": [
+                {"due": str(due), "year": year, "round": round_number, "session": session_name, "charts": charts}
+                for due, year, round_number, session_name, charts in self.planned
+            ],
+            "running": [
+                {"year": year, "gp": gp, "identifier": identifier, "charts": charts}
+                for year, gp, identifier, charts in self._running
+            ],
+            "history": list(self.history),
+        }
+
+
+prewarmer = Prewarmer()
+prewarm_task = None
+
+
+# F1-themed colormap for speed (yellow-orange-red)
+SPEED_CMAP = LinearSegmentedColormap.from_list("f1_colors", ["#FFFF00", "#FF9900", "#e10600"])
+
+
+def warm_render_worker():
+    # Runs once in each render process: load the font cache and draw a throwaway figure
+    # so the first real chart does not pay for font discovery and text layout setup
+    from matplotlib import font_manager
+    font_manager.findfont(font_manager.FontProperties(family=matplotlib.rcParams["font.family"]))
+
+    fig = Figure(figsize=(2, 2))
+    ax = fig.subplots()
+    lc = LineCollection([[(0, 0), (1, 1)]], cmap=SPEED_CMAP, norm=Normalize(0, 1))
+    lc.set_array(np.array([0.5]))
+    ax.add_collection(lc)
+    ax.legend(handles=[Line2D([0], [0], color=SPEED_CMAP(0.5), label="warm-up")], title="Speed")
+    fig.savefig(io.BytesIO(), format="png", dpi=50, bbox_inches="tight")
+
+
+def save_figure(fig, stream, **kwargs):
+    # fig.savefig() that records the image encoding as the png_encode stage: savefig draws the
+    # figure first (the last draw_event marks the end of drawing) and then writes the image
+    drawn = []
+    callback = fig.canvas.mpl_connect("draw_event", lambda _: drawn.append(time.perf_counter()))
+    try:
+        fig.savefig(stream, **kwargs)
+    finally:
+        fig.canvas.mpl_disconnect(callback)
+    record_stage("png_encode", time.perf_counter() - drawn[-1] if drawn else 0.0)
+
+
+def encode_base64(image):
+    with stage_timer("base64_encode"):
+        return base64.b64encode(image).decode('utf-8')
+
+
+def timed_render(func, stage, *args):
+    # Runs on a render worker: call func and return its result with the stage timings taken
+    # inside it, plus the rest of the call recorded as the given stage
+    stage_collector.timings = timings = []
+    started = time.perf_counter()
+    try:
+        result = func(*args)
+    finally:
+        stage_collector.timings = None
+    encoding = sum(seconds for name, seconds in timings if name == "png_encode")
+    timings.append((stage, time.perf_counter() - started - encoding))
+    return result, timings
+
+
+async def canonical_chart_inputs(inputs):
+    # Key charts by the canonical round and session name rather than the client's spelling.
+    # A session that cannot be resolved keeps its inputs as given; produce() reports the error
+    try:
+        round_number, session_name = await run_blocking(
+            "session", resolve_session, inputs["year"], inputs["gp"], inputs["identifier"], pool="io"
+        )
+    except Exception:
+        return inputs
+    return {**inputs, "gp": round_number, "identifier": session_name}
+
+
+async def cached_chart(chart, inputs, produce, image_format="png"):
+    # Serve a chart image from the chart cache without loading the session; on a miss call
+    # produce(), which returns (image, metadata, final) with a PNG image, and cache the image once
+    # the session is final. Other formats are converted from the (cached) PNG.
+    # Returns (image, metadata, final), where image is None and metadata holds the error on failure.
+    key = chart_cache.key(chart, image_format=image_format, **await canonical_chart_inputs(inputs))
+    cached = await run_blocking("chart-cache", chart_cache.get, key, pool="io")
+    if cached is not None:
+        image, metadata = cached
+        return image, metadata, True
+
+    if image_format == "png":
+        image, metadata, final = await produce()
+    else:
+        image, metadata, final = await cached_chart(chart, inputs, produce)
+        if image is not None:
+            image = await render_chart(convert_png, image, image_format, stage="image_convert")
+
+    if image is not None and final:
+        await run_blocking("chart-cache", chart_cache.put, key, image, metadata, pool="io")
+    return image, metadata, final
+
+
+# Media types of the image formats the binary chart routes can serve, in order of preference on ties
+IMAGE_MEDIA_TYPES = {"png": "image/png", "webp": "image/webp"}
+
+
+def negotiate_image_format(accept):
+    # Pick the image format the client prefers from its Accept header; None if neither is acceptable
+    ranges = []
+    for part in (accept or "*/*").split(","):
+        media_range, *params = [piece.strip() for piece in part.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((media_range.lower(), q))
+
+    best_format, best_q = None, 0.0
+    for image_format, media_type in IMAGE_MEDIA_TYPES.items():
+        # The most specific matching range decides the quality for this format
+        matches = [(media_range.count("*"), q) for media_range, q in ranges if media_range in (media_type, "image/*", "*/*")]
+        if not matches:
+            continue
+        q = min(matches)[1]
+        if q > best_q:
+            best_format, best_q = image_format, q
+    return best_format
+
+
+def convert_png(image, image_format):
+    # Re-encode a rendered PNG; WebP is lossless so the transparent charts keep their alpha channel
+    from PIL import Image
+
+    out = io.BytesIO()
+    with Image.open(io.BytesIO(image)) as img:
+        img.save(out, format=image_format.upper(), lossless=True, method=4)
+    return out.getvalue()
+
+
+def image_response(request, image, final, image_format):
+    # Binary chart response with validators; images of final sessions never change
+    etag = f'"{hashlib.sha256(image).hexdigest()[:32]}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable" if final else "public, max-age=60",
+        "Vary": "Accept",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=image, media_type=IMAGE_MEDIA_TYPES[image_format], headers=headers)
+
+
+async def chart_image_route(request, chart):
+    # Shared body of the binary chart routes: negotiate the format, then serve the chart or a JSON error
+    image_format = negotiate_image_format(request.headers.get("accept"))
+    if image_format is None:
+        return JSONResponse(
+            content={"error": f"Acceptable image types: {', '.join(IMAGE_MEDIA_TYPES.values())}"},
+            status_code=406,
+        )
+
+    image, metadata, final = await chart(image_format)
+    if image is None:
+        return JSONResponse(content=metadata, status_code=404)
+    return image_response(request, image, final, image_format)
+
+
+def worker_progress(progress):
+    # Progress callbacks are closures over the event loop, so they can only be handed to work
+    # that runs on a thread; with a process compute pool the session stages are not reported
+    return progress if WORKER_EXECUTOR_KIND == "thread" else None
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def progress_route(run):
+    # Server-Sent Events variant of a chart route. run(progress) is a coroutine function returning
+    # the route's JSON content; every progress(stage, data) call along the way, from the event loop
+    # or a worker thread, is sent as a "progress" event with the time elapsed since the request,
+    # and the content follows as a "result" event
+    async def events():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        queue = asyncio.Queue()
+
+        def progress(stage, data=None):
+            event = {"stage": stage, "elapsed": round(loop.time() - started, 3), **(data or {})}
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+        # Events from the worker threads are queued with call_soon_threadsafe before the thread's
+        # result is, so the None marking the end always comes after the last progress event
+        task = asyncio.ensure_future(run(progress))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while (event := await queue.get()) is not None:
+                yield sse_event("progress", event)
+            try:
+                content = task.result()
+            except Exception as e:
+                print(f"Error: {e}")
+                content = {"error": "An error occurred while processing the data"}
+            yield sse_event("result", {"elapsed": round(loop.time() - started, 3), **content})
+        finally:
+            # The client went away; stop waiting on the chart (a session load already running finishes and is cached)
+            task.cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Job queue for the heavy chart routes: a chart is submitted as a job and the client polls or
+# subscribes for the result. At most JOB_WORKERS jobs run at once and at most JOB_QUEUE_MAX wait;
+# past that submissions are refused with 429. Jobs whose chart is cached or whose session is
+# already loaded run ahead of the ones that have to load a session first
+JOB_WORKERS = int(os.environ.get("ANEMOI_JOB_WORKERS", 2))
+JOB_QUEUE_MAX = int(os.environ.get("ANEMOI_JOB_QUEUE_MAX", 32))
+JOB_RETENTION_SECONDS = float(os.environ.get("ANEMOI_JOB_RETENTION_SECONDS", 600))
+JOB_MAX_WAIT_SECONDS = 30.0
+JOB_PRIORITIES = {"cached": 0, "warm": 1, "cold": 2}
+
+
+class JobQueue:
+    # Jobs are plain dicts (what GET /jobs/{id} returns); the coroutine to run, the subscribers
+    # and the completion event of each job are kept next to them in _state
+    def __init__(self, workers, max_queued, retention):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention = retention
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self._jobs = OrderedDict()  # id -> job, oldest first
+        self._state = {}  # id -> {"order", "run", "listeners", "finished"}
+        self._durations = deque(maxlen=50)  # run time of recent jobs, for Retry-After
+        self._queue = None
+        self._tasks = []
+        self._sequence = 0
+
+    def full(self):
+        return self._queue is not None and self._queue.qsize() >= self.max_queued
+
+    def submit(self, kind, params, priority, run):
+        # Queue run(progress), a coroutine function returning the job's result; None when the queue is full.
+        # The workers start with the first job, on the running event loop
+        self._expire()
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        if self.full():
+            self.rejected += 1
+            return None
+
+        job_id = uuid.uuid4().hex
+        self._sequence += 1
+        order = (JOB_PRIORITIES[priority], self._sequence)
+        self._jobs[job_id] = {
+            "id": job_id,
+            "kind": kind,
+            "params": params,
+            "priority": priority,
+            "status": "queued",
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "stages": [],
+            "result": None,
+        }
+        self._state[job_id] = {"order": order, "run": run, "listeners": [], "finished": asyncio.Event()}
+        self._queue.put_nowait((*order, job_id))
+        self.submitted += 1
+        return self.get(job_id)
+
+    async def _work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            *_, job_id = await self._queue.get()
+            job, state = self._jobs[job_id], self._state[job_id]
+            job.update(status="running", started_at=time.time())
+            started = loop.time()
+
+            def progress(stage, data=None, job=job, state=state, started=started):
+                event = {"stage": stage, "elapsed": round(loop.time() - started, 3), **(data or {})}
+                loop.call_soon_threadsafe(self._publish, state, job, event)
+
+            try:
+                job["result"] = await state.pop("run")(progress)
+                job["status"] = "done"
+                self.completed += 1
+            except Exception as e:
+                print(f"Error running job {job_id}: {e}")
+                job.update(status="failed", result={"error": "An error occurred while processing the data"})
+                self.failed += 1
+
+            # Progress from worker threads is queued on the loop before their results, so every
+            # stage has been published by now
+            job["finished_at"] = time.time()
+            self._durations.append(loop.time() - started)
+            state["finished"].set()
+            for listener in state["listeners"]:
+                listener.put_nowait(None)
+
+    def _publish(self, state, job, event):
+        job["stages"].append(event)
+        for listener in state["listeners"]:
+            listener.put_nowait(event)
+
+    def _expire(self):
+        # Forget finished jobs once their results have been kept for the retention period
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job["finished_at"] is not None and now - job["finished_at"] > self.retention:
+                del self._jobs[job_id]
+                del self._state[job_id]
+
+    def get(self, job_id):
+        self._expire()
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        view = dict(job, stages=list(job["stages"]))
+        if job["status"] == "queued":
+            # Jobs that will start before this one
+            order = self._state[job_id]["order"]
+            view["position"] = sum(
+                1 for other_id, other in self._state.items()
+                if self._jobs[other_id]["status"] == "queued" and other["order"] < order
+            )
+        return view
+
+    async def wait(self, job_id, timeout):
+        # Wait up to timeout seconds for a job to finish
+        state = self._state.get(job_id)
+        if state is not None and timeout > 0:
+            try:
+                await asyncio.wait_for(state["finished"].wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def events(self, job_id):
+        # The job's stages so far, then the ones still to come until it finishes
+        job, state = self._jobs[job_id], self._state[job_id]
+        for event in list(job["stages"]):
+            yield event
+        if state["finished"].is_set():
+            return
+
+        listener = asyncio.Queue()
+        state["listeners"].append(listener)
+        try:
+            while (event := await listener.get()) is not None:
+                yield event
+        finally:
+            state["listeners"].remove(listener)
+
+    def retry_after(self):
+        # Seconds until a queued job is likely to have started, from recent run times
+        average = sum(self._durations) / len(self._durations) if self._durations else 5.0
+        return max(1, math.ceil(average / max(self.workers, 1)))
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+
+    def stats(self):
+        statuses = [job["status"] for job in self._jobs.values()]
+        return {
+            "workers": self.workers,
+            "max_queued": self.max_queued,
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "average_seconds": round(sum(self._durations) / len(self._durations), 3) if self._durations else None,
+            "retry_after": self.retry_after(),
+        }
+
+
+jobs = JobQueue(JOB_WORKERS, JOB_QUEUE_MAX, JOB_RETENTION_SECONDS)
+
+
+async def job_priority(chart, inputs, profile):
+    # "cached" when the chart image is in the chart cache, "warm" when the session is already
+    # loaded with the profile the chart needs, "cold" when the job has to load it first
+    canonical = await canonical_chart_inputs(inputs)
+    key = chart_cache.key(chart, **canonical)
+    if await run_blocking("chart-cache", chart_cache.contains, key, pool="io"):
+        return "cached"
+    loaded = session_cache.profile((canonical["year"], canonical["gp"], canonical["identifier"]))
+    if loaded is not None and profile_covers(loaded, profile):
+        return "warm"
+    return "cold"
+
+
+async def submit_job(kind, params, chart, inputs, profile, run):
+    # Shared body of the job submission routes: 202 with the job, or 429 when the queue is full
+    job = jobs.submit(kind, params, await job_priority(chart, inputs, profile), run)
+    if job is None:
+        return JSONResponse(
+            content={"error": "Too many jobs queued, retry later"},
+            status_code=429,
+            headers={"Retry-After": str(jobs.retry_after())},
+        )
+    return JSONResponse(content=job, status_code=202, headers={"Location": f"/jobs/{job['id']}"})
+
+
+# Submit /telemetry, /track-dominance and /driver-comparison as jobs; the job result is the
+# content the route returns
+@app.post("/jobs/telemetry")
+async def submit_telemetry_job(year: int, gp: str, identifier: str, driver: str):
+    chart, inputs = fastest_lap_chart_inputs(year, gp, identifier, driver)
+    return await submit_job(
+        "telemetry", inputs, chart, inputs, "telemetry",
+        lambda progress: fastest_lap_content(year, gp, identifier, driver, progress)
+    )
+
+@app.post("/jobs/track-dominance")
+async def submit_track_dominance_job(
+    year: int,
+    gp: str,
+    identifier: str,
+    driver1: str = None,
+    driver2: str = None,
+    drivers: str = None,
+    minisectors: int = 21
+):
+    selected = parse_driver_list(driver1, driver2, drivers)
+    chart, inputs = track_dominance_chart_inputs(year, gp, identifier, selected, minisectors)
+    return await submit_job(
+        "track-dominance", inputs, chart, inputs, "telemetry",
+        lambda progress: track_dominance_content(year, gp, identifier, driver1, driver2, drivers, minisectors, progress)
+    )
+
+@app.post("/jobs/driver-comparison")
+async def submit_driver_comparison_job(
+    year: int, gp: str, identifier: str, driver1: str, driver2: str, stint: int = 1, view: str = "laps"
+):
+    chart, inputs = driver_comparison_chart_inputs(year, gp, identifier, driver1, driver2, stint, view)
+    return await submit_job(
+        "driver-comparison", {**inputs, "view": view}, chart, inputs, "telemetry" if view == "full" else "laps",
+        lambda progress: driver_comparison_content(year, gp, identifier, driver1, driver2, stint, view, progress)
+    )
+
+@app.get("/jobs")
+def get_job_queue():
+    return JSONResponse(content=jobs.stats())
+
+# Poll a job; wait=N holds the request for up to N seconds (at most 30) until the job finishes
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0):
+    await jobs.wait(job_id, min(wait, JOB_MAX_WAIT_SECONDS))
+    job = jobs.get(job_id)
+    if job is None:
+        return JSONResponse(content={"error": "Unknown or expired job"}, status_code=404)
+    return JSONResponse(content=job)
+
+# Subscribe to a job as Server-Sent Events: a "progress" event per stage, then the job as "result"
+@app.get("/jobs/{job_id}/events")
+async def get_job_events(job_id: str):
+    if jobs.get(job_id) is None:
+        return JSONResponse(content={"error": "Unknown or expired job"}, status_code=404)
+
+    async def events():
+        async for event in jobs.events(job_id):
+            yield sse_event("progress", event)
+        yield sse_event("result", jobs.get(job_id))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.on_event("startup")
+async def start_render_pool():
+    # Spawn every render worker up front so the initializer has run before the first request
+    if RENDER_WORKERS > 0:
+        executor = get_executor("render")
+        await asyncio.gather(*(
+            asyncio.wrap_future(executor.submit(os.getpid)) for _ in range(RENDER_WORKERS)
+        ))
+
+
+@app.on_event("shutdown")
+def shutdown_executors():
+    with executors_lock:
+        for executor in executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        executors.clear()
+
+
+@app.on_event("startup")
+async def start_ergast_mirror_sync():
+    global ergast_mirror_sync_task
+    if ERGAST_MIRROR_SYNC_HOURS > 0:
+        ergast_mirror_sync_task = asyncio.create_task(ergast_mirror_sync_loop())
+
+
+@app.on_event("startup")
+async def start_prewarm_scheduler():
+    global prewarm_task
+    if PREWARM_ENABLED:
+        prewarm_task = asyncio.create_task(prewarmer.run())
+
+
+@app.on_event("shutdown")
+def stop_prewarm_scheduler():
+    if prewarm_task is not None:
+        prewarm_task.cancel()
+
+
+@app.on_event("shutdown")
+def stop_job_workers():
+    jobs.stop()
+
+
+@app.on_event("shutdown")
+async def close_ergast_client():
+    if ergast_mirror_sync_task is not None:
+        ergast_mirror_sync_task.cancel()
+    global ergast_client
+    if ergast_client is not None:
+        await ergast_client.aclose()
+        ergast_client = None
+
 @app.get("/")
 def read_root():
     return {"message": "Hello, Welcome to Anemoi!"}
 
+# Report session, chart and Ergast cache usage so the budgets can be sized
+@app.get("/cache/stats")
+def get_cache_stats():
+    return JSONResponse(content={
+        "sessions": session_cache.stats(),
+        "session_loads": session_loads.stats(),
+        "telemetry_slices": telemetry_slices.stats(),
+        "telemetry_store": telemetry_store.stats(),
+        "fastf1": fastf1_cache.stats(),
+        "charts": chart_cache.stats(),
+        "ergast": ergast_cache.stats(),
+    })
+
+def process_rss_bytes():
+    # Resident set size of this process (not the render workers), or None where /proc is unavailable
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+# Prometheus metrics: the request and stage histograms, plus cache, job queue and memory figures
+@app.get("/metrics")
+def get_metrics():
+    caches = {
+        "sessions": session_cache.stats(),
+        "telemetry_slices": telemetry_slices.stats(),
+        "telemetry_store": telemetry_store.stats(),
+        "fastf1": fastf1_cache.stats(),
+        "charts": chart_cache.stats(),
+        "ergast": ergast_cache.stats(),
+    }
+    loads = session_loads.stats()
+    queue = jobs.stats()
+    rss = process_rss_bytes()
+    scraped = [
+        ("anemoi_cache_hits_total", "counter", "Cache lookups answered from the cache (stale Ergast hits included)", [
+            ({"cache": name}, stats["hits"] + stats.get("stale_hits", 0)) for name, stats in caches.items()
+        ]),
+        ("anemoi_cache_misses_total", "counter", "Cache lookups that missed", [
+            ({"cache": name}, stats["misses"]) for name, stats in caches.items()
+        ]),
+        ("anemoi_cache_hit_ratio", "gauge", "Share of cache lookups answered from the cache", [
+            ({"cache": name}, stats["hit_ratio"]) for name, stats in caches.items() if stats["hit_ratio"] is not None
+        ]),
+        ("anemoi_cache_bytes", "gauge", "Estimated size of the cached data", [
+            ({"cache": name}, stats["bytes"]) for name, stats in caches.items() if "bytes" in stats
+        ]),
+        ("anemoi_session_loads_total", "counter", "Session loads started", [({}, loads["loads"])]),
+        ("anemoi_session_loads_coalesced_total", "counter", "Session loads that joined one in flight", [
+            ({}, loads["coalesced"])
+        ]),
+        ("anemoi_jobs", "gauge", "Chart jobs by status", [
+            ({"status": "queued"}, queue["queued"]), ({"status": "running"}, queue["running"])
+        ]),
+        ("anemoi_jobs_rejected_total", "counter", "Chart jobs refused with 429", [({}, queue["rejected"])]),
+    ]
+    if rss is not None:
+        scraped.append(("anemoi_process_resident_memory_bytes", "gauge", "Resident set size of the API process", [({}, rss)]))
+
+    return Response(content=metrics.render(scraped), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Inspect the pre-warm scheduler, and warm one session by hand (e.g. after a delayed session)
+@app.get("/prewarm")
+def get_prewarm_status():
+    return JSONResponse(content=prewarmer.stats())
+
+@app.post("/prewarm")
+async def trigger_prewarm(year: int, gp: str, identifier: str, charts: bool = True):
+    prewarmer.start(year, gp, identifier, charts)
+    return JSONResponse(content=prewarmer.stats(), status_code=202)
+
+# Routes that throw away cached data or start upstream ingests need ANEMOI_ADMIN_TOKEN, sent as
+# "Authorization: Bearer <token>"; without a token configured they are disabled
+ADMIN_TOKEN = os.environ.get("ANEMOI_ADMIN_TOKEN")
+
+def admin_denied(request):
+    # The error response for a request that may not use an admin route, or None
+    if not ADMIN_TOKEN:
+        return JSONResponse(content={"error": "Admin routes are disabled"}, status_code=403)
+    if not hmac.compare_digest(request.headers.get("authorization", "").encode(), f"Bearer {ADMIN_TOKEN}".encode()):
+        return JSONResponse(content={"error": "Admin token required"}, status_code=401)
+    return None
+
+# Inspect FastF1's disk cache, and purge sessions from it. Purging everything, or clearing the
+# HTTP tier as a whole, has to be asked for with all=true
+@app.get("/fastf1/cache")
+async def get_fastf1_cache():
+    stats, sessions = await asyncio.gather(
+        run_blocking("fastf1-cache", fastf1_cache.stats, pool="io"),
+        run_blocking("fastf1-cache", fastf1_cache.sessions, pool="io"),
+    )
+    return JSONResponse(content={**stats, "sessions": sessions})
+
+@app.post("/fastf1/cache/purge")
+async def purge_fastf1_cache(
+    request: Request,
+    year: int = None,
+    event: str = None,
+    session: str = None,
+    http: bool = False,
+    purge_all: bool = Query(False, alias="all"),
+):
+    denied = admin_denied(request)
+    if denied is not None:
+        return denied
+    if ((year is None and event is None and session is None) or http) and not purge_all:
+        return JSONResponse(
+            content={"error": "Give year, event or session to purge, or all=true to purge the whole cache"},
+            status_code=400,
+        )
+
+    removed = await run_blocking("fastf1-cache", fastf1_cache.purge, year, event, session, http, pool="io")
+    return JSONResponse(content={
+        "removed": removed,
+        "bytes": sum(entry["bytes"] for entry in removed),
+        "http_cleared": http,
+    })
+
+# Inspect the local Ergast mirror, and start a sync of it in the background (an admin route).
+# While a sync is running another one is refused with 409 and the status of the running one
+@app.get("/ergast/mirror")
+def get_ergast_mirror():
+    return JSONResponse(content=ergast_mirror.stats())
+
+@app.post("/ergast/mirror/sync")
+async def sync_ergast_mirror(request: Request, full: bool = False):
+    denied = admin_denied(request)
+    if denied is not None:
+        return denied
+
+    running = ergast_mirror.syncing()
+    if not running:
+        ergast_mirror.start_sync(full)
+    stats = await run_blocking("ergast-mirror-read", ergast_mirror.stats, pool="io")
+    return JSONResponse(content=stats, status_code=409 if running else 202)
+
 # Define the route for fetching event schedule
 @app.get("/events/{year}")
 async def get_event_schedule(year: int):
     try:
-        # Fetch the event schedule for the given year
-        schedule = fastf1.get_event_schedule(year)
-
-        if schedule is None or schedule.empty:
-            return JSONResponse(content={"error": f"No schedule found for year {year}"})
-
-        events = []
-        for _, event in schedule.iterrows():
-            events.append({
-                "RoundNumber": event.get("RoundNumber", "N/A"),
-                "Country": event.get("Country", "N/A"),
-                "Location": event.get("Location", "N/A"),
-                "EventName": event.get("EventName", "N/A"),
-                "EventDate": str(event.get("EventDate", "N/A")),
-                "EventFormat": event.get("EventFormat", "N/A"),
-                "Qualifying": str(event.get("Session4DateUtc", "N/A")),
-                "Race": str(event.get("Session5DateUtc", "N/A")),
-            })
+        return JSONResponse(content=await run_blocking("events", event_schedule_payload, year))
+    except Exception as e:
+        print(f"Error fetching event schedule: {e}")
+        return JSONResponse(content={"error": "Data unavailable"})
+
+def event_schedule_payload(year):
+    # Fetch the event schedule for the given year
+    schedule = fastf1.get_event_schedule(year)
+
+    if schedule is None or schedule.empty:
+        return {"error": f"No schedule found for year {year}"}
+
+    events = []
+    for _, event in schedule.iterrows():
+        events.append({
+            "RoundNumber": event.get("RoundNumber", "N/A"),
+            "Country": event.get("Country", "N/A"),
+            "Location": event.get("Location", "N/A"),
+            "EventName": event.get("EventName", "N/A"),
+            "EventDate": str(event.get("EventDate", "N/A")),
+            "EventFormat": event.get("EventFormat", "N/A"),
+            "Qualifying": str(event.get("Session4DateUtc", "N/A")),
+            "Race": str(event.get("Session5DateUtc", "N/A")),
+        })
+
+    return {"year": year, "events": events}
+
+# Define the route for fetching session data
+
+@app.get("/session")
+async def get_session_data(year: int, gp: str, identifier: str):
+    try:
+        return JSONResponse(content=await run_blocking("session", session_payload, year, gp, identifier))
+
+    except Exception as e:
+        print(f"Error fetching session data: {e}")
+        return JSONResponse(content={"error": "Session data unavailable"})
+
+def session_payload(year, gp, identifier):
+    # Fetch the session and its results (served from the session cache when possible)
+    session = get_loaded_session(year, gp, identifier, "results")
+
+    if session is None:
+        return {"error": "Session data unavailable"}
+
+    # Initialize results as None
+    results = None
+
+    # Check if session results are available
+    if session.results is not None and not session.results.empty:
+        # Extract only the required fields from the session results
+
+        results = []
+        for _, row in session.results.iterrows():
+            result = {
+                'Position': int(row['Position']) if pd.notna(row['Position']) else None,
+                'HeadshotUrl': row['HeadshotUrl'],
+                'BroadcastName': row['BroadcastName'],
+                'FullName': row['FullName'],
+                'TeamName': row['TeamName'],
+                'Time': str(row['Time']) if pd.notna(row['Time']) else None,
+                'Status': row['Status'] if row['Status'] else None,
+                'Points': float(row['Points']) if pd.notna(row['Points']) and not isinstance(row['Points'], str) else None
+            }
+            results.append(result)
+    else:
+        print("Results data is unavailable or empty")
+
+    # Create a basic response with session details
+    session_data = {
+        "Year": year,
+        "GrandPrix": gp,
+        "Session": identifier,
+        "Date": str(session.date),
+        "Event": session.event['EventName'],
+        "Location": session.event['Location'],
+    }
+
+    # Add results only if they are available
+    if results:
+        session_data["Results"] = results
+
+    return {"session": session_data}
+
+
+# Columnar exports of session data as an Arrow IPC stream or a Parquet file, for analysts
+# who would otherwise re-parse the JSON routes
+EXPORT_MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# A telemetry export is built in memory before it is sent, so it is bounded in driver laps
+# (drivers x requested laps); exports of several drivers have to say which laps they want
+EXPORT_MAX_TELEMETRY_LAPS = int(os.environ.get("ANEMOI_EXPORT_MAX_TELEMETRY_LAPS", 200))
+
+@app.get("/export/laps")
+async def export_session_laps(
+    year: int,
+    gp: str,
+    identifier: str,
+    format: str = "arrow",
+    columns: str = None,
+    drivers: str = None,
+    laps: str = None
+):
+    return await export_route("laps", format, year, gp, identifier, columns, drivers, laps)
+
+@app.get("/export/results")
+async def export_session_results(
+    year: int,
+    gp: str,
+    identifier: str,
+    format: str = "arrow",
+    columns: str = None,
+    drivers: str = None
+):
+    return await export_route("results", format, year, gp, identifier, columns, drivers, None)
+
+@app.get("/export/telemetry")
+async def export_lap_telemetry(
+    year: int,
+    gp: str,
+    identifier: str,
+    drivers: str,
+    format: str = "arrow",
+    columns: str = None,
+    laps: str = None
+):
+    return await export_route("telemetry", format, year, gp, identifier, columns, drivers, laps)
+
+async def export_route(dataset, format, year, gp, identifier, columns, drivers, laps):
+    if format not in EXPORT_MEDIA_TYPES:
+        return JSONResponse(content={"error": f"format must be one of {', '.join(EXPORT_MEDIA_TYPES)}"}, status_code=400)
+
+    try:
+        lap_numbers = parse_lap_numbers(laps)
+    except ValueError:
+        return JSONResponse(
+            content={"error": f"laps must look like 1-10,15, with lap numbers from 1 to {MAX_LAP_NUMBER}"},
+            status_code=400,
+        )
+
+    driver_list = parse_column_list(drivers)
+    if dataset == "telemetry":
+        if not driver_list:
+            return JSONResponse(content={"error": "drivers is required"}, status_code=400)
+        if len(driver_list) > 1 and not lap_numbers:
+            return JSONResponse(
+                content={"error": "laps is required when exporting the telemetry of several drivers"},
+                status_code=400,
+            )
+        if len(driver_list) * len(lap_numbers or range(MAX_LAP_NUMBER)) > EXPORT_MAX_TELEMETRY_LAPS:
+            return JSONResponse(
+                content={"error": f"At most {EXPORT_MAX_TELEMETRY_LAPS} driver laps of telemetry per export"},
+                status_code=400,
+            )
+
+    try:
+        table = await run_blocking(
+            "export", export_table, dataset, year, gp, identifier,
+            parse_column_list(columns), driver_list, lap_numbers
+        )
+    except KeyError as e:
+        return JSONResponse(content={"error": f"Unknown column: {e.args[0]}"}, status_code=400)
+    except Exception as e:
+        print(f"Error exporting {dataset}: {e}")
+        return JSONResponse(content={"error": "Data unavailable"}, status_code=500)
+
+    if table is None:
+        return JSONResponse(content={"error": f"No {dataset} data available"}, status_code=404)
+
+    filename = f"{year}_{gp}_{identifier}_{dataset}.{format}".replace(" ", "_")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if format == "parquet":
+        body = await run_blocking("export", table_to_parquet, table)
+        return Response(content=body, media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
+    return StreamingResponse(arrow_stream_chunks(table), media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
+
+def parse_column_list(value):
+    if not value:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+# No session has more laps than this; lap numbers and ranges in export requests are bounded by it
+MAX_LAP_NUMBER = 200
+
+def parse_lap_numbers(value):
+    # "1-10,15" -> {1, ..., 10, 15}; raises ValueError for reversed ranges and numbers outside
+    # 1..MAX_LAP_NUMBER, so a request can't make us build an arbitrarily large set
+    if not value:
+        return None
+    numbers = set()
+    for part in value.split(","):
+        first, _, last = part.strip().partition("-")
+        first, last = int(first), int(last or first)
+        if not 1 <= first <= last <= MAX_LAP_NUMBER:
+            raise ValueError(f"invalid lap range: {part.strip()}")
+        numbers.update(range(first, last + 1))
+    return numbers
+
+def export_table(dataset, year, gp, identifier, columns, drivers, lap_numbers):
+    import pyarrow as pa
+
+    profile = {"results": "results", "laps": "laps"}.get(dataset, "telemetry")
+    session = get_loaded_session(year, gp, identifier, profile)
+
+    if dataset == "results":
+        frame = pd.DataFrame(session.results)
+        if drivers:
+            frame = frame.loc[frame['Abbreviation'].isin(drivers) | frame['DriverNumber'].isin(drivers)]
+    elif dataset == "laps":
+        frame = pd.DataFrame(session.laps)
+        if drivers:
+            frame = frame.loc[frame['Driver'].isin(drivers) | frame['DriverNumber'].isin(drivers)]
+        if lap_numbers:
+            frame = frame.loc[frame['LapNumber'].isin(lap_numbers)]
+    else:
+        selected = session.laps.pick_drivers(drivers)
+        if lap_numbers:
+            selected = selected.loc[selected['LapNumber'].isin(lap_numbers)]
+
+        # Telemetry is built per lap, so distance restarts at zero on every lap
+        frames = []
+        for _, lap in selected.iterlaps():
+            telemetry = lap_position_telemetry(lap).copy(deep=False)
+            telemetry.insert(0, 'LapNumber', int(lap['LapNumber']))
+            telemetry.insert(0, 'Driver', lap['Driver'])
+            frames.append(telemetry)
+        frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    if frame.empty:
+        return None
+
+    # Column projection; an unknown name raises KeyError, reported as a 400 by the route
+    if columns:
+        missing = [column for column in columns if column not in frame.columns]
+        if missing:
+            raise KeyError(missing[0])
+        frame = frame[columns]
+
+    # Object columns can hold mixed values (e.g. strings and NaN floats); fall back to strings for those
+    arrays = {}
+    for column in frame.columns:
+        values = frame[column]
+        # Categorical lap columns (see compact_session) are exported as the plain strings they were
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        try:
+            arrays[column] = pa.array(values, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            arrays[column] = pa.array(values.astype("string"), from_pandas=True)
+    return pa.table(arrays)
+
+def arrow_stream_chunks(table, batch_rows=64 * 1024):
+    # Write the table as an Arrow IPC stream one record batch at a time, yielding the bytes of
+    # each batch as soon as it is encoded
+    import pyarrow as pa
+
+    sink = io.BytesIO()
+
+    def drain():
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate(0)
+        return data
+
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=batch_rows):
+            writer.write_batch(batch)
+            yield drain()
+    yield drain()
+
+def table_to_parquet(table):
+    import pyarrow.parquet as pq
+
+    sink = io.BytesIO()
+    pq.write_table(table, sink, compression="zstd")
+    return sink.getvalue()
+
+
+@app.get("/telemetry")
+async def get_fastest_lap_telemetry_base64(year: int, gp: str, identifier: str, driver: str):
+    try:
+        return JSONResponse(content=await fastest_lap_content(year, gp, identifier, driver))
 
-        return JSONResponse(content={"year": year, "events": events})
     except Exception as e:
-        print(f"Error fetching event schedule: {e}")
-        return JSONResponse(content={"error": "Data unavailable"})
+        print(f"Error: {e}")
+        return JSONResponse(content={"error": "An error occurred while processing the data"})
 
-# Define the route for fetching session data
+# Same chart as /telemetry, returned as image/png or image/webp bytes depending on the Accept header
+@app.get("/telemetry/image")
+async def get_fastest_lap_telemetry_image(request: Request, year: int, gp: str, identifier: str, driver: str):
+    try:
+        return await chart_image_route(
+            request, lambda image_format: fastest_lap_chart(year, gp, identifier, driver, image_format)
+        )
+    except Exception as e:
+        print(f"Error: {e}")
+        return JSONResponse(content={"error": "An error occurred while processing the data"}, status_code=500)
 
-@app.get("/session")
-async def get_session_data(year: int, gp: str, identifier: str):
+# Fastest-lap maps of several drivers (comma separated codes, or "all") of one session, streamed
+# as newline-delimited JSON with one object per driver in the order the charts are ready. Charts
+# are produced concurrently; the ones that miss the chart cache share a single session load
+@app.get("/telemetry/batch")
+async def get_fastest_lap_telemetry_batch(year: int, gp: str, identifier: str, drivers: str = "all"):
+    selected = parse_driver_list(None, None, drivers)
     try:
-        # Fetch the session
-        session = fastf1.get_session(year, gp, identifier)
+        if selected == "all":
+            selected = await run_blocking("telemetry", session_drivers, year, gp, identifier, "results")
+    except Exception as e:
+        print(f"Error: {e}")
+        return JSONResponse(content={"error": "An error occurred while processing the data"})
+    if not selected:
+        return JSONResponse(content={"error": "No drivers requested"})
 
-        if session is None:
-            return JSONResponse(content={"error": "Session data unavailable"})
-
-        # Load the session data (required to access timing/telemetry)
-        session.load(laps=True, telemetry=False, weather=False, messages=False)
-
-        # Initialize results as None
-        results = None
-
-        # Check if session results are available
-        if session.results is not None and not session.results.empty:
-            # Extract only the required fields from the session results
-
-            results = []
-            for _, row in session.results.iterrows():
-                result = {
-                    'Position': int(row['Position']) if pd.notna(row['Position']) else None,
-                    'HeadshotUrl': row['HeadshotUrl'],
-                    'BroadcastName': row['BroadcastName'],
-                    'FullName': row['FullName'],
-                    'TeamName': row['TeamName'],
-                    'Time': str(row['Time']) if pd.notna(row['Time']) else None,
-                    'Status': row['Status'] if row['Status'] else None,
-                    'Points': float(row['Points']) if pd.notna(row['Points']) and not isinstance(row['Points'], str) else None
-                }
-                results.append(result)
-        else:
-            print("Results data is unavailable or empty")
+    async def driver_chart(driver):
+        try:
+            image, metadata, _ = await fastest_lap_chart(year, gp, identifier, driver)
+        except Exception as e:
+            print(f"Error: {e}")
+            return {"driver": driver, "error": "An error occurred while processing the data"}
+        if image is None:
+            return {"driver": driver, **metadata}
+        return {"driver": driver, **metadata, "image_base64": encode_base64(image)}
 
-        # Create a basic response with session details
-        session_data = {
-            "Year": year,
-            "GrandPrix": gp,
-            "Session": identifier,
-            "Date": str(session.date),
-            "Event": session.event['EventName'],
-            "Location": session.event['Location'],
-        }
+    async def lines():
+        tasks = [asyncio.create_task(driver_chart(driver)) for driver in selected]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield (json.dumps(await task) + "\n").encode()
+        finally:
+            # The client went away: stop the charts that are still running
+            for task in tasks:
+                task.cancel()
 
-        # Add results only if they are available
-        if results:
-            session_data["Results"] = results
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
-        print(f"Session Data: {session_data}")
+async def fastest_lap_content(year, gp, identifier, driver, progress=None):
+    image, metadata, _ = await fastest_lap_chart(year, gp, identifier, driver, progress=progress)
+    if image is None:
+        return metadata
 
-        return JSONResponse(content={"session": session_data})
+    return {**metadata, "image_base64": encode_base64(image)}
 
-    except Exception as e:
-        print(f"Error fetching session data: {e}")
-        return JSONResponse(content={"error": "Session data unavailable"})
-    
+def fastest_lap_chart_inputs(year, gp, identifier, driver):
+    # (chart cache name, inputs) of a fastest lap chart
+    return "telemetry", {"year": year, "gp": gp, "identifier": identifier, "driver": driver}
 
-@app.get("/telemetry")
-async def get_fastest_lap_telemetry_base64(year: int, gp: str, identifier: str, driver: str):
-    try:
-        # Load the session and telemetry data
-        session = fastf1.get_session(year, gp, identifier)
-        session.load(laps=True, telemetry=True, weather=False, messages=False)
+async def fastest_lap_chart(year, gp, identifier, driver, image_format="png", progress=None):
+    async def produce():
+        payload = await run_blocking(
+            "telemetry", fastest_lap_payload, year, gp, identifier, driver, progress=worker_progress(progress)
+        )
+        if "error" in payload:
+            return None, payload, False
+        if progress is not None:
+            progress("computed", {"session": payload["session"]})
 
-        # Debug: Print the session event details to check what's available
-        print(f"Session Event: {session.event}")
+        # Generate the PNG image
+        image = await render_chart(
+            plot_fastest_lap_png, payload["telemetry"], driver, gp, identifier, payload["session"]["Event"]
+        )
+        if not image:
+            return None, {"error": "Failed to generate plot"}, False
+        if progress is not None:
+            progress("rendered")
 
-        # Get the fastest lap for the specified driver
-        fastest_lap = session.laps.pick_drivers(driver)
+        return image, {"session": payload["session"]}, payload["final"]
 
-        # Check if a fastest lap is available for the driver
-        if fastest_lap.empty:
-            return JSONResponse(content={"error": f"No fastest lap data available for driver {driver}"})
+    chart, inputs = fastest_lap_chart_inputs(year, gp, identifier, driver)
+    return await cached_chart(chart, inputs, produce, image_format)
 
-        fastest_lap = fastest_lap.pick_fastest()
+def fastest_lap_payload(year, gp, identifier, driver, progress=None):
+    # Load the session and telemetry data
+    session = get_loaded_session(year, gp, identifier, "telemetry", progress)
 
-        # Get telemetry data with added distance
-        telemetry = fastest_lap.get_telemetry().add_distance()
+    # Get the fastest lap for the specified driver
+    fastest_lap = session.laps.pick_drivers(driver)
 
-        # Generate the base64 image
-        base64_img = plot_fastest_lap_to_base64(telemetry, driver, gp, identifier, session.event["EventName"])
-        
-        if base64_img:
-            # Safely handle missing 'Date' field
-            session_data = {
-                "GrandPrix": session.event["EventName"],
-                "Year": year,
-                "Session": identifier,
-                "Driver": driver,
-                "Event": session.event["EventName"],
-                "Location": session.event.get("Location", "Unknown"),  # Default to "Unknown" if not available
-            }
-            return JSONResponse(content={"session": session_data, "image_base64": base64_img})
-        else:
-            return JSONResponse(content={"error": "Failed to generate plot"})
+    # Check if a fastest lap is available for the driver
+    if fastest_lap.empty:
+        return {"error": f"No fastest lap data available for driver {driver}"}
 
-    except Exception as e:
-        print(f"Error: {e}")
-        return JSONResponse(content={"error": "An error occurred while processing the data"})
+    fastest_lap = fastest_lap.pick_fastest()
 
+    # Telemetry of the lap with distance added, shared with the other per-lap routes
+    telemetry = lap_position_telemetry(fastest_lap)
 
-def plot_fastest_lap_to_base64(telemetry, driver, gp, identifier, event_name):
+    # Safely handle missing 'Date' field
+    session_data = {
+        "GrandPrix": session.event["EventName"],
+        "Year": year,
+        "Session": identifier,
+        "Driver": driver,
+        "Event": session.event["EventName"],
+        "Location": session.event.get("Location", "Unknown"),  # Default to "Unknown" if not available
+    }
+    # Only the plotted channels go to the renderer, as a plain DataFrame without the session attached
+    return {
+        "session": session_data,
+        "telemetry": pd.DataFrame(telemetry[["X", "Y", "Speed"]]),
+        "final": session_is_final(session),
+    }
+
+
+def plot_fastest_lap_png(telemetry, driver, gp, identifier, event_name):
     try:
         # Check for missing or invalid telemetry data
         if "X" not in telemetry or "Y" not in telemetry or "Speed" not in telemetry:
@@ -181,20 +3185,20 @@ def plot_fastest_lap_to_base64(telemetry, driver, gp, identifier, event_name):
             raise ValueError("No valid telemetry data available for plotting.")
             
         # Create figure with reduced size
-        plt.rcParams['figure.figsize'] = [6, 6]
-        fig, ax = plt.subplots(facecolor='none')
+        render_params = CHART_RENDER_PARAMS["telemetry"]
+        fig = Figure(figsize=render_params["figsize"], facecolor='none')
+        ax = fig.subplots()
         ax.set_facecolor('none')  # Transparent background
         
         # Define speed ranges for legend
         speed_min = speed.min()
         speed_max = speed.max()
         
-        # Create F1-themed colormap for speed (yellow-orange-red)
-        colors = ["#FFFF00", "#FF9900", "#e10600"]  # Yellow to orange to F1 red
-        custom_cmap = LinearSegmentedColormap.from_list("f1_colors", colors)
+        # F1-themed colormap for speed (yellow-orange-red)
+        custom_cmap = SPEED_CMAP
         
         # Normalize speed for color mapping
-        norm = plt.Normalize(speed_min, speed_max)
+        norm = Normalize(speed_min, speed_max)
         points = np.array([x, y]).T.reshape(-1, 1, 2)
         segments = np.concatenate([points[:-1], points[1:]], axis=1)
         
@@ -231,23 +3235,326 @@ def plot_fastest_lap_to_base64(telemetry, driver, gp, identifier, event_name):
         
         # Save figure with optimized settings
         img_stream = io.BytesIO()
-        plt.savefig(img_stream,
-                   format='png',
-                   dpi=150,
+        save_figure(fig, img_stream,
+                   format=render_params["format"],
+                   dpi=render_params["dpi"],
                    bbox_inches='tight',
                    facecolor='none',
                    edgecolor='none',
                    transparent=True,
                    pad_inches=0.2)
-        plt.close()
         
-        img_stream.seek(0)
-        base64_img = base64.b64encode(img_stream.getvalue()).decode('utf-8')
-        return base64_img
+        return img_stream.getvalue()
     except Exception as e:
         print(f"Error while plotting: {e}")
         return None
      
+# Raw lap telemetry as columnar JSON, downsampled on the server to a point budget so the
+# frontend can draw interactive charts instead of fetching pre-rendered images
+@app.get("/telemetry/data")
+async def get_lap_telemetry_data(
+    year: int,
+    gp: str,
+    identifier: str,
+    driver: str,
+    lap: int = None,
+    points: int = 1000,
+    method: str = "lttb"
+):
+    if method not in DOWNSAMPLE_METHODS:
+        return JSONResponse(content={"error": f"method must be one of {', '.join(DOWNSAMPLE_METHODS)}"}, status_code=400)
+    if not 3 <= points <= MAX_TELEMETRY_POINTS:
+        return JSONResponse(content={"error": f"points must be between 3 and {MAX_TELEMETRY_POINTS}"}, status_code=400)
+
+    try:
+        return JSONResponse(content=await run_blocking(
+            "telemetry-data", lap_telemetry_payload, year, gp, identifier, driver, lap, points, method
+        ))
+    except Exception as e:
+        print(f"Error: {e}")
+        return JSONResponse(content={"error": "An error occurred while processing the data"})
+
+# Channels returned by /telemetry/data, with the number of decimals kept for each
+TELEMETRY_DATA_CHANNELS = {
+    "Time": 3,
+    "Distance": 1,
+    "X": 0,
+    "Y": 0,
+    "Speed": 0,
+    "Throttle": 0,
+    "Brake": None,
+    "Gear": None,
+}
+MAX_TELEMETRY_POINTS = 20000
+
+def lap_telemetry_payload(year, gp, identifier, driver, lap_number, points, method):
+    session = get_loaded_session(year, gp, identifier, "telemetry")
+
+    driver_laps = session.laps.pick_drivers(driver)
+    if driver_laps.empty:
+        return {"error": f"No lap data available for driver {driver}"}
+
+    # Default to the driver's fastest lap
+    if lap_number is None:
+        lap = driver_laps.pick_fastest()
+        if lap is None or lap.empty or pd.isna(lap['LapTime']):
+            return {"error": f"No fastest lap data available for driver {driver}"}
+    else:
+        matching = driver_laps.loc[driver_laps['LapNumber'] == lap_number]
+        if matching.empty:
+            return {"error": f"Lap {lap_number} not available for driver {driver}"}
+        lap = matching.iloc[0]
+
+    telemetry = lap_position_telemetry(lap)
+    total_points = len(telemetry)
+
+    # Pick the samples to keep from the speed trace, then take every channel at those samples
+    with stage_timer("compute"):
+        indices = DOWNSAMPLE_METHODS[method](
+            telemetry['Distance'].to_numpy(), telemetry['Speed'].to_numpy(), points
+        )
+    telemetry = telemetry.iloc[indices]
+
+    columns = {}
+    for channel, decimals in TELEMETRY_DATA_CHANNELS.items():
+        values = telemetry[channel].to_numpy()
+        if decimals is not None:
+            values = np.round(values.astype(float), decimals)
+            # JSON has no NaN, send null instead
+            columns[channel] = [None if np.isnan(value) else value for value in values.tolist()]
+        else:
+            columns[channel] = values.tolist()
+
+    return {
+        "session": {
+            "Year": year,
+            "GrandPrix": gp,
+            "Session": identifier,
+            "Driver": driver,
+            "Event": session.event["EventName"],
+        },
+        "LapNumber": int(lap['LapNumber']),
+        "LapTime": lap['LapTime'].total_seconds() if pd.notna(lap['LapTime']) else None,
+        "method": method,
+        "points": len(telemetry),
+        "original_points": total_points,
+        "telemetry": columns,
+    }
+
+def lttb_indices(x, y, threshold):
+    # Largest-triangle-three-buckets: keep the first and last sample, and from each bucket in
+    # between the sample forming the largest triangle with the previously kept sample and the
+    # average of the next bucket. Missing samples are interpolated for the averages and never
+    # picked unless their whole bucket is missing
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    missing = np.isnan(y)
+    if missing.all():
+        return np.linspace(0, n - 1, threshold).astype(int)
+    if missing.any():
+        valid = np.flatnonzero(~missing)
+        y = np.interp(np.arange(n), valid, y[valid])
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    indices = np.empty(threshold, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        area[missing[start:end]] = -1
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+def minmax_indices(x, y, threshold):
+    # Min/max decimation: keep the first and last sample, and the lowest and highest sample of
+    # each bucket in between, which preserves the peaks of the trace (braking points and top
+    # speeds); at most threshold samples in all
+    n = len(y)
+    if threshold >= n:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, max((threshold - 2) // 2, 0) + 1).astype(int)
+    keep = [0, n - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        bucket = y[start:end]
+        if len(bucket) and not np.isnan(bucket).all():
+            keep.append(start + int(np.nanargmin(bucket)))
+            keep.append(start + int(np.nanargmax(bucket)))
+    return np.unique(keep)
+
+DOWNSAMPLE_METHODS = {"lttb": lttb_indices, "minmax": minmax_indices}
+
+# Session replay over a WebSocket. After a JSON header describing the drivers and the record
+# layout, every tick sends one binary frame: a REPLAY_FRAME_HEADER followed by REPLAY_RECORD
+# records, one per position sample of every driver that falls inside the tick. Playback follows
+# the wall clock; ticks missed while a send was blocked are merged into the next frame, and when
+# the client is more than REPLAY_MAX_MERGED_TICKS behind only each driver's latest sample is sent
+REPLAY_MAX_SPEED = 64.0
+REPLAY_MAX_HZ = 30.0
+REPLAY_MAX_MERGED_TICKS = 5
+
+# <session time at the end of the tick (s), number of records>
+REPLAY_FRAME_HEADER = struct.Struct("<dH")
+REPLAY_RECORD = np.dtype([
+    ("driver", "u1"),
+    ("time", "<f4"),
+    ("x", "<f4"),
+    ("y", "<f4"),
+    ("speed", "<u2"),
+    ("gear", "u1"),
+    ("throttle", "u1"),
+    ("brake", "u1"),
+])
+
+
+def replay_tracks(year, gp, identifier, drivers):
+    # Per-driver arrays the replay loop slices by session time: position samples with the car
+    # channels interpolated onto them (gear is taken from the last car sample instead)
+    session = get_loaded_session(year, gp, identifier, "telemetry")
+    results = session.results
+    abbreviations = dict(zip(results['DriverNumber'].astype(str), results['Abbreviation']))
+    numbers = [
+        number for number, abbreviation in abbreviations.items()
+        if drivers == "all" or abbreviation in drivers or number in drivers
+    ]
+
+    tracks = []
+    for number in numbers:
+        pos = session_telemetry(session, "pos").get(number)
+        car = session_telemetry(session, "car").get(number)
+        if pos is None or car is None or not len(pos["SessionTime"]) or not len(car["SessionTime"]):
+            continue
+
+        pos_time = pos["SessionTime"] / 1000.0
+        car_time = car["SessionTime"] / 1000.0
+        gear_index = np.clip(np.searchsorted(car_time, pos_time, side='right') - 1, 0, len(car_time) - 1)
+        tracks.append({
+            "driver": abbreviations[number],
+            "number": number,
+            "time": pos_time,
+            "x": pos["X"],
+            "y": pos["Y"],
+            "speed": np.interp(pos_time, car_time, car["Speed"]),
+            "gear": car["nGear"][gear_index],
+            "throttle": np.interp(pos_time, car_time, car["Throttle"]),
+            "brake": car["Brake"][gear_index],
+        })
+
+    if not tracks:
+        return {"error": "No telemetry available for the selected drivers"}
+
+    laps_start = session.laps['LapStartTime'].min()
+    return {
+        "event": session.event['EventName'],
+        "tracks": tracks,
+        "start": laps_start.total_seconds() if pd.notna(laps_start) else min(t["time"][0] for t in tracks),
+        "end": max(t["time"][-1] for t in tracks),
+    }
+
+
+def replay_frame(tracks, start, end, latest_only=False):
+    # One frame with the samples of every driver in the session-time window (start, end]; with
+    # latest_only, just the last sample of each driver in the window
+    parts = []
+    for index, track in enumerate(tracks):
+        first, last = np.searchsorted(track["time"], [start, end], side='right')
+        if latest_only:
+            first = max(first, last - 1)
+        if first >= last:
+            continue
+        records = np.empty(last - first, dtype=REPLAY_RECORD)
+        records["driver"] = index
+        for field in ("time", "x", "y", "speed", "gear", "throttle", "brake"):
+            records[field] = track[field][first:last]
+        parts.append(records)
+
+    records = np.concatenate(parts) if parts else np.empty(0, dtype=REPLAY_RECORD)
+    return REPLAY_FRAME_HEADER.pack(end, len(records)) + records.tobytes()
+
+
+@app.websocket("/replay")
+async def replay_session(
+    websocket: WebSocket,
+    year: int,
+    gp: str,
+    identifier: str,
+    drivers: str = "all",
+    speed: float = 1.0,
+    hz: float = 10.0,
+    start: float = None
+):
+    await websocket.accept()
+    if not 0 < speed <= REPLAY_MAX_SPEED or not 0 < hz <= REPLAY_MAX_HZ:
+        await websocket.send_json({
+            "error": f"speed must be in (0, {REPLAY_MAX_SPEED}] and hz in (0, {REPLAY_MAX_HZ}]"
+        })
+        await websocket.close(code=1008)
+        return
+
+    try:
+        replay = await run_blocking(
+            "replay", replay_tracks, year, gp, identifier, parse_driver_list(None, None, drivers)
+        )
+    except Exception as e:
+        print(f"Error preparing replay: {e}")
+        replay = {"error": "An error occurred while processing the data"}
+    if "error" in replay:
+        await websocket.send_json(replay)
+        await websocket.close(code=1011)
+        return
+
+    tracks = replay["tracks"]
+    position = replay["start"] if start is None else max(replay["start"], replay["start"] + start)
+    await websocket.send_json({
+        "event": replay["event"],
+        "drivers": [{"index": index, "driver": t["driver"], "number": t["number"]} for index, t in enumerate(tracks)],
+        "start": position,
+        "end": replay["end"],
+        "speed": speed,
+        "hz": hz,
+        "header": "<dH: session time (s), record count",
+        "record": [[name, REPLAY_RECORD.fields[name][0].str] for name in REPLAY_RECORD.names],
+    })
+
+    loop = asyncio.get_running_loop()
+    interval = 1.0 / hz
+    started_at, origin = loop.time(), position
+    next_tick = started_at
+    stats = {"frames": 0, "merged_ticks": 0, "thinned_frames": 0}
+    try:
+        while position < replay["end"]:
+            # Sleep until the next tick; if sending the last frame overran it, skip the missed ticks
+            now = loop.time()
+            if now < next_tick:
+                await asyncio.sleep(next_tick - now)
+            else:
+                missed = int((now - next_tick) / interval)
+                stats["merged_ticks"] += missed
+                next_tick += missed * interval
+            next_tick += interval
+
+            target = min(origin + (loop.time() - started_at) * speed, replay["end"])
+            latest_only = bool(target - position > REPLAY_MAX_MERGED_TICKS * interval * speed)
+            stats["thinned_frames"] += latest_only
+            await websocket.send_bytes(replay_frame(tracks, position, target, latest_only))
+            stats["frames"] += 1
+            position = target
+
+        await websocket.send_json({"done": True, **stats})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
 @app.get("/circuits")
 async def get_circuits(
     year: int = None, 
@@ -257,48 +3564,40 @@ async def get_circuits(
     country: str = None
 ):
     try:
-        base_url = "http://ergast.com/api/f1"
-        url = base_url + "/circuits.json"
-        limit = 100
-        offset = 0
-        all_circuits = []
+        url = "/circuits.json"
 
         # Build the base URL based on parameters
         if circuit_id:
-            url = f"{base_url}/circuits/{circuit_id}.json"
+            url = f"/circuits/{circuit_id}.json"
         elif year and driver_id and constructor_id:
-            url = f"{base_url}/{year}/drivers/{driver_id}/constructors/{constructor_id}/circuits.json"
+            url = f"/{year}/drivers/{driver_id}/constructors/{constructor_id}/circuits.json"
         elif year:
-            url = f"{base_url}/{year}/circuits.json"
+            url = f"/{year}/circuits.json"
         elif driver_id and constructor_id:
-            url = f"{base_url}/drivers/{driver_id}/constructors/{constructor_id}/circuits.json"
+            url = f"/drivers/{driver_id}/constructors/{constructor_id}/circuits.json"
         elif driver_id or constructor_id:
             return JSONResponse(
                 content={"error": "Both driver_id and constructor_id are required for filtering by driver/constructor."},
                 status_code=400,
             )
 
-        while True:
-            response = requests.get(f"{url}?limit={limit}&offset={offset}")
-            if response.status_code != 200:
+        all_circuits = await ergast_mirror_read(
+            "circuits", year, ergast_mirror.circuits, year, circuit_id, driver_id, constructor_id, country
+        )
+        if all_circuits is None:
+            try:
+                all_circuits = await ergast_cache.fetch(
+                    "circuits", url, functools.partial(ergast_fetch_all, url, "CircuitTable", "Circuits")
+                )
+            except ErgastError:
                 return JSONResponse(content={"error": "Failed to fetch circuit data"}, status_code=500)
 
-            data = response.json()
-            circuits = data.get("MRData", {}).get("CircuitTable", {}).get("Circuits", [])
-            all_circuits.extend(circuits)
-
-            # Check if all pages are fetched
-            total = int(data.get("MRData", {}).get("total", 0))
-            offset += limit
-            if offset >= total:
-                break
-
-        # Apply country filter
-        if country:
-            all_circuits = [
-                circuit for circuit in all_circuits
-                if circuit.get("Location", {}).get("country", "").lower() == country.lower()
-            ]
+            # Apply country filter
+            if country:
+                all_circuits = [
+                    circuit for circuit in all_circuits
+                    if circuit.get("Location", {}).get("country", "").lower() == country.lower()
+                ]
 
         # Transform the data
         result = []
@@ -325,24 +3624,24 @@ async def get_standings(year: int, type: str):
         if type not in ["driverStandings", "constructorStandings"]:
             return JSONResponse(content={"error": "Invalid type. Must be 'driverStandings' or 'constructorStandings'."})
         
-        # Construct the API URL
-        url = f"http://ergast.com/api/f1/{year}/{type}.json?limit=25"
-        
-        # Fetch the data from the API
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for HTTP errors
-
-        data = response.json()
+        list_key = f"{type.split('Standings')[0].capitalize()}Standings"
+        mirrored = await ergast_mirror_read("standings", year, ergast_mirror.standings, year, type)
+        if mirrored is not None:
+            standings_list = [{list_key: mirrored}] if mirrored else []
+        else:
+            # Fetch the data from the API
+            path = f"/{year}/{type}.json"
+            data = await ergast_cache.fetch("standings", path, functools.partial(ergast_get, path, {"limit": 25}))
 
-        # Extract standings information
-        standings_list = data.get("MRData", {}).get("StandingsTable", {}).get("StandingsLists", [])
+            # Extract standings information
+            standings_list = data.get("MRData", {}).get("StandingsTable", {}).get("StandingsLists", [])
         
         if not standings_list:
             return JSONResponse(content={"error": f"No standings data found for year {year}"})
 
         # Prepare the results
         standings = []
-        for item in standings_list[0].get(f"{type.split('Standings')[0].capitalize()}Standings", []):
+        for item in standings_list[0].get(list_key, []):
             entry = {
                 "Position": item.get("position"),
                 "Points": item.get("points"),
@@ -382,7 +3681,7 @@ async def get_standings(year: int, type: str):
 
         return JSONResponse(content=result)
 
-    except requests.exceptions.RequestException as e:
+    except (ErgastError, httpx.HTTPError) as e:
         print(f"Error fetching standings data: {e}")
         return JSONResponse(content={"error": "Unable to fetch standings data."})
 
@@ -398,47 +3697,40 @@ async def get_constructors(
     rank: int = None
 ):
     try:
-        base_url = "http://ergast.com/api/f1"
-        url = f"{base_url}/constructors.json"
-        limit = 100
-        offset = 0
-        all_constructors = []
+        url = "/constructors.json"
 
         # Build the base URL based on parameters
         if constructor_id:
-            url = f"{base_url}/constructors/{constructor_id}.json"
+            url = f"/constructors/{constructor_id}.json"
         elif year and round:
-            url = f"{base_url}/{year}/{round}/constructors.json"
+            url = f"/{year}/{round}/constructors.json"
         elif year:
-            url = f"{base_url}/{year}/constructors.json"
+            url = f"/{year}/constructors.json"
         elif driver_id and circuit_id:
-            url = f"{base_url}/drivers/{driver_id}/circuits/{circuit_id}/constructors.json"
+            url = f"/drivers/{driver_id}/circuits/{circuit_id}/constructors.json"
         elif position:
-            url = f"{base_url}/constructorStandings/{position}/constructors.json"
+            url = f"/constructorStandings/{position}/constructors.json"
         elif circuit_id:
-            url = f"{base_url}/circuits/{circuit_id}/constructors.json"
+            url = f"/circuits/{circuit_id}/constructors.json"
         elif driver_id:
-            url = f"{base_url}/drivers/{driver_id}/constructors.json"
+            url = f"/drivers/{driver_id}/constructors.json"
         elif rank:
-            url = f"{base_url}/fastest/{rank}/constructors.json"
+            url = f"/fastest/{rank}/constructors.json"
         elif status_id:
-            url = f"{base_url}/status/{status_id}/constructors.json"
+            url = f"/status/{status_id}/constructors.json"
 
-        while True:
-            response = requests.get(f"{url}?limit={limit}&offset={offset}")
-            if response.status_code != 200:
+        all_constructors = await ergast_mirror_read(
+            "constructors", year, ergast_mirror.constructors,
+            year, round, circuit_id, driver_id, constructor_id, position, status_id, rank,
+        )
+        if all_constructors is None:
+            try:
+                all_constructors = await ergast_cache.fetch(
+                    "constructors", url, functools.partial(ergast_fetch_all, url, "ConstructorTable", "Constructors")
+                )
+            except ErgastError:
                 return JSONResponse(content={"error": "Failed to fetch constructor data"}, status_code=500)
 
-            data = response.json()
-            constructors = data.get("MRData", {}).get("ConstructorTable", {}).get("Constructors", [])
-            all_constructors.extend(constructors)
-
-            # Check if all pages are fetched
-            total = int(data.get("MRData", {}).get("total", 0))
-            offset += limit
-            if offset >= total:
-                break
-
         # Transform the data
         result = []
         for constructor in all_constructors:
@@ -466,48 +3758,41 @@ async def get_drivers(
     status_id: str = None
 ):
     try:
-        base_url = "http://ergast.com/api/f1"
-        url = f"{base_url}/drivers.json"
-        limit = 100
-        offset = 0
-        all_drivers = []
+        url = "/drivers.json"
 
         # Build the URL based on the query parameters
         if driver_id:
-            url = f"{base_url}/drivers/{driver_id}.json"
+            url = f"/drivers/{driver_id}.json"
         elif year and round:
-            url = f"{base_url}/{year}/{round}/drivers.json"
+            url = f"/{year}/{round}/drivers.json"
         elif year:
-            url = f"{base_url}/{year}/drivers.json"
+            url = f"/{year}/drivers.json"
         elif constructor_id and circuit_id:
-            url = f"{base_url}/constructors/{constructor_id}/circuits/{circuit_id}/drivers.json"
+            url = f"/constructors/{constructor_id}/circuits/{circuit_id}/drivers.json"
         elif constructor_id:
-            url = f"{base_url}/constructors/{constructor_id}/drivers.json"
+            url = f"/constructors/{constructor_id}/drivers.json"
         elif circuit_id:
-            url = f"{base_url}/circuits/{circuit_id}/drivers.json"
+            url = f"/circuits/{circuit_id}/drivers.json"
         elif position:
-            url = f"{base_url}/results/{position}/drivers.json"
+            url = f"/results/{position}/drivers.json"
         elif rank:
-            url = f"{base_url}/fastest/{rank}/drivers.json"
+            url = f"/fastest/{rank}/drivers.json"
         elif status_id:
-            url = f"{base_url}/status/{status_id}/drivers.json"
+            url = f"/status/{status_id}/drivers.json"
 
-        # Paginate through results
-        while True:
-            response = requests.get(f"{url}?limit={limit}&offset={offset}")
-            if response.status_code != 200:
+        all_drivers = await ergast_mirror_read(
+            "drivers", year, ergast_mirror.drivers,
+            year, round, circuit_id, constructor_id, position, driver_id, rank, status_id,
+        )
+        if all_drivers is None:
+            # Paginate through results
+            try:
+                all_drivers = await ergast_cache.fetch(
+                    "drivers", url, functools.partial(ergast_fetch_all, url, "DriverTable", "Drivers")
+                )
+            except ErgastError:
                 return JSONResponse(content={"error": "Failed to fetch driver data"}, status_code=500)
 
-            data = response.json()
-            drivers = data.get("MRData", {}).get("DriverTable", {}).get("Drivers", [])
-            all_drivers.extend(drivers)
-
-            # Check if all pages are fetched
-            total = int(data.get("MRData", {}).get("total", 0))
-            offset += limit
-            if offset >= total:
-                break
-
         # Transform the data
         result = []
         for driver in all_drivers:
@@ -531,127 +3816,281 @@ async def get_track_dominance_base64(
     year: int, 
     gp: str, 
     identifier: str, 
-    driver1: str, 
-    driver2: str
+    driver1: str = None, 
+    driver2: str = None,
+    drivers: str = None,
+    minisectors: int = 21
 ):
     try:
-        # Load session data
-        session = fastf1.get_session(year, gp, identifier)
-        session.load(laps=True, telemetry=True, weather=False, messages=False, livedata=None)
-
-        # Get fastest laps for both drivers
-        fastest_lap_driver1 = session.laps.pick_drivers(driver1).pick_fastest()
-        fastest_lap_driver2 = session.laps.pick_drivers(driver2).pick_fastest()
-
-        if fastest_lap_driver1.empty or fastest_lap_driver2.empty:
-            return JSONResponse(content={"error": "Fastest laps unavailable for one or both drivers"})
+        return JSONResponse(content=await track_dominance_content(
+            year, gp, identifier, driver1, driver2, drivers, minisectors
+        ))
+    except Exception as e:
+        print(f"Error: {e}")
+        return JSONResponse(content={
+            "error": "An error occurred while processing the data",
+            "driver1": driver1,
+            "driver2": driver2,
+            "gp": gp,
+            "identifier": identifier,
+            "year": year
+        })
 
-        # Get telemetry and add distance
-        telemetry_driver1 = fastest_lap_driver1.get_telemetry().add_distance()
-        telemetry_driver2 = fastest_lap_driver2.get_telemetry().add_distance()
+# Same content as /track-dominance as Server-Sent Events: a "progress" event per stage (schedule,
+# laps, telemetry, computed with the minisector table, rendered), then the content as "result"
+@app.get("/track-dominance/progress")
+async def get_track_dominance_progress(
+    year: int,
+    gp: str,
+    identifier: str,
+    driver1: str = None,
+    driver2: str = None,
+    drivers: str = None,
+    minisectors: int = 21
+):
+    return progress_route(
+        lambda progress: track_dominance_content(year, gp, identifier, driver1, driver2, drivers, minisectors, progress)
+    )
 
-        telemetry_driver1['Driver'] = driver1
-        telemetry_driver2['Driver'] = driver2
-        telemetry_drivers = pd.concat([telemetry_driver1, telemetry_driver2], ignore_index=True)
+async def track_dominance_content(year, gp, identifier, driver1, driver2, drivers, minisectors, progress=None):
+    image, metadata, _ = await track_dominance_chart(
+        year, gp, identifier, driver1, driver2, drivers, minisectors, progress=progress
+    )
+    if image is None:
+        return metadata
 
-        # Calculate minisectors
-        num_minisectors = 21
-        total_distance = telemetry_drivers['Distance'].max()
-        minisector_length = total_distance / num_minisectors
+    return {
+        "image_base64": encode_base64(image),
+        "driver1": driver1,
+        "driver2": driver2,
+        "gp": gp,
+        "identifier": identifier,
+        "year": year,
+        **metadata
+    }
 
-        telemetry_drivers['Minisector'] = telemetry_drivers['Distance'].apply(
-            lambda dist: int((dist // minisector_length))
+# Same chart as /track-dominance, returned as image/png or image/webp bytes depending on the Accept header
+@app.get("/track-dominance/image")
+async def get_track_dominance_image(
+    request: Request,
+    year: int,
+    gp: str,
+    identifier: str,
+    driver1: str = None,
+    driver2: str = None,
+    drivers: str = None,
+    minisectors: int = 21
+):
+    try:
+        return await chart_image_route(
+            request,
+            lambda image_format: track_dominance_chart(year, gp, identifier, driver1, driver2, drivers, minisectors, image_format)
         )
+    except Exception as e:
+        print(f"Error: {e}")
+        return JSONResponse(content={"error": "An error occurred while processing the data"}, status_code=500)
 
-        # Calculate average speed per minisector per driver
-        average_speed = telemetry_drivers.groupby(['Minisector', 'Driver'])['Speed'].mean().reset_index()
-        
-        # Find fastest driver per minisector
-        fastest_driver = average_speed.loc[average_speed.groupby(['Minisector'])['Speed'].idxmax()]
-        fastest_driver = fastest_driver[['Minisector', 'Driver']].rename(columns={'Driver': 'Fastest_driver'})
+def parse_driver_list(driver1, driver2, drivers):
+    # "drivers" is a comma separated list of driver codes or "all"; driver1/driver2 are kept
+    # for the existing two-driver clients
+    if drivers:
+        if drivers.strip().lower() == "all":
+            return "all"
+        return [driver.strip() for driver in drivers.split(",") if driver.strip()]
+    return [driver for driver in (driver1, driver2) if driver]
 
-        # Merge back to telemetry data
-        telemetry_drivers = telemetry_drivers.merge(fastest_driver, on=['Minisector'])
-        telemetry_drivers = telemetry_drivers.sort_values(by=['Distance'])
+async def track_dominance_chart(
+    year, gp, identifier, driver1, driver2, drivers=None, minisectors=21, image_format="png", progress=None
+):
+    selected = parse_driver_list(driver1, driver2, drivers)
+    if selected != "all" and len(selected) < 2:
+        return None, {"error": "At least two drivers are required for track dominance"}, False
+    if not 1 <= minisectors <= MAX_MINISECTORS:
+        return None, {"error": f"minisectors must be between 1 and {MAX_MINISECTORS}"}, False
+
+    async def produce():
+        payload = await run_blocking(
+            "track-dominance", track_dominance_payload, year, gp, identifier, selected, minisectors,
+            progress=worker_progress(progress)
+        )
+        if "error" in payload:
+            return None, payload, False
+        metadata = {"drivers": payload["drivers"], "minisectors": payload["minisectors"]}
+        if progress is not None:
+            progress("computed", metadata)
 
         # Generate the plot
-        base64_img = plot_track_dominance_to_base64(
-            telemetry_drivers, driver1, driver2, year, gp, identifier
+        image = await render_chart(
+            plot_track_dominance_png, payload["x"], payload["y"], payload["fastest"], payload["drivers"]
         )
-        
-        if base64_img:
-            return JSONResponse(content={
-                "image_base64": base64_img,
-                "driver1": driver1,
-                "driver2": driver2,
-                "gp": gp,
-                "identifier": identifier,
-                "year": year
-            })
-        else:
-            return JSONResponse(content={
+        if not image:
+            return None, {
                 "error": "Failed to generate track dominance plot",
                 "driver1": driver1,
                 "driver2": driver2,
                 "gp": gp,
                 "identifier": identifier,
                 "year": year
-            })
-    except Exception as e:
-        print(f"Error: {e}")
-        return JSONResponse(content={
-            "error": "An error occurred while processing the data",
-            "driver1": driver1,
-            "driver2": driver2,
-            "gp": gp,
-            "identifier": identifier,
-            "year": year
+            }, False
+        if progress is not None:
+            progress("rendered")
+
+        return image, metadata, payload["final"]
+
+    chart, inputs = track_dominance_chart_inputs(year, gp, identifier, selected, minisectors)
+    return await cached_chart(chart, inputs, produce, image_format)
+
+def track_dominance_chart_inputs(year, gp, identifier, selected, minisectors):
+    # (chart cache name, inputs) of a track dominance chart for a parsed driver selection
+    return "track-dominance", {
+        "year": year,
+        "gp": gp,
+        "identifier": identifier,
+        "drivers": selected if selected == "all" else ",".join(selected),
+        "minisectors": minisectors,
+    }
+
+def track_dominance_payload(year, gp, identifier, drivers, num_minisectors=21, progress=None):
+    # Load session data
+    session = get_loaded_session(year, gp, identifier, "telemetry", progress)
+
+    whole_field = drivers == "all"
+    if whole_field:
+        drivers = list(session.laps['Driver'].dropna().unique())
+
+    # Get the fastest lap telemetry of every driver; for the whole field, drivers without a timed lap are skipped
+    telemetries = {}
+    for driver in drivers:
+        fastest_lap = session.laps.pick_drivers(driver).pick_fastest()
+        if fastest_lap is None or fastest_lap.empty or pd.isna(fastest_lap['LapTime']):
+            if whole_field:
+                continue
+            return {"error": f"Fastest lap unavailable for driver {driver}"}
+        telemetries[driver] = lap_position_telemetry(fastest_lap)
+
+    if len(telemetries) < 2:
+        return {"error": "Fastest laps unavailable for one or both drivers"}
+
+    with stage_timer("compute"):
+        dominance = compute_minisector_dominance(telemetries, num_minisectors)
+
+    return {
+        "x": dominance["x"],
+        "y": dominance["y"],
+        "fastest": dominance["fastest"],
+        "drivers": dominance["drivers"],
+        "minisectors": [
+            {
+                "Minisector": int(index),
+                "FastestDriver": dominance["drivers"][int(winner)],
+                "Time": {driver: round(float(t), 3) for driver, t in zip(dominance["drivers"], dominance["sector_time"][:, index])},
+                "AverageSpeed": {driver: round(float(v), 1) for driver, v in zip(dominance["drivers"], dominance["avg_speed"][:, index])},
+            }
+            for index, winner in enumerate(dominance["sector_winner"])
+        ],
+        "final": session_is_final(session),
+    }
+
+def lap_position_telemetry(lap):
+    # Telemetry of one lap from the slice cache, built on first use. The frame is shared between
+    # requests, so callers must not modify it in place
+    return telemetry_slices.get(lap)
+
+def merge_lap_telemetry(lap):
+    # Car channels and distance from the car data with X/Y interpolated from the position data at
+    # the car samples; cheaper than Lap.get_telemetry(), which also computes the driver ahead
+    with stage_timer("telemetry_extraction"):
+        car = lap_samples(lap, "car")
+        pos = lap_samples(lap, "pos")
+        car_time = car["SessionTime"] / 1000.0
+        pos_time = pos["SessionTime"] / 1000.0
+        speed = car["Speed"].astype(float)
+        # Distance integrated as Telemetry.add_distance() does, the first sample counted from the lap start
+        step = np.diff(car_time, prepend=timedelta_ms(lap['LapStartTime']) / 1000.0)
+        return pd.DataFrame({
+            'Time': car_time - car_time[0] if len(car_time) else car_time,
+            'Distance': np.cumsum(speed / 3.6 * step),
+            'Speed': speed,
+            'Throttle': car["Throttle"].astype(float),
+            'Brake': car["Brake"],
+            'Gear': car["nGear"].astype(int),
+            'X': np.interp(car_time, pos_time, pos["X"].astype(float)),
+            'Y': np.interp(car_time, pos_time, pos["Y"].astype(float)),
         })
 
-    except Exception as e:
-        print(f"Error: {e}")
-        return JSONResponse(content={"error": f"An error occurred: {str(e)}"})
+# Upper bound for the minisector count accepted by /track-dominance
+MAX_MINISECTORS = 200
+
+def compute_minisector_dominance(telemetries, num_minisectors=21, resolution=1.0):
+    # telemetries maps driver -> DataFrame with Distance, Speed, X and Y for one lap. Every lap is
+    # resampled onto one shared distance grid (one point per `resolution` metres), so all drivers
+    # are compared over identical minisector boundaries and every aggregate is a single array operation.
+    drivers = list(telemetries)
+    lap_length = min(float(np.nanmax(telemetry['Distance'])) for telemetry in telemetries.values())
+    num_points = max(int(lap_length / resolution), num_minisectors * 10)
+    grid = np.linspace(0.0, lap_length, num_points)
+
+    # (drivers, points) matrix of speed along the grid
+    speed = np.vstack([
+        np.interp(grid, telemetry['Distance'], telemetry['Speed']) for telemetry in telemetries.values()
+    ])
+
+    # Grid points are sorted by distance, so each minisector is a contiguous run starting at `starts`
+    minisector = np.minimum((grid * num_minisectors / lap_length).astype(int), num_minisectors - 1)
+    starts = np.searchsorted(minisector, np.arange(num_minisectors))
+    counts = np.diff(np.append(starts, num_points))
+
+    avg_speed = np.add.reduceat(speed, starts, axis=1) / counts
+    # Time spent on each grid step at the interpolated speed (km/h -> m/s)
+    step_time = (lap_length / (num_points - 1)) / np.maximum(speed / 3.6, 1.0)
+    sector_time = np.add.reduceat(step_time, starts, axis=1)
+    sector_winner = np.argmin(sector_time, axis=0)
 
-def plot_track_dominance_to_base64(telemetry_drivers, driver1, driver2, year, gp, session_type):
+    # The track outline comes from the first driver's lap
+    reference = telemetries[drivers[0]]
+    return {
+        "drivers": drivers,
+        "x": np.interp(grid, reference['Distance'], reference['X']),
+        "y": np.interp(grid, reference['Distance'], reference['Y']),
+        "fastest": sector_winner[minisector],
+        "sector_winner": sector_winner,
+        "sector_time": sector_time,
+        "avg_speed": avg_speed,
+    }
+
+# Line colours per driver in the track dominance chart; the first two are the original F1 red and navy
+DOMINANCE_COLORS = [
+    "#e10600", "#1f1f27", "#00a19c", "#ff8700", "#005aff", "#52e252", "#ffd700", "#b6babd", "#9b0000", "#6692ff",
+    "#ff66c4", "#8c564b", "#17becf", "#bcbd22", "#9467bd", "#7f7f7f", "#c49c94", "#aec7e8", "#ffbb78", "#2ca02c",
+]
+
+def plot_track_dominance_png(x, y, fastest, drivers):
     try:
-        # Convert driver names to integers for coloring
-        telemetry_drivers.loc[telemetry_drivers['Fastest_driver'] == driver1, 'Fastest_driver_int'] = 1
-        telemetry_drivers.loc[telemetry_drivers['Fastest_driver'] == driver2, 'Fastest_driver_int'] = 2
-        
         # Prepare coordinates for plotting
-        x = np.array(telemetry_drivers['X'].values)
-        y = np.array(telemetry_drivers['Y'].values)
         points = np.array([x, y]).T.reshape(-1, 1, 2)
         segments = np.concatenate([points[:-1], points[1:]], axis=1)
         
-        fastest_driver_array = telemetry_drivers['Fastest_driver_int'].to_numpy().astype(float)
-        
-        # Define better F1-themed colors for both drivers
-        driver_colors = {
-            driver1: "#e10600",  # F1 Red
-            driver2: "#1f1f27"   # Dark navy/grey (from F1 design)
-        }
-        
-        # Create custom colormap using the driver colors
-        custom_cmap = ListedColormap([driver_colors[driver1], driver_colors[driver2]])
+        # Colour every segment by the driver who was fastest in its minisector
+        driver_colors = [DOMINANCE_COLORS[i % len(DOMINANCE_COLORS)] for i in range(len(drivers))]
+        segment_colors = [driver_colors[i] for i in fastest[:-1]]
         
         # Create the plot with appropriate figure size
-        plt.rcParams['figure.figsize'] = [6, 6]  # Smaller figure size
-        fig, ax = plt.subplots(facecolor='none')
+        render_params = CHART_RENDER_PARAMS["track-dominance"]
+        fig = Figure(figsize=render_params["figsize"], facecolor='none')  # Smaller figure size
+        ax = fig.subplots()
         ax.set_facecolor('none')  # Transparent background
         
         # Create line collection with custom coloring
-        lc_comp = LineCollection(segments, norm=plt.Normalize(1, 2), cmap=custom_cmap)
-        lc_comp.set_array(fastest_driver_array)
+        lc_comp = LineCollection(segments, colors=segment_colors)
         lc_comp.set_linewidth(2.5)  # Slightly thinner lines
         
         # Add the line collection to the plot
         ax.add_collection(lc_comp)
         
         # Set proper axis limits with adjusted padding
-        padding = (max(x.max() - x.min(), y.max() - y.min()) * 0.1)
-        ax.set_xlim(x.min() - padding, x.max() + padding)
-        ax.set_ylim(y.min() - padding, y.max() + padding)
+        padding = (max(np.nanmax(x) - np.nanmin(x), np.nanmax(y) - np.nanmin(y)) * 0.1)
+        ax.set_xlim(np.nanmin(x) - padding, np.nanmax(x) + padding)
+        ax.set_ylim(np.nanmin(y) - padding, np.nanmax(y) + padding)
         
         # Set aspect ratio and turn off axis
         ax.set_aspect('equal')
@@ -659,8 +4098,8 @@ def plot_track_dominance_to_base64(telemetry_drivers, driver1, driver2, year, gp
         
         # Add custom legend with consistent colors
         legend_elements = [
-            mlines.Line2D([0], [0], color=driver_colors[driver1], lw=2, label=driver1),
-            mlines.Line2D([0], [0], color=driver_colors[driver2], lw=2, label=driver2)
+            mlines.Line2D([0], [0], color=color, lw=2, label=driver)
+            for driver, color in zip(drivers, driver_colors)
         ]
         
         # Place legend outside the plot on the right
@@ -671,89 +4110,265 @@ def plot_track_dominance_to_base64(telemetry_drivers, driver1, driver2, year, gp
         
         # Save figure with adjusted layout and DPI
         img_stream = io.BytesIO()
-        plt.savefig(img_stream, 
-                   format='png', 
-                   dpi=150,  # Lower DPI for smaller file size
+        save_figure(fig, img_stream, 
+                   format=render_params["format"], 
+                   dpi=render_params["dpi"],  # Lower DPI for smaller file size
                    bbox_inches='tight',
                    facecolor='none',
                    edgecolor='none',
                    transparent=True,  # Set to true for transparent background
                    pad_inches=0.2)
-        plt.close()
         
-        img_stream.seek(0)
-        base64_img = base64.b64encode(img_stream.getvalue()).decode('utf-8')
-        return base64_img
+        return img_stream.getvalue()
         
     except Exception as e:
         print(f"Error while plotting track dominance: {e}")
         return None
      
+# view=laps (the default, what the web client shows) is the lap time chart alone, which needs no
+# telemetry; view=full is the five-panel comparison (lap times, gap per lap, gap around the closest
+# lap and the speed/throttle traces of that lap) and loads the telemetry
+DRIVER_COMPARISON_VIEWS = ("full", "laps")
+
 @app.get("/driver-comparison")
-async def get_driver_comparison(year: int, gp: str, identifier: str, driver1: str, driver2: str, stint: int = 1):
+async def get_driver_comparison(
+    year: int, gp: str, identifier: str, driver1: str, driver2: str, stint: int = 1, view: str = "laps"
+):
     try:
-        print(f"Starting driver comparison request for {driver1} vs {driver2} at {gp} {year}")
-        
-        # Load session with telemetry set to True
-        session = fastf1.get_session(year, gp, identifier)
-        # Need telemetry=True to access car data
-        session.load(laps=True, telemetry=True, weather=False, messages=False)
-        print("Session data loaded successfully")
-        
-        # Get laps data for both drivers
-        laps_driver1 = session.laps.pick_drivers(driver1)  # Use pick_drivers instead of deprecated pick_driver
-        laps_driver2 = session.laps.pick_drivers(driver2)
-        
-        # Check if we found any lap data before proceeding
-        if laps_driver1.empty or laps_driver2.empty:
-            print(f"No lap data found for drivers: {driver1}={len(laps_driver1)}, {driver2}={len(laps_driver2)}")
-            return JSONResponse(content={"error": f"Not enough lap data for one or both drivers"})
-        
-        print(f"Found {len(laps_driver1)} laps for {driver1} and {len(laps_driver2)} laps for {driver2}")
-        
-        # Filter by stint if provided
-        if stint is not None:
-            laps_driver1 = laps_driver1.loc[laps_driver1['Stint'] == stint]
-            laps_driver2 = laps_driver2.loc[laps_driver2['Stint'] == stint]
-            print(f"After stint filtering: {len(laps_driver1)} laps for {driver1} and {len(laps_driver2)} laps for {driver2}")
-        
-        # Check if we have enough data after stint filtering
-        if laps_driver1.empty or laps_driver2.empty:
-            return JSONResponse(content={"error": f"Not enough lap data for one or both drivers in stint {stint}"})
-        
-        # Create race lap number
-        laps_driver1 = laps_driver1.copy()
-        laps_driver2 = laps_driver2.copy()
-        laps_driver1.loc[:, 'RaceLapNumber'] = laps_driver1['LapNumber'] - 1
-        laps_driver2.loc[:, 'RaceLapNumber'] = laps_driver2['LapNumber'] - 1
-        
-        # Skip telemetry and just create a simplified lap time comparison
-        base64_img = lap_time_comparison_plot(
-            laps_driver1, laps_driver2,
-            driver1, driver2,
-            session.event['EventName']
-        )
-        
-        if base64_img:
-            print("Successfully generated image")
-            return JSONResponse(content={
-                "image_base64": base64_img,
-                "driver1": driver1,
-                "driver2": driver2,
-                "gp": gp,
-                "identifier": identifier,
-                "year": year,
-                "stint": stint
-            })
-        else:
-            print("Failed to generate image")
-            return JSONResponse(content={"error": "Failed to generate comparison plot"})
+        return JSONResponse(content=await driver_comparison_content(year, gp, identifier, driver1, driver2, stint, view))
                 
     except Exception as e:
         print(f"Error in get_driver_comparison: {e}")
         import traceback
         traceback.print_exc()
         return JSONResponse(content={"error": f"An error occurred: {str(e)}"})
+
+# Same content as /driver-comparison as Server-Sent Events: a "progress" event per stage (schedule,
+# laps, telemetry for the full view, computed with the closest lap, rendered), then the content as "result"
+@app.get("/driver-comparison/progress")
+async def get_driver_comparison_progress(
+    year: int, gp: str, identifier: str, driver1: str, driver2: str, stint: int = 1, view: str = "laps"
+):
+    return progress_route(
+        lambda progress: driver_comparison_content(year, gp, identifier, driver1, driver2, stint, view, progress)
+    )
+
+async def driver_comparison_content(year, gp, identifier, driver1, driver2, stint, view, progress=None):
+    image, metadata, _ = await driver_comparison_chart(
+        year, gp, identifier, driver1, driver2, stint, view, progress=progress
+    )
+    if image is None:
+        return metadata
+
+    return {
+        "image_base64": encode_base64(image),
+        "driver1": driver1,
+        "driver2": driver2,
+        "gp": gp,
+        "identifier": identifier,
+        "year": year,
+        "stint": stint,
+        "view": view,
+        **metadata
+    }
+
+# Same chart as /driver-comparison, returned as image/png or image/webp bytes depending on the Accept header
+@app.get("/driver-comparison/image")
+async def get_driver_comparison_image(
+    request: Request, year: int, gp: str, identifier: str, driver1: str, driver2: str, stint: int = 1, view: str = "laps"
+):
+    try:
+        return await chart_image_route(
+            request,
+            lambda image_format: driver_comparison_chart(year, gp, identifier, driver1, driver2, stint, view, image_format)
+        )
+    except Exception as e:
+        print(f"Error in get_driver_comparison_image: {e}")
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(content={"error": "An error occurred while processing the data"}, status_code=500)
+
+async def driver_comparison_chart(
+    year, gp, identifier, driver1, driver2, stint, view="laps", image_format="png", progress=None
+):
+    if view not in DRIVER_COMPARISON_VIEWS:
+        return None, {"error": f"view must be one of: {', '.join(DRIVER_COMPARISON_VIEWS)}"}, False
+
+    async def produce():
+        payload = await run_blocking(
+            "driver-comparison", driver_comparison_payload, year, gp, identifier, driver1, driver2, stint, view,
+            progress=worker_progress(progress)
+        )
+        if "error" in payload:
+            return None, payload, False
+        metadata = {"closest_lap": payload["closest_lap"]} if view == "full" else {}
+        if progress is not None:
+            progress("computed", metadata)
+
+        if view == "full":
+            image = await render_chart(
+                plot_driver_comparison_png,
+                payload["laps_driver1"], payload["laps_driver2"],
+                payload["summarized_distance"],
+                payload["lap_telemetry_driver1"], payload["lap_telemetry_driver2"],
+                payload["surrounding_laps"],
+                driver1, driver2,
+                payload["closest_lap"],
+                payload["event_name"]
+            )
+        else:
+            image = await render_chart(
+                lap_time_comparison_plot,
+                payload["laps_driver1"], payload["laps_driver2"],
+                driver1, driver2,
+                payload["event_name"]
+            )
+        if not image:
+            print("Failed to generate image")
+            return None, {"error": "Failed to generate comparison plot"}, False
+
+        if progress is not None:
+            progress("rendered")
+        return image, metadata, payload["final"]
+
+    chart, inputs = driver_comparison_chart_inputs(year, gp, identifier, driver1, driver2, stint, view)
+    return await cached_chart(chart, inputs, produce, image_format)
+
+def driver_comparison_chart_inputs(year, gp, identifier, driver1, driver2, stint, view):
+    # (chart cache name, inputs) of a driver comparison chart; each view is its own chart
+    chart = "driver-comparison-full" if view == "full" else "driver-comparison"
+    return chart, {"year": year, "gp": gp, "identifier": identifier, "driver1": driver1, "driver2": driver2, "stint": stint}
+
+def driver_comparison_payload(year, gp, identifier, driver1, driver2, stint, view="laps", progress=None):
+    # The lap time chart needs no telemetry; the full comparison does
+    session = get_loaded_session(year, gp, identifier, "telemetry" if view == "full" else "laps", progress)
+
+    # Get laps data for both drivers
+    laps_driver1 = session.laps.pick_drivers(driver1)  # Use pick_drivers instead of deprecated pick_driver
+    laps_driver2 = session.laps.pick_drivers(driver2)
+
+    # Check if we found any lap data before proceeding
+    if laps_driver1.empty or laps_driver2.empty:
+        print(f"No lap data found for drivers: {driver1}={len(laps_driver1)}, {driver2}={len(laps_driver2)}")
+        return {"error": f"Not enough lap data for one or both drivers"}
+
+    # Filter by stint if provided
+    if stint is not None:
+        laps_driver1 = laps_driver1.loc[laps_driver1['Stint'] == stint]
+        laps_driver2 = laps_driver2.loc[laps_driver2['Stint'] == stint]
+
+    # Check if we have enough data after stint filtering
+    if laps_driver1.empty or laps_driver2.empty:
+        return {"error": f"Not enough lap data for one or both drivers in stint {stint}"}
+
+    # Create race lap number
+    laps_driver1 = laps_driver1.copy()
+    laps_driver2 = laps_driver2.copy()
+    laps_driver1.loc[:, 'RaceLapNumber'] = laps_driver1['LapNumber'] - 1
+    laps_driver2.loc[:, 'RaceLapNumber'] = laps_driver2['LapNumber'] - 1
+
+    # Only the plotted columns go to the renderer, as plain DataFrames without the session attached
+    plot_columns = ['RaceLapNumber', 'LapTime']
+    payload = {
+        "laps_driver1": pd.DataFrame(laps_driver1[plot_columns]),
+        "laps_driver2": pd.DataFrame(laps_driver2[plot_columns]),
+        "event_name": session.event['EventName'],
+        "final": session_is_final(session),
+    }
+    if view != "full":
+        return payload
+
+    # driver2's distance to driver1 over the stint, then the traces of both drivers on the closest lap
+    with stage_timer("compute"):
+        gap = compute_gap_to_driver_ahead(session, laps_driver1, laps_driver2)
+    if gap is None:
+        return {"error": f"Not enough telemetry for one or both drivers in stint {stint}"}
+
+    trace_columns = ['Distance', 'Speed', 'Throttle']
+
+    def closest_lap_trace(laps):
+        lap = laps.loc[laps['RaceLapNumber'] == gap["closest_lap"]]
+        if lap.empty:
+            return pd.DataFrame(columns=trace_columns)
+        return pd.DataFrame(lap_position_telemetry(lap.iloc[0])[trace_columns])
+
+    payload.update(
+        summarized_distance=gap["summary"],
+        surrounding_laps=gap["surrounding_laps"],
+        closest_lap=gap["closest_lap"],
+        lap_telemetry_driver1=closest_lap_trace(laps_driver1),
+        lap_telemetry_driver2=closest_lap_trace(laps_driver2),
+    )
+    return payload
+
+def stint_progress(session, laps):
+    # Progress of one driver over the given laps in a single pass over their car data: every sample
+    # is assigned to its lap by session time, distance is integrated from speed and restarts on each
+    # lap, and is then scaled by the lap's total, so progress = (LapNumber - 1) + fraction of the lap.
+    # Returns (session time, lap number, progress) per sample and the integrated length of each lap
+    laps = laps.dropna(subset=['LapStartTime', 'Time']).sort_values('LapStartTime')
+    car = session_telemetry(session, "car").get(str(laps['DriverNumber'].iloc[0])) if not laps.empty else None
+    if car is None or not len(car["SessionTime"]):
+        return None
+
+    starts = laps['LapStartTime'].dt.total_seconds().to_numpy()
+    ends = laps['Time'].dt.total_seconds().to_numpy()
+    time_s = car["SessionTime"] / 1000.0
+    speed = car["Speed"].astype(float) / 3.6
+
+    lap_index = np.searchsorted(starts, time_s, side='right') - 1
+    # Samples before the stint, after it, or in the gap left by a lap missing from it
+    keep = (lap_index >= 0) & (time_s < ends[np.clip(lap_index, 0, None)])
+    time_s, speed, lap_index = time_s[keep], speed[keep], lap_index[keep]
+    if len(time_s) < 2:
+        return None
+
+    distance = np.cumsum(speed * np.diff(time_s, prepend=time_s[0]))
+    run_starts = np.r_[0, np.flatnonzero(np.diff(lap_index)) + 1]
+    run_lengths = np.diff(np.r_[run_starts, len(time_s)])
+    within = distance - np.repeat(distance[run_starts], run_lengths)
+    lap_lengths = np.maximum.reduceat(within, run_starts)
+    fraction = within / np.repeat(np.where(lap_lengths > 0, lap_lengths, 1.0), run_lengths)
+
+    lap_numbers = laps['LapNumber'].to_numpy(dtype=float)[lap_index]
+    return time_s, lap_numbers, lap_numbers - 1 + fraction, lap_lengths
+
+def compute_gap_to_driver_ahead(session, laps_ahead, laps_behind, laps_around=(-1, 2)):
+    # Distance in metres from the driver of laps_behind to the driver of laps_ahead at every car
+    # sample of the former: the ahead driver's progress is interpolated onto the chaser's sample
+    # times (one shared session-time base), and the difference in progress is scaled by the lap
+    # length. Summarised per lap (mean/median), with the lap where the median gap is smallest
+    # ("closest_lap") and the per-sample gaps of the laps around it
+    ahead = stint_progress(session, laps_ahead)
+    behind = stint_progress(session, laps_behind)
+    if ahead is None or behind is None:
+        return None
+
+    time_ahead, _, progress_ahead, lengths_ahead = ahead
+    time_behind, laps, progress_behind, lengths_behind = behind
+    lap_length = float(np.median(np.concatenate([lengths_ahead, lengths_behind])))
+
+    overlap = (time_behind >= time_ahead[0]) & (time_behind <= time_ahead[-1])
+    if not overlap.any():
+        return None
+    gap = (np.interp(time_behind[overlap], time_ahead, progress_ahead) - progress_behind[overlap]) * lap_length
+    samples = pd.DataFrame({
+        'Lap': (laps[overlap] - 1).astype(int),  # RaceLapNumber, as on the lap time panel
+        'Distance': (progress_behind[overlap] - laps[overlap] + 1) * lap_length,
+        'DistanceToDriverAhead': gap,
+    })
+
+    by_lap = samples.groupby('Lap')
+    summary = by_lap['DistanceToDriverAhead'].agg(Mean='mean', Median='median').reset_index()
+    closest_lap = int(summary.loc[summary['Median'].abs().idxmin(), 'Lap'])
+
+    laps_present = set(summary['Lap'])
+    surrounding_laps = [
+        {"lap": lap, "distance_data": by_lap.get_group(lap)[['Distance', 'DistanceToDriverAhead']].reset_index(drop=True)}
+        for lap in range(closest_lap + laps_around[0], closest_lap + laps_around[1] + 1)
+        if lap in laps_present
+    ]
+    return {"summary": summary, "closest_lap": closest_lap, "surrounding_laps": surrounding_laps}
     
 def lap_time_comparison_plot(
     laps_driver1, laps_driver2, 
@@ -761,11 +4376,10 @@ def lap_time_comparison_plot(
     event_name
 ):
     try:
-        # Set figure size 
-        plt.rcParams['figure.figsize'] = [10, 6]
-        
         # Create a single panel plot - simpler and faster
-        fig, ax = plt.subplots()
+        render_params = CHART_RENDER_PARAMS["driver-comparison"]
+        fig = Figure(figsize=render_params["figsize"])
+        ax = fig.subplots()
         fig.suptitle(f"{driver1} vs {driver2} Lap Time Comparison - {event_name}")
         
         # Convert timedelta to seconds if needed
@@ -819,14 +4433,11 @@ def lap_time_comparison_plot(
         except Exception as e:
             print(f"Error highlighting best laps: {e}")
             
-        # Generate the base64 image
+        # Generate the PNG image
         img_stream = io.BytesIO()
-        plt.savefig(img_stream, format='png', dpi=100, bbox_inches='tight')  # Use even lower DPI
-        plt.close()
+        save_figure(fig, img_stream, format=render_params["format"], dpi=render_params["dpi"], bbox_inches='tight')  # Use even lower DPI
         
-        img_stream.seek(0)
-        base64_img = base64.b64encode(img_stream.getvalue()).decode('utf-8')
-        return base64_img
+        return img_stream.getvalue()
         
     except Exception as e:
         print(f"Error while plotting lap time comparison: {e}")
@@ -834,7 +4445,7 @@ def lap_time_comparison_plot(
         traceback.print_exc()
         return None
         
-def plot_driver_comparison_to_base64(
+def plot_driver_comparison_png(
     laps_driver1, laps_driver2, 
     summarized_distance, 
     lap_telemetry_driver1, lap_telemetry_driver2,
@@ -844,11 +4455,10 @@ def plot_driver_comparison_to_base64(
     event_name
 ):
     try:
-        # Set figure size for the multi-panel plot
-        plt.rcParams['figure.figsize'] = [15, 15]
-        
         # Create subplots - 5 panels as in the example
-        fig, ax = plt.subplots(5, sharex=False)
+        render_params = CHART_RENDER_PARAMS["driver-comparison-full"]
+        fig = Figure(figsize=render_params["figsize"])
+        ax = fig.subplots(5, sharex=False)
         fig.suptitle(f"{driver1} vs {driver2} comparison - {event_name}")
         
         # Check for LapTime data type and convert if needed
@@ -878,7 +4488,7 @@ def plot_driver_comparison_to_base64(
                     x_center = closest_lap
                     y_center = np.mean([d1_laptime.iloc[0], d2_laptime.iloc[0]])
                     radius = 0.5
-                    circle = plt.Circle((x_center, y_center), radius, fill=False, edgecolor='white', linewidth=2)
+                    circle = Circle((x_center, y_center), radius, fill=False, edgecolor='white', linewidth=2)
                     ax[0].add_patch(circle)
         except Exception as e:
             print(f"Error adding lap time highlight: {e}")
@@ -900,7 +4510,7 @@ def plot_driver_comparison_to_base64(
                     x_center = closest_lap
                     y_center = closest_median.iloc[0]
                     radius = 0.5
-                    circle = plt.Circle((x_center, y_center), radius, fill=False, edgecolor='white', linewidth=2)
+                    circle = Circle((x_center, y_center), radius, fill=False, edgecolor='white', linewidth=2)
                     ax[1].add_patch(circle)
         except Exception as e:
             print(f"Error adding distance highlight: {e}")
@@ -973,7 +4583,7 @@ def plot_driver_comparison_to_base64(
                     d2_throttle = lap_telemetry_driver2.loc[d2_idx, 'Throttle']
                     
                     if abs(d1_throttle - d2_throttle) > 20:  # If throttle difference is significant
-                        circle = plt.Circle((dist, min(d1_throttle, d2_throttle) + abs(d1_throttle - d2_throttle)/2), 
+                        circle = Circle((dist, min(d1_throttle, d2_throttle) + abs(d1_throttle - d2_throttle)/2), 
                                           max_dist/20, fill=False, edgecolor='white', linewidth=2)
                         ax[4].add_patch(circle)
             except Exception as e:
@@ -983,14 +4593,11 @@ def plot_driver_comparison_to_base64(
         for a in ax.flat:
             a.label_outer()
         
-        # Generate the base64 image
+        # Generate the PNG image
         img_stream = io.BytesIO()
-        plt.savefig(img_stream, format='png', dpi=300, bbox_inches='tight')
-        plt.close()
+        save_figure(fig, img_stream, format=render_params["format"], dpi=render_params["dpi"], bbox_inches='tight')
         
-        img_stream.seek(0)
-        base64_img = base64.b64encode(img_stream.getvalue()).decode('utf-8')
-        return base64_img
+        return img_stream.getvalue()
         
     except Exception as e:
         print(f"Error while plotting driver comparison: {e}")
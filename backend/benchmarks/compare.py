@@ -0,0 +1,58 @@
+# Compares two result files written by run.py, benchmark by benchmark and phase by phase, and exits
+# with status 1 when any of them got slower than the threshold allows.
+#
+#   python backend/benchmarks/compare.py before.json after.json --threshold 0.15
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report["meta"], {(result["benchmark"], result["phase"]): result for result in report["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--metric", default="median", choices=("min", "median", "mean", "p95", "max"))
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change reported as a regression")
+    options = parser.parse_args()
+
+    base_meta, base = load(options.base)
+    head_meta, head = load(options.head)
+    for label, meta in (("base", base_meta), ("head", head_meta)):
+        print(f"{label}: {meta.get('commit')}{' (dirty)' if meta.get('dirty') else ''}  fixture {meta.get('fixture')}")
+    print()
+
+    regressions = 0
+    for key in sorted(base.keys() | head.keys()):
+        benchmark, phase = key
+        if key not in base or key not in head:
+            print(f"{benchmark:<45} {phase:<13} only in {'head' if key in head else 'base'}")
+            continue
+        before, after = base[key]["stats"][options.metric], head[key]["stats"][options.metric]
+        change = (after - before) / before if before else 0.0
+        if change > options.threshold:
+            verdict = "REGRESSION"
+            regressions += 1
+        elif change < -options.threshold:
+            verdict = "improved"
+        else:
+            verdict = ""
+        if head[key]["errors"] > base[key]["errors"]:
+            verdict = (verdict + " errors").strip()
+            regressions += 1
+        print(
+            f"{benchmark:<45} {phase:<13} {before * 1000:9.1f} ms -> {after * 1000:9.1f} ms"
+            f"  {change:+7.1%}  {verdict}"
+        )
+
+    print(f"\n{regressions} regression(s) over {options.threshold:.0%} in {options.metric}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
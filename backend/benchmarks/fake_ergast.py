@@ -0,0 +1,154 @@
+# Stand-in for the Ergast API used by the benchmarks: a local HTTP server answering the paths the
+# backend requests with synthetic lists of the real sizes, paged with limit/offset and wrapped in
+# the MRData envelope. Filters in the path (/2023/drivers.json, /constructors/x/drivers.json) are
+# not applied; every drivers path returns the full list, which exercises the paging the most.
+# A fixed delay per request stands in for the network round trip.
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Sizes of the all-time lists on Ergast, so the list routes fetch as many pages as in production
+DRIVER_COUNT = 860
+CONSTRUCTOR_COUNT = 212
+CIRCUIT_COUNT = 77
+STANDINGS_COUNT = 20
+
+
+def drivers():
+    return [
+        {
+            "driverId": f"driver_{index}",
+            "permanentNumber": str(index % 99 + 1),
+            "code": f"D{index:02d}"[-3:],
+            "url": f"http://en.wikipedia.org/wiki/Driver_{index}",
+            "givenName": f"Given{index}",
+            "familyName": f"Family{index}",
+            "dateOfBirth": f"{1950 + index % 50}-01-01",
+            "nationality": "Synthetic",
+        }
+        for index in range(DRIVER_COUNT)
+    ]
+
+
+def constructors():
+    return [
+        {
+            "constructorId": f"constructor_{index}",
+            "url": f"http://en.wikipedia.org/wiki/Constructor_{index}",
+            "name": f"Constructor {index}",
+            "nationality": "Synthetic",
+        }
+        for index in range(CONSTRUCTOR_COUNT)
+    ]
+
+
+def circuits():
+    return [
+        {
+            "circuitId": f"circuit_{index}",
+            "url": f"http://en.wikipedia.org/wiki/Circuit_{index}",
+            "circuitName": f"Circuit {index}",
+            "Location": {"lat": str(index / 10), "long": str(-index / 10), "locality": f"Town {index}", "country": "Synthetic"},
+        }
+        for index in range(CIRCUIT_COUNT)
+    ]
+
+
+def standings(kind):
+    driver_list, constructor_list = drivers(), constructors()
+    entries = []
+    for index in range(STANDINGS_COUNT):
+        entry = {"position": str(index + 1), "positionText": str(index + 1), "points": str(400 - 18 * index), "wins": "0"}
+        if kind == "DriverStandings":
+            entry.update(Driver=driver_list[index], Constructors=[constructor_list[index // 2]])
+        else:
+            entry.update(Constructor=constructor_list[index])
+        entries.append(entry)
+    return entries
+
+
+# Last path segment -> (table key, list key, items)
+TABLES = {
+    "drivers": ("DriverTable", "Drivers", drivers),
+    "constructors": ("ConstructorTable", "Constructors", constructors),
+    "circuits": ("CircuitTable", "Circuits", circuits),
+}
+
+
+class FakeErgast:
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.requests = 0
+        self._lists = {name: (table, key, items()) for name, (table, key, items) in TABLES.items()}
+        self._standings = {kind: standings(kind) for kind in ("DriverStandings", "ConstructorStandings")}
+        self._server = None
+
+    def start(self):
+        # Serve on a free local port in a background thread; returns the base URL to give the backend
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                body = fake.respond(url.path, int(query.get("limit", [30])[0]), int(query.get("offset", [0])[0]))
+                status = 200 if body is not None else 404
+                data = json.dumps(body if body is not None else {"error": "not found"}).encode()
+                time.sleep(fake.latency)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}/api/f1"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def respond(self, path, limit, offset):
+        self.requests += 1
+        segments = [segment for segment in path.removesuffix(".json").split("/") if segment]
+        if not segments:
+            return None
+        last = segments[-1]
+
+        if last in ("driverStandings", "constructorStandings"):
+            kind = last[0].upper() + last[1:-len("Standings")] + "Standings"
+            season = segments[-2] if len(segments) >= 2 and segments[-2].isdigit() else "2023"
+            entries = self._standings[kind]
+            lists = [{"season": season, "round": "22", kind: entries[offset:offset + limit]}]
+            return self.envelope(len(entries), limit, offset, "StandingsTable", "StandingsLists", lists)
+
+        # /circuits/monza.json and friends: one item of the list
+        if len(segments) >= 2 and segments[-2] in TABLES:
+            table, key, items = self._lists[segments[-2]]
+            items = items[:1]
+            return self.envelope(len(items), limit, offset, table, key, items)
+
+        if last not in self._lists:
+            return None
+        table, key, items = self._lists[last]
+        return self.envelope(len(items), limit, offset, table, key, items[offset:offset + limit])
+
+    def envelope(self, total, limit, offset, table, key, items):
+        return {"MRData": {
+            "xmlns": "http://ergast.com/mrd/1.5",
+            "series": "f1",
+            "limit": str(limit),
+            "offset": str(offset),
+            "total": str(total),
+            table: {key: items},
+        }}
@@ -0,0 +1,271 @@
+# Synthetic FastF1 sessions for the benchmarks. install() replaces fastf1.get_session and
+# fastf1.get_event_schedule so the backend runs against generated data shaped like FastF1's:
+# a schedule of conventional weekends, and sessions whose load() builds the results, laps and
+# car/position telemetry with the same column layout, dtypes and sample rates as the real thing.
+# The data is a function of (year, round, session) only, so every run sees the same numbers.
+import zlib
+from dataclasses import dataclass
+
+import fastf1
+import numpy as np
+import pandas as pd
+from fastf1.core import Laps, Session, SessionResults, Telemetry
+from fastf1.events import EventSchedule
+
+DRIVERS = [
+    ("1", "VER", "Max Verstappen", "Red Bull Racing"),
+    ("11", "PER", "Sergio Perez", "Red Bull Racing"),
+    ("44", "HAM", "Lewis Hamilton", "Mercedes"),
+    ("63", "RUS", "George Russell", "Mercedes"),
+    ("16", "LEC", "Charles Leclerc", "Ferrari"),
+    ("55", "SAI", "Carlos Sainz", "Ferrari"),
+    ("4", "NOR", "Lando Norris", "McLaren"),
+    ("81", "PIA", "Oscar Piastri", "McLaren"),
+    ("14", "ALO", "Fernando Alonso", "Aston Martin"),
+    ("18", "STR", "Lance Stroll", "Aston Martin"),
+    ("10", "GAS", "Pierre Gasly", "Alpine"),
+    ("31", "OCO", "Esteban Ocon", "Alpine"),
+    ("23", "ALB", "Alexander Albon", "Williams"),
+    ("2", "SAR", "Logan Sargeant", "Williams"),
+    ("22", "TSU", "Yuki Tsunoda", "AlphaTauri"),
+    ("3", "RIC", "Daniel Ricciardo", "AlphaTauri"),
+    ("77", "BOT", "Valtteri Bottas", "Alfa Romeo"),
+    ("24", "ZHO", "Zhou Guanyu", "Alfa Romeo"),
+    ("20", "MAG", "Kevin Magnussen", "Haas F1 Team"),
+    ("27", "HUL", "Nico Hulkenberg", "Haas F1 Team"),
+]
+
+EVENTS = [
+    ("Bahrain", "Sakhir", "Bahrain"),
+    ("Saudi Arabian", "Jeddah", "Saudi Arabia"),
+    ("Australian", "Melbourne", "Australia"),
+    ("Azerbaijan", "Baku", "Azerbaijan"),
+    ("Miami", "Miami", "United States"),
+    ("Monaco", "Monaco", "Monaco"),
+    ("Spanish", "Barcelona", "Spain"),
+    ("Canadian", "Montréal", "Canada"),
+    ("Austrian", "Spielberg", "Austria"),
+    ("British", "Silverstone", "Great Britain"),
+    ("Hungarian", "Budapest", "Hungary"),
+    ("Belgian", "Spa-Francorchamps", "Belgium"),
+    ("Dutch", "Zandvoort", "Netherlands"),
+    ("Italian", "Monza", "Italy"),
+    ("Singapore", "Marina Bay", "Singapore"),
+    ("Japanese", "Suzuka", "Japan"),
+]
+
+SESSION_NAMES = {
+    "fp1": "Practice 1", "practice 1": "Practice 1", "1": "Practice 1",
+    "fp2": "Practice 2", "practice 2": "Practice 2", "2": "Practice 2",
+    "fp3": "Practice 3", "practice 3": "Practice 3", "3": "Practice 3",
+    "q": "Qualifying", "qualifying": "Qualifying", "4": "Qualifying",
+    "r": "Race", "race": "Race", "5": "Race",
+}
+
+POINTS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
+
+
+@dataclass(frozen=True)
+class FixtureSize:
+    # Drivers in every session, laps in a race (other sessions run a third of that) and the
+    # car/position sample rate; FastF1 data comes at about 4 Hz for both
+    drivers: int = 20
+    race_laps: int = 57
+    hz: float = 4.0
+
+
+size = FixtureSize()
+
+
+def install(fixture_size=None):
+    global size
+    if fixture_size is not None:
+        size = fixture_size
+    fastf1.get_session = get_session
+    fastf1.get_event_schedule = get_event_schedule
+
+
+def get_event_schedule(year, include_testing=True, **kwargs):
+    rows = []
+    for index, (name, location, country) in enumerate(EVENTS):
+        race = pd.Timestamp(f"{year}-03-05 15:00") + pd.Timedelta(weeks=2 * index)
+        row = {
+            "RoundNumber": index + 1,
+            "Country": country,
+            "Location": location,
+            "OfficialEventName": f"FORMULA 1 {name.upper()} GRAND PRIX {year}",
+            "EventDate": race.normalize(),
+            "EventName": f"{name} Grand Prix",
+            "EventFormat": "conventional",
+            "F1ApiSupport": True,
+        }
+        starts = [race - pd.Timedelta(days=2, hours=3), race - pd.Timedelta(days=2), race - pd.Timedelta(days=1, hours=3),
+                  race - pd.Timedelta(days=1), race]
+        for number, (session_name, start) in enumerate(zip(
+            ("Practice 1", "Practice 2", "Practice 3", "Qualifying", "Race"), starts
+        ), start=1):
+            row[f"Session{number}"] = session_name
+            row[f"Session{number}Date"] = start.tz_localize("UTC")
+            row[f"Session{number}DateUtc"] = start
+        rows.append(row)
+    return EventSchedule(pd.DataFrame(rows), year=year, force_default_cols=True)
+
+
+def get_session(year, gp, identifier):
+    schedule = get_event_schedule(year)
+    if isinstance(gp, int) or str(gp).strip().isdigit():
+        matches = schedule.loc[schedule["RoundNumber"] == int(gp)]
+    else:
+        needle = str(gp).strip().lower()
+        matches = schedule.loc[
+            schedule["EventName"].str.lower().str.contains(needle, regex=False)
+            | schedule["Location"].str.lower().str.contains(needle, regex=False)
+            | schedule["Country"].str.lower().str.contains(needle, regex=False)
+        ]
+    if matches.empty:
+        raise ValueError(f"No synthetic event matches {gp!r}")
+
+    session_name = SESSION_NAMES.get(str(identifier).strip().lower())
+    if session_name is None:
+        raise ValueError(f"Unknown session {identifier!r}")
+
+    event = schedule.get_event_by_round(int(matches.iloc[0]["RoundNumber"]))
+    return SyntheticSession(event, session_name)
+
+
+class SyntheticSession(Session):
+    # Session.load() fetches and parses the live timing data; here it generates it. The work of
+    # building the frames stands in for the parsing, so a cold load still costs something
+    def __init__(self, event, session_name):
+        super().__init__(event, session_name, f1_api_support=True)
+        self._t0_date = self.date
+        self._session_start_time = pd.Timedelta(0)
+        self._seed = zlib.crc32(f"{event.year}/{event['RoundNumber']}/{session_name}".encode())
+        self._timing = None
+
+    def load(self, *, laps=True, telemetry=True, weather=True, messages=True, livedata=None):
+        self._results = self._build_results()
+        if laps or telemetry:
+            self._laps = self._build_laps()
+        if telemetry:
+            self._load_telemetry()
+
+    def _load_telemetry(self, livedata=None):
+        self._car_data, self._pos_data = self._build_telemetry()
+
+    def _lap_timing(self):
+        # Per driver: lap times and lap start times in seconds, and the stint of every lap
+        if self._timing is None:
+            rng = np.random.default_rng(self._seed)
+            race = self.name == "Race"
+            laps = size.race_laps if race else max(size.race_laps // 3, 3)
+            stints = np.minimum(np.arange(laps) * 3 // laps + 1, 3)
+            timing = []
+            for index in range(size.drivers):
+                lap_times = 91.0 + 0.12 * index + rng.normal(0, 0.35, laps)
+                lap_times[0] += 4.0
+                # Slower in-laps before each stop
+                lap_times[np.flatnonzero(np.diff(stints))] += 19.0
+                starts = np.concatenate([[0.0], np.cumsum(lap_times)[:-1]])
+                timing.append((lap_times, starts, stints))
+            self._timing = timing
+        return self._timing
+
+    def _drivers(self):
+        # (number, abbreviation, name, team); past the 20 real entries numbers and codes are made up
+        return [
+            DRIVERS[index] if index < len(DRIVERS) else (str(100 + index), f"D{index:02d}", f"Driver {index}", "Synthetic")
+            for index in range(size.drivers)
+        ]
+
+    def _build_results(self):
+        timing = self._lap_timing()
+        totals = np.array([lap_times.sum() for lap_times, _, _ in timing])
+        order = np.argsort(totals)
+        rows = []
+        for position, index in enumerate(order, start=1):
+            number, abbreviation, name, team = self._drivers()[index]
+            rows.append({
+                "DriverNumber": number,
+                "BroadcastName": f"{name.split()[0][0]} {name.split()[-1].upper()}",
+                "Abbreviation": abbreviation,
+                "DriverId": name.split()[-1].lower(),
+                "TeamName": team,
+                "FirstName": name.split()[0],
+                "LastName": name.split()[-1],
+                "FullName": name,
+                "HeadshotUrl": "",
+                "Position": float(position),
+                "ClassifiedPosition": str(position),
+                "GridPosition": float(index + 1),
+                "Time": pd.Timedelta(seconds=float(totals[index] - (0 if position == 1 else totals[order[0]]))),
+                "Status": "Finished",
+                "Points": float(POINTS[position - 1]) if self.name == "Race" and position <= len(POINTS) else 0.0,
+            })
+        return SessionResults(pd.DataFrame(rows), force_default_cols=True)
+
+    def _build_laps(self):
+        timing = self._lap_timing()
+        frames = []
+        for (number, abbreviation, _, team), (lap_times, starts, stints) in zip(self._drivers(), timing):
+            frames.append(pd.DataFrame({
+                "Time": pd.to_timedelta(starts + lap_times, unit="s"),
+                "Driver": abbreviation,
+                "DriverNumber": number,
+                "LapTime": pd.to_timedelta(lap_times, unit="s"),
+                "LapNumber": np.arange(1, len(lap_times) + 1, dtype=float),
+                "Stint": stints.astype(float),
+                "LapStartTime": pd.to_timedelta(starts, unit="s"),
+                "LapStartDate": self._t0_date + pd.to_timedelta(starts, unit="s"),
+                "Compound": np.array(["SOFT", "MEDIUM", "HARD"])[stints - 1],
+                "TyreLife": np.concatenate([np.arange(1, count + 1) for count in np.bincount(stints)[1:]]).astype(float),
+                "FreshTyre": True,
+                "Team": team,
+                "TrackStatus": "1",
+                "IsAccurate": True,
+                "IsPersonalBest": False,
+                # Set from the race control messages, which are never loaded here
+                "Deleted": None,
+                "DeletedReason": "",
+                "FastF1Generated": False,
+            }))
+        laps = pd.concat(frames, ignore_index=True)
+
+        # Running order at the end of each lap
+        laps["Position"] = laps.groupby("LapNumber")["Time"].rank(method="first")
+        best = laps.groupby("Driver")["LapTime"].transform("min")
+        laps["IsPersonalBest"] = laps["LapTime"] == best
+        return Laps(laps, session=self, force_default_cols=True)
+
+    def _build_telemetry(self):
+        car_data, pos_data = {}, {}
+        rng = np.random.default_rng(self._seed + 1)
+        for (number, _, _, _), (lap_times, starts, _) in zip(self._drivers(), self._lap_timing()):
+            for source, phase in (("car", 0.0), ("pos", 0.11)):
+                t = np.arange(phase, starts[-1] + lap_times[-1], 1 / size.hz)
+                lap_index = np.searchsorted(starts, t, side="right") - 1
+                theta = 2 * np.pi * (t - starts[lap_index]) / lap_times[lap_index]
+                time = pd.to_timedelta(t, unit="s")
+                frame = {"Date": self._t0_date + time}
+                if source == "car":
+                    speed = np.clip(215 + 95 * np.sin(3 * theta) + 20 * np.sin(7 * theta) + rng.normal(0, 2, len(t)), 70, 340)
+                    frame.update({
+                        "RPM": 7000 + speed * 25,
+                        "Speed": speed,
+                        "nGear": np.clip((speed / 42).astype(int), 1, 8),
+                        "Throttle": np.clip((speed - 90) / 1.6, 0, 100),
+                        "Brake": np.gradient(speed) < -4,
+                        "DRS": 0,
+                    })
+                else:
+                    frame.update({
+                        "Status": "OnTrack",
+                        "X": 3000 * np.cos(theta) + 500 * np.cos(3 * theta),
+                        "Y": 1500 * np.sin(theta) + 300 * np.sin(2 * theta),
+                        "Z": 20 * np.sin(theta),
+                    })
+                frame.update({"Source": source, "Time": time, "SessionTime": time})
+                (car_data if source == "car" else pos_data)[number] = Telemetry(
+                    pd.DataFrame(frame), session=self, driver=number
+                )
+        return car_data, pos_data
@@ -0,0 +1,417 @@
+# Benchmarks for the backend routes and chart functions, run against synthetic FastF1 sessions
+# (fixtures.py) and a stand-in Ergast server (fake_ergast.py) so the numbers depend neither on
+# the network nor on what FastF1 happens to have cached. Results are written as JSON with the
+# commit they were taken at; compare.py diffs two result files.
+#
+#   python backend/benchmarks/run.py --output before.json
+#   python backend/benchmarks/run.py --only "telemetry|dominance" --repeat 20 --output after.json
+#   python backend/benchmarks/compare.py before.json after.json
+#
+# Each route is timed in these phases:
+#   cold          every cache emptied before each request: session load, compute, render, Ergast fetch
+#   cold_store    as cold, but with the session in the telemetry store, as after a worker restart
+#                 (session routes only)
+#   warm_session  the session stays loaded, rendered charts and lap telemetry are dropped (session routes only)
+#   warm          every cache kept, i.e. what a repeated request costs
+#   concurrent    --concurrency clients repeating the warm request, with throughput
+#   cold_burst    --concurrency identical requests at once on empty caches (load coalescing, admission)
+# The chart functions are timed cold, each sample in a freshly spawned interpreter, and warm.
+# The backend runs in-process under uvicorn with its usual ANEMOI_* settings, so worker counts and
+# limits can be varied through the environment; the cache locations and the Ergast URL are always
+# pointed at a scratch directory and the stand-in server. The /replay WebSocket is not covered, it
+# streams in session time.
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import platform
+import re
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(os.path.dirname(BENCHMARKS_DIR), "app")
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+import fixtures  # noqa: E402
+from fake_ergast import FakeErgast  # noqa: E402
+
+SESSION = {"year": 2023, "gp": "Monza", "identifier": "R"}
+PNG = {"Accept": "image/png"}
+
+
+@dataclass
+class Route:
+    name: str
+    path: str
+    params: dict = field(default_factory=dict)
+    headers: dict = None
+    # Whether the route reads a FastF1 session (and so has a warm_session phase)
+    session: bool = True
+    # "JOB" submits to the job queue and waits for the job
+    method: str = "GET"
+
+
+ROUTES = [
+    Route("events", "/events/2023", session=False),
+    Route("session", "/session", SESSION),
+    Route("export-results", "/export/results", SESSION),
+    Route("export-laps", "/export/laps", SESSION),
+    Route("export-telemetry", "/export/telemetry", {**SESSION, "drivers": "VER,HAM", "laps": "1-10"}),
+    Route("telemetry", "/telemetry", {**SESSION, "driver": "VER"}),
+    Route("telemetry-image", "/telemetry/image", {**SESSION, "driver": "VER"}, PNG),
+    Route("telemetry-batch", "/telemetry/batch", {**SESSION, "drivers": "all"}),
+    Route("telemetry-data", "/telemetry/data", {**SESSION, "driver": "VER", "points": 2000}),
+    Route("track-dominance", "/track-dominance", {**SESSION, "drivers": "VER,HAM"}),
+    Route("track-dominance-field", "/track-dominance", {**SESSION, "drivers": "all"}),
+    Route("track-dominance-image", "/track-dominance/image", {**SESSION, "drivers": "VER,HAM"}, PNG),
+    Route("track-dominance-progress", "/track-dominance/progress", {**SESSION, "drivers": "VER,HAM"}),
+    Route("driver-comparison", "/driver-comparison", {**SESSION, "driver1": "VER", "driver2": "PER"}),
+    Route("driver-comparison-full", "/driver-comparison", {**SESSION, "driver1": "VER", "driver2": "PER", "view": "full"}),
+    Route("driver-comparison-image", "/driver-comparison/image", {**SESSION, "driver1": "VER", "driver2": "PER"}, PNG),
+    Route("driver-comparison-progress", "/driver-comparison/progress", {**SESSION, "driver1": "VER", "driver2": "PER"}),
+    Route("jobs-telemetry", "/jobs/telemetry", {**SESSION, "driver": "HAM"}, method="JOB"),
+    Route("circuits", "/circuits", session=False),
+    Route("circuits-season", "/circuits", {"year": 2023}, session=False),
+    Route("constructors", "/constructors", session=False),
+    Route("drivers", "/drivers", session=False),
+    Route("standings-drivers", "/standings", {"year": 2023, "type": "driverStandings"}, session=False),
+    Route("standings-constructors", "/standings", {"year": 2023, "type": "constructorStandings"}, session=False),
+    Route("cache-stats", "/cache/stats", session=False),
+    Route("metrics", "/metrics", session=False),
+]
+
+PHASES = ("cold", "cold_store", "warm_session", "warm", "concurrent", "cold_burst")
+
+PLOTS = ("plot_fastest_lap_png", "plot_track_dominance_png", "lap_time_comparison_plot", "plot_driver_comparison_png")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the Anemoi backend against synthetic data.")
+    parser.add_argument("--output", default="benchmark-results.json", help="where to write the JSON results")
+    parser.add_argument("--only", help="regular expression; only benchmarks whose name matches are run")
+    parser.add_argument("--phases", default=",".join(PHASES), help="comma separated route phases to run")
+    parser.add_argument("--skip-routes", action="store_true")
+    parser.add_argument("--skip-plots", action="store_true")
+    parser.add_argument("--repeat", type=int, default=10, help="samples per warm phase")
+    parser.add_argument("--cold-repeat", type=int, default=3, help="samples per cold phase")
+    parser.add_argument("--concurrency", type=int, default=8, help="clients in the concurrent phases")
+    parser.add_argument("--concurrent-repeat", type=int, default=5, help="requests per client in the concurrent phase")
+    parser.add_argument("--drivers", type=int, default=fixtures.FixtureSize.drivers)
+    parser.add_argument("--laps", type=int, default=fixtures.FixtureSize.race_laps, help="laps in a race")
+    parser.add_argument("--hz", type=float, default=fixtures.FixtureSize.hz, help="telemetry sample rate")
+    parser.add_argument("--ergast-latency", type=float, default=0.05, help="seconds added to every Ergast response")
+    return parser.parse_args()
+
+
+def summarize(kind, name, phase, samples, wall=None):
+    # samples are (seconds, error or None)
+    times = sorted(seconds for seconds, _ in samples)
+    errors = [error for _, error in samples if error]
+    result = {
+        "benchmark": f"{kind}:{name}",
+        "kind": kind,
+        "name": name,
+        "phase": phase,
+        "samples": [round(seconds, 6) for seconds, _ in samples],
+        "errors": len(errors),
+        "error_examples": errors[:3],
+        "stats": {
+            "n": len(times),
+            "min": times[0],
+            "mean": statistics.fmean(times),
+            "median": statistics.median(times),
+            "p95": times[math.ceil(0.95 * len(times)) - 1],
+            "max": times[-1],
+            "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        },
+    }
+    if wall is not None:
+        result["throughput"] = len(times) / wall
+    print(
+        f"{result['benchmark']:<45} {phase:<13} median {result['stats']['median'] * 1000:9.1f} ms"
+        f"   p95 {result['stats']['p95'] * 1000:9.1f} ms" + (f"   errors {len(errors)}" if errors else ""),
+        flush=True,
+    )
+    return result
+
+
+# Routes
+
+class Server:
+    # The backend app under uvicorn on a free local port, in a background thread of this process
+    def __init__(self, app):
+        import uvicorn
+
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.port = probe.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("The backend failed to start")
+            time.sleep(0.05)
+        return f"http://127.0.0.1:{self.port}"
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def reset_caches(app, keep_sessions=False, keep_store=False):
+    # Called between requests, when nothing is in flight
+    if not keep_sessions:
+        app.session_cache.clear()
+        app._resolve_session.cache_clear()
+        app.ergast_cache.clear()
+    if not keep_sessions and not keep_store:
+        shutil.rmtree(app.telemetry_store.directory, ignore_errors=True)
+    app.telemetry_slices.clear()
+    shutil.rmtree(app.chart_cache.directory, ignore_errors=True)
+
+
+def response_error(route, response):
+    # None for a good response, else a short description
+    if response.status_code >= 400:
+        return f"HTTP {response.status_code}: {response.text[:120]}"
+    content_type = response.headers.get("content-type", "")
+    if content_type.startswith("application/json"):
+        body = response.json()
+        if route.method == "JOB":
+            if body.get("status") != "done":
+                return f"job {body.get('status')}"
+            body = body["result"]
+        if isinstance(body, dict) and "error" in body:
+            return str(body["error"])[:120]
+    elif content_type.startswith("text/event-stream"):
+        result = response.text.rstrip().rsplit("event: result", 1)
+        if len(result) < 2:
+            return "no result event"
+        if '"error"' in result[1]:
+            return result[1].strip()[:120]
+    return None
+
+
+async def timed_request(client, route):
+    started = time.perf_counter()
+    if route.method == "JOB":
+        response = await client.post(route.path, params=route.params)
+        if response.status_code == 202:
+            response = await client.get(f"/jobs/{response.json()['id']}", params={"wait": 30})
+    else:
+        response = await client.request(route.method, route.path, params=route.params, headers=route.headers)
+    return time.perf_counter() - started, response_error(route, response)
+
+
+async def bench_route(client, app, route, options):
+    results = []
+    phases = options.phases
+
+    if "cold" in phases:
+        samples = []
+        for _ in range(options.cold_repeat):
+            reset_caches(app)
+            samples.append(await timed_request(client, route))
+        results.append(summarize("route", route.name, "cold", samples))
+
+    if "cold_store" in phases and route.session:
+        await timed_request(client, route)
+        samples = []
+        for _ in range(options.cold_repeat):
+            reset_caches(app, keep_store=True)
+            samples.append(await timed_request(client, route))
+        results.append(summarize("route", route.name, "cold_store", samples))
+
+    if "warm_session" in phases and route.session:
+        await timed_request(client, route)
+        samples = []
+        for _ in range(options.repeat):
+            reset_caches(app, keep_sessions=True)
+            samples.append(await timed_request(client, route))
+        results.append(summarize("route", route.name, "warm_session", samples))
+
+    if "warm" in phases or "concurrent" in phases:
+        await timed_request(client, route)
+    if "warm" in phases:
+        samples = [await timed_request(client, route) for _ in range(options.repeat)]
+        results.append(summarize("route", route.name, "warm", samples))
+
+    if "concurrent" in phases:
+        async def client_loop():
+            return [await timed_request(client, route) for _ in range(options.concurrent_repeat)]
+
+        started = time.perf_counter()
+        batches = await asyncio.gather(*(client_loop() for _ in range(options.concurrency)))
+        wall = time.perf_counter() - started
+        results.append(summarize("route", route.name, "concurrent", [s for batch in batches for s in batch], wall))
+
+    if "cold_burst" in phases:
+        reset_caches(app)
+        started = time.perf_counter()
+        samples = await asyncio.gather(*(timed_request(client, route) for _ in range(options.concurrency)))
+        wall = time.perf_counter() - started
+        results.append(summarize("route", route.name, "cold_burst", samples, wall))
+
+    return results
+
+
+async def bench_routes(base_url, app, routes, options):
+    import httpx
+
+    limits = httpx.Limits(max_connections=max(options.concurrency * 2, 10))
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        results = []
+        for route in routes:
+            results.extend(await bench_route(client, app, route, options))
+        return results
+
+
+# Chart functions
+
+def plot_arguments(app):
+    # Arguments of each chart function, computed from the synthetic session the way the routes do
+    year, gp, identifier = SESSION["year"], SESSION["gp"], SESSION["identifier"]
+    fastest = app.fastest_lap_payload(year, gp, identifier, "VER")
+    dominance = app.track_dominance_payload(year, gp, identifier, ["VER", "HAM"])
+    laps = app.driver_comparison_payload(year, gp, identifier, "VER", "PER", 1, view="laps")
+    full = app.driver_comparison_payload(year, gp, identifier, "VER", "PER", 1, view="full")
+    return {
+        "plot_fastest_lap_png": (fastest["telemetry"], "VER", gp, identifier, fastest["session"]["Event"]),
+        "plot_track_dominance_png": (dominance["x"], dominance["y"], dominance["fastest"], dominance["drivers"]),
+        "lap_time_comparison_plot": (laps["laps_driver1"], laps["laps_driver2"], "VER", "PER", laps["event_name"]),
+        "plot_driver_comparison_png": (
+            full["laps_driver1"], full["laps_driver2"], full["summarized_distance"],
+            full["lap_telemetry_driver1"], full["lap_telemetry_driver2"], full["surrounding_laps"],
+            "VER", "PER", full["closest_lap"], full["event_name"],
+        ),
+    }
+
+
+def time_plot(name, arguments):
+    # One timed call; in a spawned interpreter this is the first chart it ever draws
+    import main
+
+    started = time.perf_counter()
+    image = getattr(main, name)(*arguments)
+    return time.perf_counter() - started, None if image else "no image"
+
+
+def bench_plots(app, names, options):
+    arguments = plot_arguments(app)
+    spawn = multiprocessing.get_context("spawn")
+    results = []
+    for name in names:
+        samples = []
+        for _ in range(options.cold_repeat):
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                samples.append(pool.submit(time_plot, name, arguments[name]).result())
+        results.append(summarize("plot", name, "cold", samples))
+
+        time_plot(name, arguments[name])
+        samples = [time_plot(name, arguments[name]) for _ in range(options.repeat)]
+        results.append(summarize("plot", name, "warm", samples))
+    return results
+
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], cwd=BENCHMARKS_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", ".."))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def main():
+    options = parse_args()
+    options.phases = [phase.strip() for phase in options.phases.split(",") if phase.strip()]
+    selected = re.compile(options.only) if options.only else None
+
+    scratch = tempfile.mkdtemp(prefix="anemoi-bench-")
+    ergast = FakeErgast(options.ergast_latency)
+    os.environ.update({
+        "ANEMOI_CHART_CACHE_DIR": os.path.join(scratch, "charts"),
+        "ANEMOI_ERGAST_MIRROR_PATH": os.path.join(scratch, "ergast.sqlite3"),
+        "ANEMOI_TELEMETRY_STORE_DIR": os.path.join(scratch, "telemetry"),
+        "ANEMOI_FASTF1_CACHE_DIR": os.path.join(scratch, "fastf1"),
+        "ANEMOI_ERGAST_URL": ergast.start(),
+        "ANEMOI_ERGAST_MIRROR_SYNC_HOURS": "0",
+        "ANEMOI_PREWARM": "0",
+    })
+    fixtures.install(fixtures.FixtureSize(drivers=options.drivers, race_laps=options.laps, hz=options.hz))
+
+    import fastf1
+    import matplotlib
+    import numpy
+    import pandas
+    import main as app
+
+    started_at = time.time()
+    results = []
+    try:
+        if not options.skip_routes:
+            routes = [route for route in ROUTES if not selected or selected.search(route.name)]
+            server = Server(app.app)
+            try:
+                results += asyncio.run(bench_routes(server.start(), app, routes, options))
+            finally:
+                server.stop()
+        if not options.skip_plots:
+            names = [name for name in PLOTS if not selected or selected.search(name)]
+            results += bench_plots(app, names, options)
+    finally:
+        ergast.stop()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {
+        "meta": {
+            **git_revision(),
+            "started_at": started_at,
+            "seconds": time.time() - started_at,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "versions": {
+                "fastf1": fastf1.__version__,
+                "pandas": pandas.__version__,
+                "numpy": numpy.__version__,
+                "matplotlib": matplotlib.__version__,
+            },
+            "settings": {
+                "worker_executor": app.WORKER_EXECUTOR_KIND,
+                "worker_max_workers": app.WORKER_MAX_WORKERS,
+                "io_max_workers": app.IO_MAX_WORKERS,
+                "render_workers": app.RENDER_WORKERS,
+                "endpoint_concurrency": app.ENDPOINT_CONCURRENCY,
+                "job_workers": app.JOB_WORKERS,
+            },
+            "fixture": vars(fixtures.size),
+            "options": {**vars(options), "ergast_requests": ergast.requests},
+        },
+        "results": results,
+    }
+    with open(options.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {options.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# Tests import the backend as the `main` module, the way uvicorn runs it from backend/app, with
+# every on-disk cache pointed at a scratch directory so they never touch a real deployment's files.
+# The synthetic sessions of the benchmarks (benchmarks/fixtures.py) are importable as `fixtures`
+import os
+import sys
+import tempfile
+
+import pytest
+
+SCRATCH = tempfile.mkdtemp(prefix="anemoi-tests-")
+os.environ.update({
+    "ANEMOI_FASTF1_CACHE_DIR": os.path.join(SCRATCH, "fastf1"),
+    "ANEMOI_TELEMETRY_STORE_DIR": os.path.join(SCRATCH, "telemetry"),
+    "ANEMOI_CHART_CACHE_DIR": os.path.join(SCRATCH, "charts"),
+    "ANEMOI_ERGAST_MIRROR_PATH": os.path.join(SCRATCH, "ergast.sqlite"),
+    "ANEMOI_PREWARM": "0",
+})
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(BACKEND, "app"), os.path.join(BACKEND, "benchmarks")]
+
+
+@pytest.fixture
+def synthetic(monkeypatch):
+    # Small synthetic sessions in place of FastF1's, kept out of the telemetry store
+    import fastf1
+    import fixtures
+    import main
+    monkeypatch.setattr(fixtures, "size", fixtures.FixtureSize(drivers=2, race_laps=3))
+    monkeypatch.setattr(fastf1, "get_session", fixtures.get_session)
+    monkeypatch.setattr(fastf1, "get_event_schedule", fixtures.get_event_schedule)
+    monkeypatch.setattr(main, "session_is_final", lambda session: False)
+    yield 2019, "Bahrain", "R"
+    main.session_cache.clear()
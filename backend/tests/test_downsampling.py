@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import main
+
+
+def trace(n=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.uniform(0.5, 1.5, n))
+    y = 200 + 100 * np.sin(x / 50) + rng.normal(0, 5, n)
+    return x, y
+
+
+@pytest.mark.parametrize("method", list(main.DOWNSAMPLE_METHODS))
+@pytest.mark.parametrize("threshold", [3, 4, 5, 10, 11, 99, 100, 999])
+def test_stays_within_the_points_budget(method, threshold):
+    x, y = trace()
+    indices = main.DOWNSAMPLE_METHODS[method](x, y, threshold)
+    assert len(indices) <= threshold
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_minmax_keeps_the_extremes():
+    x, y = trace()
+    indices = main.minmax_indices(x, y, 20)
+    assert np.argmax(y) in indices and np.argmin(y) in indices
+
+
+def test_lttb_skips_missing_samples():
+    x, y = trace()
+    y[::3] = np.nan
+    indices = main.lttb_indices(x, y, 50)
+    assert len(indices) == 50
+    assert not np.isnan(y[indices[1:-1]]).any()
+
+
+def test_lttb_of_an_all_missing_trace():
+    x, _ = trace(100)
+    indices = main.lttb_indices(x, np.full(100, np.nan), 10)
+    assert len(indices) == 10 and indices[0] == 0 and indices[-1] == 99
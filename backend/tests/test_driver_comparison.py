@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+
+HZ = 20
+LAP_TIME = 80.0
+MEAN_SPEED = 225.0  # km/h, so the lap is 5000 m
+LAP_LENGTH = MEAN_SPEED / 3.6 * LAP_TIME
+WAVE = 40.0  # km/h of speed variation around the lap
+
+
+def speed(elapsed):
+    # km/h, the same profile every lap
+    return MEAN_SPEED + WAVE * np.sin(2 * np.pi * elapsed / LAP_TIME)
+
+
+def distance(elapsed):
+    # Metres covered since the start of the stint, the integral of speed()
+    return (MEAN_SPEED * elapsed + WAVE * LAP_TIME / (2 * np.pi) * (1 - np.cos(2 * np.pi * elapsed / LAP_TIME))) / 3.6
+
+
+def stint(number, start, laps, lap_time=LAP_TIME, speed=speed):
+    # Car samples from a little before the stint to a little after it, and its laps
+    time_s = np.arange(round((start - 5) * HZ), round((start + laps * lap_time + 5) * HZ)) / HZ
+    car = {
+        "SessionTime": np.round(time_s * 1000).astype(np.int32),
+        "Speed": speed(time_s - start).astype(np.float32),
+    }
+    starts = start + lap_time * np.arange(laps)
+    laps = pd.DataFrame({
+        "DriverNumber": number,
+        "LapNumber": np.arange(1, laps + 1, dtype=float),
+        "LapStartTime": pd.to_timedelta(starts, unit="s"),
+        "Time": pd.to_timedelta(starts + lap_time, unit="s"),
+    })
+    return car, laps
+
+
+def session_of(**drivers):
+    return SimpleNamespace(_compact_telemetry={"car": {number: car for number, (car, _) in drivers.items()}})
+
+
+def test_stint_progress_counts_laps_and_fractions():
+    car, laps = stint("1", start=100.0, laps=5)
+    time_s, lap_numbers, progress, lengths = main.stint_progress(session_of(**{"1": (car, laps)}), laps)
+    # Only the samples inside the stint, in order
+    assert time_s[0] >= 100.0 and time_s[-1] < 100.0 + 5 * LAP_TIME
+    assert np.all(np.diff(progress) >= 0)
+    np.testing.assert_allclose(lengths, LAP_LENGTH, rtol=1e-3)
+    # Progress is (LapNumber - 1) plus the fraction of the lap covered, from the integrated speed
+    assert np.all((progress >= lap_numbers - 1) & (progress <= lap_numbers))
+    np.testing.assert_array_equal(np.unique(lap_numbers), [1, 2, 3, 4, 5])
+    expected = distance(time_s - 100.0) / LAP_LENGTH
+    np.testing.assert_allclose(progress, expected, atol=2e-3)
+
+
+def test_gap_matches_the_distance_between_the_drivers():
+    # The chaser runs the same laps one second behind: at any time the gap is the distance the
+    # leader covered in the last second
+    ahead, behind = stint("1", start=100.0, laps=6), stint("44", start=101.0, laps=6)
+    session = session_of(**{"1": ahead, "44": behind})
+    gap = main.compute_gap_to_driver_ahead(session, ahead[1], behind[1])
+
+    for surrounding in gap["surrounding_laps"]:
+        # Distance along the chaser's lap, for the per-sample traces
+        assert surrounding["distance_data"]["Distance"].between(0, LAP_LENGTH * 1.001).all()
+    time_s, lap_numbers, _, _ = main.stint_progress(session, behind[1])
+    overlap = time_s <= 100.0 + 6 * LAP_TIME
+    expected = distance(time_s[overlap] - 100.0) - distance(time_s[overlap] - 101.0)
+
+    summary = gap["summary"]
+    assert summary["Lap"].tolist() == [0, 1, 2, 3, 4, 5]
+    # Per lap, the mean of the exact gap over the chaser's samples of that lap
+    lap = lap_numbers[overlap].astype(int) - 1
+    expected_mean = pd.Series(expected).groupby(lap).mean()
+    np.testing.assert_allclose(summary["Mean"], expected_mean, atol=1.0)
+    np.testing.assert_allclose(summary["Median"], pd.Series(expected).groupby(lap).median(), atol=1.0)
+
+
+def test_closest_lap_and_the_laps_around_it():
+    # A faster chaser closing in at a constant rate: the gap is smallest on the last lap
+    constant = lambda elapsed: np.full_like(elapsed, 225.0)
+    quicker = lambda elapsed: np.full_like(elapsed, 226.0)
+    ahead = stint("1", start=100.0, laps=8, speed=constant)
+    behind = stint("44", start=104.0, laps=8, lap_time=LAP_LENGTH / (226.0 / 3.6), speed=quicker)
+    gap = main.compute_gap_to_driver_ahead(session_of(**{"1": ahead, "44": behind}), ahead[1], behind[1])
+
+    assert gap["closest_lap"] == 7
+    assert np.all(np.diff(gap["summary"]["Median"]) < 0)
+    # Gap at the start: 4 s at 225 km/h
+    assert gap["summary"]["Mean"].iloc[0] == pytest.approx(250 - 1000 / 3600 * LAP_TIME / 2, abs=2.0)
+    assert [surrounding["lap"] for surrounding in gap["surrounding_laps"]] == [6, 7]
+
+
+def test_no_gap_without_overlapping_telemetry():
+    ahead, behind = stint("1", start=100.0, laps=2), stint("44", start=1000.0, laps=2)
+    session = session_of(**{"1": ahead, "44": behind})
+    assert main.compute_gap_to_driver_ahead(session, ahead[1], behind[1]) is None
+    assert main.compute_gap_to_driver_ahead(session_of(**{"1": ahead}), ahead[1], behind[1]) is None
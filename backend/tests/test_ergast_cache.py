@@ -0,0 +1,94 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+import main
+
+PATH = f"/{pd.Timestamp.utcnow().year}/driverStandings.json"
+
+
+@pytest.fixture
+def short_ttl(monkeypatch):
+    monkeypatch.setattr(main, "ERGAST_CACHE_TTL", {"standings": 0.05})
+
+
+class Upstream:
+    # Loader standing in for Ergast: returns responses 1, 2, ... and can be held back or failed
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+        self.fail = False
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError("Ergast is down")
+        return {"response": self.calls}
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(short_ttl):
+    async def scenario():
+        cache, upstream = main.ErgastCache(10), Upstream()
+        assert await cache.fetch("standings", PATH, upstream) == {"response": 1}
+        assert await cache.fetch("standings", PATH, upstream) == {"response": 1}
+        assert cache.hits == 1
+
+        # Once stale the old response keeps coming back without waiting for Ergast, and only
+        # the first stale read starts a refresh
+        await asyncio.sleep(0.06)
+        upstream.release.clear()
+        for _ in range(3):
+            assert await cache.fetch("standings", PATH, upstream) == {"response": 1}
+        assert (cache.stale_hits, cache.refreshes) == (3, 1)
+
+        upstream.release.set()
+        await cache._inflight[("standings", PATH)]
+        assert await cache.fetch("standings", PATH, upstream) == {"response": 2}
+        assert upstream.calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_failed_refresh_keeps_the_stale_entry(short_ttl):
+    async def scenario():
+        cache, upstream = main.ErgastCache(10), Upstream()
+        await cache.fetch("standings", PATH, upstream)
+        await asyncio.sleep(0.06)
+        upstream.fail = True
+        assert await cache.fetch("standings", PATH, upstream) == {"response": 1}
+        await asyncio.sleep(0)
+        assert cache.refresh_errors == 1
+        assert await cache.fetch("standings", PATH, upstream) == {"response": 1}
+
+        # Nothing to fall back on for a miss
+        with pytest.raises(RuntimeError):
+            await cache.fetch("standings", "/2024/constructorStandings.json", upstream)
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_misses_share_one_fetch():
+    async def scenario():
+        cache, upstream = main.ErgastCache(10), Upstream()
+        upstream.release.clear()
+        requests = [asyncio.ensure_future(cache.fetch("standings", PATH, upstream)) for _ in range(5)]
+        await asyncio.sleep(0)
+        upstream.release.set()
+        assert await asyncio.gather(*requests) == [{"response": 1}] * 5
+        assert (upstream.calls, cache.misses, cache.coalesced) == (1, 1, 4)
+
+    asyncio.run(scenario())
+
+
+def test_past_seasons_never_go_stale(short_ttl):
+    async def scenario():
+        cache, upstream = main.ErgastCache(10), Upstream()
+        await cache.fetch("standings", "/2019/driverStandings.json", upstream)
+        await asyncio.sleep(0.06)
+        await cache.fetch("standings", "/2019/driverStandings.json", upstream)
+        assert (cache.hits, cache.stale_hits, upstream.calls) == (1, 0, 1)
+
+    asyncio.run(scenario())
@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+import main
+
+
+def mirror(tmp_path, synced_at):
+    # A mirror that went through a full sync at synced_at, holding last season and this one
+    ergast_mirror = main.ErgastMirror(str(tmp_path / "ergast.sqlite"))
+    current_year = pd.Timestamp.utcnow().year
+    with ergast_mirror.connection() as conn:
+        for key in ("full_sync", "synced_at"):
+            conn.execute("INSERT INTO mirror_state VALUES (?, ?)", (key, str(synced_at)))
+        for year in (current_year - 1, current_year):
+            conn.execute("INSERT INTO seasons VALUES (?, ?)", (year, synced_at))
+    return ergast_mirror, current_year
+
+
+def test_covers_past_seasons_regardless_of_sync_age(tmp_path):
+    ergast_mirror, current_year = mirror(tmp_path, time.time() - 30 * 86400)
+    assert ergast_mirror.covers("standings", current_year - 1)
+    assert not ergast_mirror.covers("standings", current_year - 2)
+
+
+def test_current_season_and_all_seasons_go_upstream_once_stale(tmp_path):
+    ergast_mirror, current_year = mirror(tmp_path, time.time() - max(main.ERGAST_CACHE_TTL.values()) - 60)
+    assert not ergast_mirror.covers("standings", current_year)
+    assert not ergast_mirror.covers("drivers", None)
+
+
+def test_fresh_sync_covers_current_season(tmp_path):
+    ergast_mirror, current_year = mirror(tmp_path, time.time())
+    assert ergast_mirror.covers("standings", current_year)
+    assert ergast_mirror.covers("drivers", None)
+
+
+def test_empty_mirror_covers_nothing(tmp_path):
+    ergast_mirror = main.ErgastMirror(str(tmp_path / "missing.sqlite"))
+    assert not ergast_mirror.covers("drivers", 2010)
+
+
+def test_sync_route_is_admin_only_and_runs_one_sync_at_a_time(monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    started = []
+
+    async def slow_sync(full):
+        started.append(full)
+        await asyncio.sleep(0.5)
+
+    monkeypatch.setattr(main.ergast_mirror, "_sync", slow_sync)
+    with TestClient(main.app) as client:
+        assert client.post("/ergast/mirror/sync", params={"full": "true"}).status_code == 401
+
+        headers = {"Authorization": "Bearer secret"}
+        assert client.post("/ergast/mirror/sync", params={"full": "true"}, headers=headers).status_code == 202
+        response = client.post("/ergast/mirror/sync", params={"full": "true"}, headers=headers)
+        assert response.status_code == 409
+        assert response.json()["current_sync"]["full"] is True
+    assert started == [True]
@@ -0,0 +1,39 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+def test_parse_lap_numbers():
+    assert main.parse_lap_numbers(None) is None
+    assert main.parse_lap_numbers("1-3, 7") == {1, 2, 3, 7}
+    assert main.parse_lap_numbers(f"{main.MAX_LAP_NUMBER}") == {main.MAX_LAP_NUMBER}
+
+
+@pytest.mark.parametrize("laps", ["1-1000000000", "10-1", "0", "0-5", "-3", "5--1", "1-x", f"{main.MAX_LAP_NUMBER + 1}"])
+def test_parse_lap_numbers_rejects(laps):
+    with pytest.raises(ValueError):
+        main.parse_lap_numbers(laps)
+
+
+@pytest.mark.parametrize("laps", ["1-1000000000", "10-1", "0", "-3"])
+def test_export_rejects_bad_lap_ranges(laps):
+    # Rejected before any session is loaded
+    response = TestClient(main.app).get(
+        "/export/telemetry", params={"year": 2023, "gp": "Monza", "identifier": "R", "drivers": "VER", "laps": laps}
+    )
+    assert response.status_code == 400
+    assert "laps" in response.json()["error"]
+
+
+@pytest.mark.parametrize("params", [
+    {"drivers": ""},
+    {"drivers": " , "},
+    {"drivers": "VER,HAM"},
+    {"drivers": ",".join(f"D{index}" for index in range(20)), "laps": "1-20"},
+])
+def test_export_rejects_unbounded_telemetry(params):
+    response = TestClient(main.app).get(
+        "/export/telemetry", params={"year": 2023, "gp": "Monza", "identifier": "R", **params}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,159 @@
+import contextlib
+
+import fastf1
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from fastf1.core import DataNotLoadedError, Session
+from fastf1.events import Event
+from fastf1.req import Cache
+
+import main
+
+
+def event():
+    sessions = {}
+    for number, (name, start) in enumerate([
+        ("Practice 1", "2023-09-01 11:30"),
+        ("Practice 2", "2023-09-01 15:00"),
+        ("Practice 3", "2023-09-02 10:30"),
+        ("Qualifying", "2023-09-02 14:00"),
+        ("Race", "2023-09-03 13:00"),
+    ], start=1):
+        sessions.update({
+            f"Session{number}": name,
+            f"Session{number}Date": pd.Timestamp(start, tz="UTC").tz_convert("Europe/Rome"),
+            f"Session{number}DateUtc": pd.Timestamp(start),
+        })
+    return Event(pd.Series({
+        "RoundNumber": 14,
+        "Country": "Italy",
+        "Location": "Monza",
+        "OfficialEventName": "Formula 1 Pirelli Gran Premio d'Italia 2023",
+        "EventDate": pd.Timestamp("2023-09-03"),
+        "EventName": "Italian Grand Prix",
+        "EventFormat": "conventional",
+        "F1ApiSupport": True,
+        **sessions,
+    }), year=2023)
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    # FastF1 in offline mode, recording every cached API call it makes that the disk cache could
+    # not answer
+    missing = []
+    get_cache_file_path = Cache._get_cache_file_path.__func__
+
+    def record(cls, api_path, name):
+        path = get_cache_file_path(cls, api_path, name)
+        if not main.os.path.exists(path):
+            missing.append(name)
+        return path
+
+    monkeypatch.setattr(Cache, "_get_cache_file_path", classmethod(record))
+    fastf1.Cache.offline_mode(True)
+    yield missing
+    fastf1.Cache.offline_mode(main.FASTF1_OFFLINE)
+
+
+@pytest.mark.parametrize("session_name", ["Race", "Qualifying"])
+@pytest.mark.parametrize("profile", list(main.SESSION_LOAD_PROFILES))
+def test_cache_files_cover_every_api_call_of_a_load(offline, session_name, profile):
+    # Pre-populate the cache with the files the lookup asks for; the payloads are placeholders,
+    # FastF1 fails to parse them, but it must never need anything else from the network
+    session = Session(event(), session_name, f1_api_support=True)
+    for name in main.fastf1_cache_files(session, profile):
+        data = (None, None, None) if name == "_extended_timing_data" else None
+        Cache._write_cache(data, Cache._get_cache_file_path(session.api_path, name))
+    offline.clear()
+
+    assert main.fastf1_cache.lookup(session, profile)
+    # With nothing parsed, load() only fails at its closing log line, after the last API call
+    with contextlib.suppress(DataNotLoadedError):
+        session.load(**main.SESSION_LOAD_PROFILES[profile])
+    assert offline == []
+    main.fastf1_cache.purge(year=2023)
+
+
+def test_race_laps_need_the_lap_count():
+    race = Session(event(), "Race", f1_api_support=True)
+    qualifying = Session(event(), "Qualifying", f1_api_support=True)
+    assert {"session_status_data", "track_status_data", "lap_count"} <= set(main.fastf1_cache_files(race, "laps"))
+    assert "lap_count" not in main.fastf1_cache_files(qualifying, "laps")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    return TestClient(main.app)
+
+
+ADMIN = {"Authorization": "Bearer secret"}
+
+
+def test_purge_needs_the_admin_token(client, monkeypatch):
+    assert client.post("/fastf1/cache/purge", params={"year": 2023}).status_code == 401
+    assert client.post("/fastf1/cache/purge", params={"year": 2023}, headers={"Authorization": "Bearer x"}).status_code == 401
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    assert client.post("/fastf1/cache/purge", params={"year": 2023}, headers=ADMIN).status_code == 403
+
+
+@pytest.mark.parametrize("params", [{}, {"http": "true"}, {"year": 2023, "http": "true"}])
+def test_purging_everything_has_to_be_explicit(client, params):
+    response = client.post("/fastf1/cache/purge", params=params, headers=ADMIN)
+    assert response.status_code == 400
+
+
+def test_purge_with_filter_or_all(client):
+    assert client.post("/fastf1/cache/purge", params={"year": 1999}, headers=ADMIN).json()["removed"] == []
+    assert client.post("/fastf1/cache/purge", params={"all": "true"}, headers=ADMIN).status_code == 200
+
+
+def cached_session(directory, name, size):
+    path = directory / "2023" / "2023-09-03_Italian_Grand_Prix" / name
+    path.mkdir(parents=True)
+    (path / "car_data.ff1pkl").write_bytes(b"x" * size)
+    return path
+
+
+def test_eviction_keeps_the_index_instead_of_walking_the_tree(tmp_path, monkeypatch):
+    cache = main.FastF1Cache(str(tmp_path), max_bytes=250, offline=False)
+    oldest = cached_session(tmp_path, "2023-09-01_Practice_1", 100)
+    cached_session(tmp_path, "2023-09-02_Qualifying", 100)
+    main.os.utime(oldest, (1, 1))
+
+    walks = []
+    walk = main.os.walk
+    monkeypatch.setattr(main.os, "walk", lambda *args, **kwargs: walks.append(1) or walk(*args, **kwargs))
+    race = Session(event(), "Race", f1_api_support=True)
+    monkeypatch.setattr(cache, "_session_path", lambda session: str(cached_session(tmp_path, "2023-09-03_Race", 100)))
+
+    cache.evict()
+    cache.touch(race)
+    cache.evict()
+    cache.evict()
+    assert len(walks) == 1
+    assert not oldest.exists()
+    assert cache.stats()["bytes"] == 200
+    assert cache.evictions == 1
+
+
+def test_cache_works_without_fastf1_internals(tmp_path, monkeypatch):
+    # A FastF1 release without the private names the HTTP tier cleanup uses: sessions are still
+    # evicted and purged, the HTTP tier is reported as unmanaged
+    monkeypatch.delattr(fastf1.Cache, "_requests_session_cached")
+    monkeypatch.delattr(fastf1._api, "pages")
+    cache = main.FastF1Cache(str(tmp_path), max_bytes=150, offline=False)
+    cached_session(tmp_path, "2023-09-01_Practice_1", 100)
+    cached_session(tmp_path, "2023-09-02_Qualifying", 100)
+
+    cache.evict()
+    assert cache.stats()["entries"] == 1
+    assert not cache.stats()["http_tier_managed"]
+    assert len(cache.purge(year=2023, http=True)) == 1
+
+    race = Session(event(), "Race", f1_api_support=True)
+    monkeypatch.delattr(Session, "_RACE_LIKE_SESSIONS", raising=False)
+    monkeypatch.delattr(race, "_RACE_LIKE_SESSIONS")
+    assert "lap_count" in main.fastf1_cache_files(race, "laps")
@@ -0,0 +1,44 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.mark.parametrize("accept, image_format", [
+    (None, "png"),
+    ("*/*", "png"),
+    ("image/webp", "webp"),
+    ("IMAGE/WEBP", "webp"),
+    ("image/avif,image/webp,*/*;q=0.8", "webp"),
+    ("image/webp;q=0.5, image/png", "png"),
+    ("image/*;q=0.8, image/webp", "webp"),
+    # The most specific range wins, so an explicit q=0 refuses a type */* would accept
+    ("image/png;q=0, */*", "webp"),
+    ("text/html", None),
+    ("image/png;q=0, image/webp;q=0", None),
+    ("image/webp;q=high", None),
+])
+def test_negotiate_image_format(accept, image_format):
+    assert main.negotiate_image_format(accept) == image_format
+
+
+def test_image_route_serves_the_negotiated_format(synthetic):
+    year, gp, identifier = synthetic
+    params = {"year": year, "gp": gp, "identifier": identifier, "driver": "VER"}
+    client = TestClient(main.app)
+
+    webp = client.get("/telemetry/image", params=params, headers={"Accept": "image/webp"})
+    assert webp.status_code == 200
+    assert webp.headers["content-type"] == "image/webp" and webp.content[8:12] == b"WEBP"
+    assert webp.headers["vary"] == "Accept"
+
+    png = client.get("/telemetry/image", params=params, headers={"Accept": "image/png"})
+    assert png.headers["content-type"] == "image/png" and png.content.startswith(b"\x89PNG")
+    assert png.headers["etag"] != webp.headers["etag"]
+
+    revalidated = client.get("/telemetry/image", params=params, headers={"Accept": "image/webp", "If-None-Match": webp.headers["etag"]})
+    assert revalidated.status_code == 304 and not revalidated.content
+
+    refused = client.get("/telemetry/image", params=params, headers={"Accept": "text/html"})
+    assert refused.status_code == 406
+    assert "image/webp" in refused.json()["error"]
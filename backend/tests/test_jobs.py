@@ -0,0 +1,57 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+def test_jobs_run_by_priority_then_submission_order():
+    async def scenario():
+        queue = main.JobQueue(workers=1, max_queued=3, retention=60)
+        gate, started = asyncio.Event(), []
+
+        def job(name):
+            async def run(progress):
+                started.append(name)
+                await gate.wait()
+                return {"name": name}
+            return run
+
+        # Keep the only worker busy so the rest queue up behind it
+        blocker = queue.submit("telemetry", {}, "cold", job("blocker"))
+        while queue.get(blocker["id"])["status"] != "running":
+            await asyncio.sleep(0)
+
+        submitted = [queue.submit("telemetry", {}, priority, job(name)) for name, priority in [
+            ("cold", "cold"), ("warm", "warm"), ("cached", "cached"),
+        ]]
+        assert [queue.get(job["id"])["position"] for job in submitted] == [2, 1, 0]
+        # Past max_queued waiting jobs the queue refuses more
+        assert queue.submit("telemetry", {}, "cached", job("refused")) is None
+        assert queue.stats()["rejected"] == 1
+
+        gate.set()
+        for job in [blocker, *submitted]:
+            await queue.wait(job["id"], 5)
+        assert started == ["blocker", "cached", "warm", "cold"]
+        assert [queue.get(job["id"])["result"] for job in submitted] == [{"name": "cold"}, {"name": "warm"}, {"name": "cached"}]
+        queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_follows_recent_run_times():
+    queue = main.JobQueue(workers=2, max_queued=1, retention=60)
+    assert queue.retry_after() == 3
+    queue._durations.extend([10.0, 20.0])
+    assert queue.retry_after() == 8
+
+
+def test_full_queue_answers_429_with_retry_after(synthetic, monkeypatch):
+    monkeypatch.setattr(main, "jobs", main.JobQueue(workers=1, max_queued=0, retention=60))
+    year, gp, identifier = synthetic
+    with TestClient(main.app) as client:
+        response = client.post("/jobs/telemetry", params={"year": year, "gp": gp, "identifier": identifier, "driver": "VER"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "5"
+    assert "error" in response.json()
@@ -0,0 +1,27 @@
+import asyncio
+
+import pandas as pd
+
+import main
+
+
+def test_run_plans_at_most_once_per_replan_interval(monkeypatch):
+    # With the next warm-up hours away the scheduler must sleep a replan interval between plans
+    # instead of planning again straight away
+    monkeypatch.setattr(main, "PREWARM_REPLAN", pd.Timedelta(seconds=0.2))
+    prewarmer = main.Prewarmer()
+    calls = []
+
+    def plan(now):
+        calls.append(now)
+        return [(now + pd.Timedelta(hours=5), 2024, 1, "Race", False)]
+
+    monkeypatch.setattr(prewarmer, "plan", plan)
+
+    async def run_for(seconds):
+        task = asyncio.create_task(prewarmer.run())
+        await asyncio.sleep(seconds)
+        task.cancel()
+
+    asyncio.run(run_for(0.5))
+    assert 1 <= len(calls) <= 3
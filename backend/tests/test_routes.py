@@ -0,0 +1,88 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from fastf1.core import DataNotLoadedError
+
+import main
+
+LAP_ROUTES = [
+    ("/session", {}),
+    ("/export/laps", {"format": "parquet"}),
+    ("/export/laps", {"drivers": "VER", "laps": "1-2"}),
+    ("/export/results", {}),
+    ("/export/telemetry", {"drivers": "VER", "laps": "1-3", "format": "parquet"}),
+    ("/export/telemetry", {"drivers": "VER,PER", "laps": "2"}),
+    ("/telemetry", {"driver": "VER"}),
+    ("/telemetry/image", {"driver": "PER"}),
+    ("/telemetry/batch", {}),
+    ("/telemetry/data", {"driver": "VER"}),
+    ("/telemetry/data", {"driver": "PER", "lap": 2, "points": 50, "method": "minmax"}),
+    ("/track-dominance", {"driver1": "VER", "driver2": "PER"}),
+    ("/track-dominance", {"drivers": "all", "minisectors": 10}),
+    ("/track-dominance/image", {"drivers": "VER,PER"}),
+    ("/driver-comparison", {"driver1": "VER", "driver2": "PER"}),
+    ("/driver-comparison", {"driver1": "VER", "driver2": "PER", "view": "full"}),
+    ("/driver-comparison/image", {"driver1": "VER", "driver2": "PER", "view": "full"}),
+]
+PROGRESS_ROUTES = [
+    ("/track-dominance/progress", {"driver1": "VER", "driver2": "PER"}),
+    ("/driver-comparison/progress", {"driver1": "VER", "driver2": "PER", "view": "full"}),
+]
+JOB_ROUTES = [
+    ("/jobs/telemetry", {"driver": "PER"}),
+    ("/jobs/track-dominance", {"drivers": "all"}),
+    ("/jobs/driver-comparison", {"driver1": "PER", "driver2": "VER", "view": "full"}),
+]
+
+
+def check_telemetry_is_compact(year, gp, identifier):
+    # The compact arrays live beside the session; FastF1's own telemetry attributes are gone, so
+    # nothing can read a half-converted copy through them
+    session = main.get_loaded_session(year, gp, identifier, "telemetry")
+    assert set(main.session_telemetry(session, "car")) == set(session.drivers)
+    assert set(main.session_telemetry(session, "pos")) == set(session.drivers)
+    assert not hasattr(session, "_car_data") and not hasattr(session, "_pos_data")
+    with pytest.raises(DataNotLoadedError):
+        session.car_data
+
+
+def check_routes(client, session):
+    for path, params in LAP_ROUTES:
+        response = client.get(path, params={**session, **params})
+        assert response.status_code == 200, (path, params, response.text)
+        if response.headers["content-type"].startswith("application/json"):
+            assert "error" not in response.json(), (path, params)
+
+    for path, params in PROGRESS_ROUTES:
+        events = client.get(path, params={**session, **params}).text.strip().split("\n\n")
+        event, data = events[-1].split("\n")
+        assert event == "event: result"
+        assert "error" not in json.loads(data.removeprefix("data: ")), path
+
+    for path, params in JOB_ROUTES:
+        job = client.post(path, params={**session, **params}).json()
+        job = client.get(f"/jobs/{job['id']}", params={"wait": 30}).json()
+        assert job["status"] == "done" and "error" not in job["result"], path
+
+    with client.websocket_connect("/replay", params={**session, "speed": 64, "hz": 1}) as websocket:
+        header = websocket.receive_json()
+        assert "error" not in header and len(header["drivers"]) == 2
+        assert websocket.receive_bytes()
+
+
+@pytest.mark.parametrize("source", ["load", "store"])
+def test_routes_serve_compacted_sessions(synthetic, monkeypatch, source):
+    # Every route that reads laps or telemetry, on a session loaded and compacted in this process
+    # and on one read back from the telemetry store
+    year, gp, identifier = (2019, "Bahrain", "R") if source == "load" else (2018, "Monza", "R")
+    if source == "store":
+        monkeypatch.setattr(main, "session_is_final", lambda session: True)
+        main.get_loaded_session(year, gp, identifier, "telemetry")
+        main.session_cache.clear()
+    check_telemetry_is_compact(year, gp, identifier)
+    # The job workers are bound to the event loop of the first client that submits a job
+    monkeypatch.setattr(main, "jobs", main.JobQueue(main.JOB_WORKERS, main.JOB_QUEUE_MAX, main.JOB_RETENTION_SECONDS))
+
+    with TestClient(main.app) as client:
+        check_routes(client, {"year": year, "gp": gp, "identifier": identifier})
@@ -0,0 +1,174 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import fixtures
+import main
+
+
+def test_failed_telemetry_upgrade_is_not_recorded(synthetic, monkeypatch):
+    # FastF1 swallows errors in _load_telemetry; the upgrade must fail instead of caching a
+    # "telemetry" session without car data, and a later request must load it again
+    session = main.get_loaded_session(*synthetic, "laps")
+    key = (2019, int(session.event["RoundNumber"]), session.name)
+
+    failing = True
+    load_telemetry = fixtures.SyntheticSession._load_telemetry
+
+    def flaky_load_telemetry(self, livedata=None):
+        if not failing:
+            load_telemetry(self, livedata)
+
+    monkeypatch.setattr(fixtures.SyntheticSession, "_load_telemetry", flaky_load_telemetry)
+    monkeypatch.setattr(main.session_cache, "unavailable_ttl", 0)
+    with pytest.raises(main.SessionUnavailableError):
+        main.get_loaded_session(*synthetic, "telemetry")
+    assert main.session_cache.profile(key) == "laps"
+
+    failing = False
+    upgraded = main.get_loaded_session(*synthetic, "telemetry")
+    assert upgraded.laps.equals(session.laps)
+    assert main.session_cache.profile(key) == "telemetry"
+
+
+def test_unavailable_telemetry_is_remembered(synthetic, monkeypatch):
+    # Until the TTL runs out, requests for telemetry that failed to load fail without loading
+    main.get_loaded_session(*synthetic, "laps")
+    calls = []
+    monkeypatch.setattr(fixtures.SyntheticSession, "_load_telemetry", lambda self, livedata=None: calls.append(1))
+    monkeypatch.setattr(main.session_cache, "unavailable_ttl", 0.2)
+    for _ in range(3):
+        with pytest.raises(main.SessionUnavailableError):
+            main.get_loaded_session(*synthetic, "telemetry")
+    assert len(calls) == 1
+    assert main.session_cache.stats()["unavailable"] == [{"year": 2019, "round": 1, "session": "Race", "profile": "telemetry"}]
+    # The laps are still served from the cache meanwhile
+    assert main.get_loaded_session(*synthetic, "laps") is not None
+
+    time.sleep(0.2)
+    with pytest.raises(main.SessionUnavailableError):
+        main.get_loaded_session(*synthetic, "telemetry")
+    assert len(calls) == 2
+
+
+def test_upgrade_leaves_the_cached_session_untouched(synthetic, monkeypatch):
+    # Readers of the laps session keep a consistent session while the telemetry is added: the
+    # upgrade loads into a copy, which then replaces the cached session
+    session = main.get_loaded_session(*synthetic, "laps")
+    laps, columns = session.laps, list(session.laps.columns)
+    load_telemetry = fixtures.SyntheticSession._load_telemetry
+
+    def load_telemetry_into_laps(self, livedata=None):
+        # Like FastF1's, which adds LapStartDate to the laps in place
+        load_telemetry(self, livedata)
+        self._laps["Upgraded"] = True
+
+    monkeypatch.setattr(fixtures.SyntheticSession, "_load_telemetry", load_telemetry_into_laps)
+    upgraded = main.get_loaded_session(*synthetic, "telemetry")
+    assert upgraded is not session
+    assert session.laps is laps and list(session.laps.columns) == columns
+    assert not hasattr(session, "_compact_telemetry")
+    assert main.get_loaded_session(*synthetic, "laps") is upgraded
+
+    lap = upgraded.laps.iloc[1]
+    assert lap.session is upgraded and len(main.lap_samples(lap, "car")["Speed"])
+
+
+def calls_of(monkeypatch, obj, name):
+    calls = []
+    func = getattr(obj, name)
+    monkeypatch.setattr(obj, name, lambda *args, **kwargs: calls.append(args) or func(*args, **kwargs))
+    return calls
+
+
+def test_progress_reports_the_stages_of_one_load(synthetic, monkeypatch):
+    # A cold telemetry load with progress is a single load, compacted and stored once, that
+    # reports the laps as soon as they are loaded
+    monkeypatch.setattr(main, "session_is_final", lambda session: True)
+    compactions = calls_of(monkeypatch, main, "compact_session")
+    saves = calls_of(monkeypatch, main.telemetry_store, "save")
+    puts = calls_of(monkeypatch, main.session_cache, "put")
+    stages = []
+    load_telemetry = fixtures.SyntheticSession._load_telemetry
+
+    def recorded_load_telemetry(self, livedata=None):
+        stages.append("loading telemetry")
+        load_telemetry(self, livedata)
+
+    monkeypatch.setattr(fixtures.SyntheticSession, "_load_telemetry", recorded_load_telemetry)
+    main.get_loaded_session(2017, "Bahrain", "R", "telemetry", lambda stage, data=None: stages.append(stage))
+    assert stages == ["schedule", "laps", "loading telemetry", "telemetry"]
+    assert len(compactions) == len(saves) == len(puts) == 1
+    assert saves[0][2] == "telemetry"
+
+    # Cached, every stage is still reported
+    stages.clear()
+    main.get_loaded_session(2017, "Bahrain", "R", "telemetry", lambda stage, data=None: stages.append(stage))
+    assert stages == ["schedule", "laps", "telemetry"]
+    assert len(compactions) == 1
+
+
+def test_single_flight_shares_one_call():
+    flight = main.SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return object()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, "key", slow)
+        started.wait(5)
+        followers = [pool.submit(flight.do, "key", slow) for _ in range(3)]
+        while flight.stats()["coalesced"] < 3:
+            time.sleep(0.01)
+        release.set()
+        results = [future.result() for future in [leader, *followers]]
+
+    assert len(calls) == 1 and all(result is results[0] for result in results)
+    assert flight.stats() == {"loads": 1, "coalesced": 3, "in_flight": 0}
+    # Once finished the key is free again
+    assert flight.do("key", lambda: 2) == 2
+
+
+def test_single_flight_shares_the_exception():
+    flight = main.SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError("no data")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "key", failing)
+        started.wait(5)
+        follower = pool.submit(flight.do, "key", failing)
+        while flight.stats()["coalesced"] < 1:
+            time.sleep(0.01)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_concurrent_requests_load_a_session_once(synthetic, monkeypatch):
+    loads = []
+    load = fixtures.SyntheticSession.load
+
+    def slow_load(self, *args, **kwargs):
+        loads.append(1)
+        time.sleep(0.2)
+        return load(self, *args, **kwargs)
+
+    monkeypatch.setattr(fixtures.SyntheticSession, "load", slow_load)
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        sessions = list(pool.map(lambda _: main.get_loaded_session(*synthetic, "laps"), range(6)))
+    assert len(loads) == 1
+    assert all(session is sessions[0] for session in sessions)
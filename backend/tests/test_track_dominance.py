@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+
+LAP_LENGTH = 5000.0
+
+
+def lap(speed, samples=1200, seed=0):
+    # One lap of telemetry around a circle, Speed given as a function of Distance
+    rng = np.random.default_rng(seed)
+    distance = np.sort(np.concatenate([[0.0, LAP_LENGTH], rng.uniform(0, LAP_LENGTH, samples - 2)]))
+    angle = 2 * np.pi * distance / LAP_LENGTH
+    return pd.DataFrame({
+        "Distance": distance,
+        "Speed": speed(distance),
+        "X": np.cos(angle) * 800,
+        "Y": np.sin(angle) * 800,
+    })
+
+
+def baseline_winners(telemetries, num_minisectors):
+    # The per-row minisector assignment and groupby of the original track dominance route: the
+    # driver with the highest mean speed over their samples wins the minisector
+    frames = [telemetry.assign(Driver=driver) for driver, telemetry in telemetries.items()]
+    telemetry = pd.concat(frames)
+    minisector_length = telemetry['Distance'].max() / num_minisectors
+    telemetry['Minisector'] = telemetry['Distance'].apply(lambda dist: int(dist // minisector_length))
+    telemetry = telemetry[telemetry['Minisector'] < num_minisectors]
+    average_speed = telemetry.groupby(['Minisector', 'Driver'])['Speed'].mean().reset_index()
+    fastest = average_speed.loc[average_speed.groupby(['Minisector'])['Speed'].idxmax()]
+    return fastest.sort_values('Minisector')['Driver'].tolist()
+
+
+@pytest.mark.parametrize("num_minisectors", [1, 7, 21, 60])
+def test_winners_match_the_groupby_baseline(num_minisectors):
+    # Three drivers trading places around the lap, sampled at different distances
+    telemetries = {
+        "VER": lap(lambda d: 220 + 40 * np.sin(2 * np.pi * d / LAP_LENGTH), seed=1),
+        "HAM": lap(lambda d: 220 + 40 * np.cos(2 * np.pi * d / LAP_LENGTH), seed=2),
+        "LEC": lap(lambda d: 225 + 0 * d, seed=3),
+    }
+    dominance = main.compute_minisector_dominance(telemetries, num_minisectors)
+    winners = [dominance["drivers"][index] for index in dominance["sector_winner"]]
+    assert winners == baseline_winners(telemetries, num_minisectors)
+
+
+def test_sector_times_and_speeds():
+    telemetries = {"VER": lap(lambda d: 180 + 0 * d), "HAM": lap(lambda d: 200 + 0 * d, samples=300)}
+    dominance = main.compute_minisector_dominance(telemetries, num_minisectors=10)
+    assert dominance["drivers"] == ["VER", "HAM"]
+    assert dominance["sector_winner"].tolist() == [1] * 10
+    np.testing.assert_allclose(dominance["avg_speed"], [[180] * 10, [200] * 10])
+    # 500 m at 180 and 200 km/h
+    np.testing.assert_allclose(dominance["sector_time"], [[10.0] * 10, [9.0] * 10], rtol=1e-3)
+    # Every grid point carries its minisector's winner, along the first driver's track outline
+    assert len(dominance["fastest"]) == len(dominance["x"]) == len(dominance["y"])
+    assert set(dominance["fastest"].tolist()) == {1}
+    np.testing.assert_allclose(np.hypot(dominance["x"], dominance["y"]), 800, rtol=1e-3)
+
+
+def test_lap_length_is_the_shortest_lap():
+    # A lap whose distance runs longer is cut to the others' length instead of stretching the grid
+    short = lap(lambda d: 200 + 0 * d)
+    long = short.assign(Distance=short['Distance'] * 1.02, Speed=250.0)
+    dominance = main.compute_minisector_dominance({"VER": short, "HAM": long}, num_minisectors=4)
+    assert dominance["sector_winner"].tolist() == [1] * 4
+    assert dominance["sector_time"].sum(axis=1)[0] == pytest.approx(LAP_LENGTH / (200 / 3.6), rel=1e-3)